@@ -0,0 +1,468 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from collections import namedtuple, OrderedDict
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks import fixtures
+
+RESULTS_FOLDER = os.path.join(REPO_ROOT, "benchmarks", "results")
+HISTORY_FILE = os.path.join(RESULTS_FOLDER, "history.json")
+BASELINE_FILE = os.path.join(RESULTS_FOLDER, "baseline.json")
+
+# Slower than baseline by more than this fraction counts as a regression
+REGRESSION_THRESHOLD = 0.15
+DEFAULT_REPEAT = 3
+
+Benchmark = namedtuple("Benchmark", ["name", "description", "prepare", "sizes"])
+
+def ensure_qapplication():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+def folder_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+# Each prepare(params) builds its fixture and returns (run, cleanup):
+# run() is the timed call and returns (items, bytes) processed, cleanup()
+# runs untimed after every repeat
+
+def prepare_scan(params):
+    from resources.tools.folder_scanner.scan_engine import scan_folder_structure
+    tree = fixtures.directory_tree(**params)
+
+    def run():
+        result = scan_folder_structure(tree)
+        return result.count("\n") + 1, None
+    return run, None
+
+def prepare_scan_source(params):
+    from resources.tools.folder_scanner.scan_engine import scan_folder_structure
+    tree = fixtures.source_tree(**params)
+
+    def run():
+        result = scan_folder_structure(tree)
+        return result.count("\n") + 1, None
+    return run, None
+
+def prepare_scan_pruned(params):
+    from resources.tools.folder_scanner.scan_engine import scan_folder_structure
+    from resources.tools.folder_scanner.ignore_rules import build_rules
+    tree = fixtures.source_tree(**params)
+    rules = build_rules(tree, common_excludes=True)
+
+    def run():
+        result = scan_folder_structure(tree, rules=rules)
+        return result.count("\n") + 1, None
+    return run, None
+
+def prepare_write_scan(params):
+    from resources.tools.folder_scanner.scan_engine import write_scan
+    tree = fixtures.directory_tree(**params)
+    output_folder = tempfile.mkdtemp(prefix="bench-scan-")
+    output_file = os.path.join(output_folder, "tree_scan.txt")
+
+    def run():
+        lines = write_scan(tree, output_file)
+        return lines, os.path.getsize(output_file)
+
+    def cleanup():
+        shutil.rmtree(output_folder, ignore_errors=True)
+        os.makedirs(output_folder)
+    return run, cleanup
+
+def prepare_catalog_rescan(params):
+    from resources.tools.folder_scanner.catalog import ScanCatalog
+    tree = fixtures.directory_tree(**params)
+    catalog_folder = tempfile.mkdtemp(prefix="bench-catalog-")
+    catalog = ScanCatalog(os.path.join(catalog_folder, "catalog.db"))
+    catalog.rescan(tree)
+
+    def run():
+        scan_id = catalog.rescan(tree)
+        return catalog.scan_info(scan_id)["entries"], None
+    return run, None
+
+def prepare_disk_usage(params):
+    from resources.tools.folder_scanner.disk_usage import analyze_usage
+    folder = fixtures.mixed_folder(**params)
+
+    def run():
+        usage = analyze_usage(folder)
+        return usage["total_files"], usage["total_size"]
+    return run, None
+
+def prepare_find_duplicates(params):
+    from resources.tools.folder_scanner.duplicates import find_duplicates
+    folder = fixtures.duplicates_folder(**params)
+    total_bytes = folder_size(folder)
+
+    def run():
+        result = find_duplicates([folder])
+        return result["files"], total_bytes
+    return run, None
+
+def prepare_compare_verify(params):
+    from resources.tools.folder_scanner.tree_compare import compare_trees
+    folder = fixtures.mixed_folder(**params)
+    total_bytes = folder_size(folder)
+
+    def run():
+        # Comparing the folder with itself reads every byte twice and finds nothing
+        result = compare_trees(folder, folder, verify=True)
+        return result["summary"]["compared"], total_bytes * 2
+    return run, None
+
+def prepare_zip_encrypt(params):
+    from resources.tools.folder_encryptor.encryption_engine import zip_encrypt_folder
+    folder = fixtures.mixed_folder(**params)
+    total_bytes = folder_size(folder)
+    file_count = sum(len(files) for _, _, files in os.walk(folder))
+    output_folder = tempfile.mkdtemp(prefix="bench-zip-")
+    output_path = os.path.join(output_folder, "encrypted.zip")
+
+    def run():
+        zip_encrypt_folder(folder, output_path, "benchmark-password")
+        return file_count, total_bytes
+
+    def cleanup():
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    return run, cleanup
+
+def prepare_pdf_to_images(params):
+    from resources.tools.pdf_scraper.pdf_engine import convert_pdf_to_images
+    pdf_path = fixtures.pdf_document(**params)
+    output_folder = tempfile.mkdtemp(prefix="bench-pdf-")
+
+    def run():
+        image_paths = convert_pdf_to_images(pdf_path, output_folder)
+        return len(image_paths), folder_size(output_folder)
+
+    def cleanup():
+        shutil.rmtree(output_folder, ignore_errors=True)
+        os.makedirs(output_folder)
+    return run, cleanup
+
+def prepare_contact_load_data(params):
+    from resources.tools.social_blackbook.social_blackbook import Contact
+    folder = fixtures.contacts_folder(**params)
+    entries = sorted((entry.name, entry.path) for entry in os.scandir(folder) if entry.is_dir())
+
+    def run():
+        for name, path in entries:
+            Contact(name, path)
+        return len(entries), None
+    return run, None
+
+def prepare_load_contacts(params):
+    ensure_qapplication()
+    from resources.tools.social_blackbook.social_blackbook import SocialBlackbook
+    folder = fixtures.contacts_folder(**params)
+    widgets = []
+
+    def run():
+        blackbook = SocialBlackbook(social_folder=folder)
+        widgets.append(blackbook)
+        return len(blackbook.contacts), None
+
+    def cleanup():
+        widgets.pop().deleteLater()
+    return run, cleanup
+
+def prepare_update_events(params):
+    app = ensure_qapplication()
+    from types import SimpleNamespace
+    from resources.tools.social_blackbook.social_blackbook import Contact
+    from resources.widgets.calendar_reminder import CalendarReminderWidget
+    folder = fixtures.contacts_folder(**params)
+    contacts = {entry.name: Contact(entry.name, entry.path) for entry in os.scandir(folder) if entry.is_dir()}
+    event_count = sum(len(contact.important_dates) for contact in contacts.values())
+    widget = CalendarReminderWidget(SimpleNamespace(contacts=contacts))
+
+    def run():
+        widget.update_events()
+        return event_count, None
+
+    def cleanup():
+        # Let the widgets removed by the next update actually be deleted
+        app.processEvents()
+    return run, cleanup
+
+BENCHMARKS = OrderedDict((benchmark.name, benchmark) for benchmark in [
+    Benchmark("scan_deep_tree", "scan_folder_structure on a deep directory tree", prepare_scan,
+              {"small": {"depth": 8, "breadth": 2, "files_per_dir": 8},
+               "full": {"depth": 11, "breadth": 2, "files_per_dir": 10}}),
+    Benchmark("scan_wide_tree", "scan_folder_structure on a wide, shallow directory tree", prepare_scan,
+              {"small": {"depth": 1, "breadth": 2000, "files_per_dir": 2},
+               "full": {"depth": 2, "breadth": 120, "files_per_dir": 3}}),
+    Benchmark("scan_source_tree", "scan_folder_structure on a checkout with node_modules and .git",
+              prepare_scan_source,
+              {"small": {"depth": 8, "breadth": 2, "files_per_dir": 8},
+               "full": {"depth": 11, "breadth": 2, "files_per_dir": 10}}),
+    Benchmark("scan_source_tree_pruned", "The same checkout with the common excludes pruning node_modules and .git",
+              prepare_scan_pruned,
+              {"small": {"depth": 8, "breadth": 2, "files_per_dir": 8},
+               "full": {"depth": 11, "breadth": 2, "files_per_dir": 10}}),
+    Benchmark("scan_write_file", "write_scan streaming a deep tree to a scan file and index", prepare_write_scan,
+              {"small": {"depth": 8, "breadth": 2, "files_per_dir": 8},
+               "full": {"depth": 11, "breadth": 2, "files_per_dir": 10}}),
+    Benchmark("catalog_rescan_unchanged", "ScanCatalog.rescan of an unchanged deep tree", prepare_catalog_rescan,
+              {"small": {"depth": 8, "breadth": 2, "files_per_dir": 8},
+               "full": {"depth": 11, "breadth": 2, "files_per_dir": 10}}),
+    Benchmark("disk_usage_mixed", "analyze_usage totals and top-N reports over a mixed-content folder",
+              prepare_disk_usage,
+              {"small": {"file_count": 60, "max_size": 1024 * 1024},
+               "full": {"file_count": 300, "max_size": 4 * 1024 * 1024}}),
+    Benchmark("find_duplicates", "find_duplicates over copies, near-copies and unique files",
+              prepare_find_duplicates,
+              {"small": {"file_count": 200, "max_size": 1024 * 1024},
+               "full": {"file_count": 1000, "max_size": 16 * 1024 * 1024}}),
+    Benchmark("compare_verify", "compare_trees with content verification of two identical trees",
+              prepare_compare_verify,
+              {"small": {"file_count": 60, "max_size": 1024 * 1024},
+               "full": {"file_count": 300, "max_size": 4 * 1024 * 1024}}),
+    Benchmark("zip_encrypt_mixed", "zip_encrypt_folder on text, random and zero-filled files",
+              prepare_zip_encrypt,
+              {"small": {"file_count": 60, "max_size": 1024 * 1024},
+               "full": {"file_count": 300, "max_size": 4 * 1024 * 1024}}),
+    Benchmark("pdf_to_images", "convert_pdf_to_images on a generated slide deck", prepare_pdf_to_images,
+              {"small": {"pages": 40}, "full": {"pages": 300}}),
+    Benchmark("contact_load_data", "Contact.load_data for every contact folder", prepare_contact_load_data,
+              {"small": {"count": 500, "dates_per_contact": 3},
+               "full": {"count": 5000, "dates_per_contact": 3}}),
+    Benchmark("blackbook_load_contacts", "SocialBlackbook.load_contacts including the list widgets",
+              prepare_load_contacts,
+              {"small": {"count": 500, "dates_per_contact": 3},
+               "full": {"count": 5000, "dates_per_contact": 3}}),
+    Benchmark("calendar_update_events", "CalendarReminderWidget.update_events for a large contact set",
+              prepare_update_events,
+              {"small": {"count": 200, "dates_per_contact": 3},
+               "full": {"count": 1000, "dates_per_contact": 5}}),
+])
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def run_benchmark(name, size, repeat):
+    benchmark = BENCHMARKS[name]
+    run, cleanup = benchmark.prepare(benchmark.sizes[size])
+    timings = []
+    items = nbytes = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        items, nbytes = run()
+        timings.append(time.perf_counter() - started)
+        if cleanup:
+            cleanup()
+    wall = statistics.median(timings)
+    return {
+        "wall_seconds": round(wall, 4),
+        "min_seconds": round(min(timings), 4),
+        "runs": [round(timing, 4) for timing in timings],
+        "items": items,
+        "items_per_second": round(items / wall, 1) if items and wall else None,
+        "bytes": nbytes,
+        "mb_per_second": round(nbytes / wall / (1024 * 1024), 2) if nbytes and wall else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def run_isolated(name, size, repeat):
+    # A fresh interpreter per benchmark keeps peak RSS attributable to it
+    command = [sys.executable, "-m", "benchmarks.bench", "child", name, "--size", size, "--repeat", str(repeat)]
+    completed = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        return {"error": (completed.stderr.strip().splitlines() or ["benchmark failed"])[-1]}
+    return json.loads(lines[-1])
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def load_json(path, default):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def save_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
+
+def format_row(name, result):
+    if "error" in result:
+        return f"{name:<26} ERROR: {result['error']}"
+    throughput = f"{result['items_per_second']:>10.1f} items/s" if result["items_per_second"] else " " * 18
+    if result["mb_per_second"]:
+        throughput += f" {result['mb_per_second']:>8.2f} MB/s"
+    rss = f"{result['peak_rss_mb']:>8.1f} MB" if result["peak_rss_mb"] is not None else " " * 11
+    return f"{name:<26} {result['wall_seconds']:>9.3f} s {rss} {throughput}"
+
+def command_run(args):
+    names = args.names or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmark(s): {', '.join(unknown)}")
+        return 2
+    record = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "size": args.size,
+        "repeat": args.repeat,
+        "results": {},
+    }
+    print(f"{'benchmark':<26} {'median':>11} {'peak RSS':>11} throughput")
+    for name in names:
+        result = run_isolated(name, args.size, args.repeat)
+        record["results"][name] = result
+        print(format_row(name, result))
+    history = load_json(HISTORY_FILE, [])
+    history.append(record)
+    save_json(HISTORY_FILE, history)
+    if args.save_baseline:
+        save_json(BASELINE_FILE, record)
+        print(f"Baseline saved to {BASELINE_FILE}")
+    return 1 if any("error" in result for result in record["results"].values()) else 0
+
+def command_baseline(args):
+    history = load_json(HISTORY_FILE, [])
+    if not history:
+        print("No benchmark history yet; run `python -m benchmarks.bench run` first")
+        return 1
+    save_json(BASELINE_FILE, history[args.index])
+    print(f"Baseline set to the run from {history[args.index]['time']} ({history[args.index]['commit']})")
+    return 0
+
+def compare_results(baseline, current, threshold):
+    # Returns (name, metric, before, after, change) for every metric that got
+    # worse by more than the threshold
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before or "error" in before or "error" in result:
+            continue
+        for metric in ("wall_seconds", "peak_rss_mb"):
+            if before.get(metric) and result.get(metric) is not None:
+                change = result[metric] / before[metric] - 1
+                if change > threshold:
+                    regressions.append((name, metric, before[metric], result[metric], change))
+    return regressions
+
+def command_compare(args):
+    baseline = load_json(args.baseline, None)
+    history = load_json(HISTORY_FILE, [])
+    if baseline is None or not history:
+        print("Need a baseline and at least one run; see `python -m benchmarks.bench --help`")
+        return 1
+    current = history[-1]
+    if current["size"] != baseline["size"]:
+        print(f"Latest run used size '{current['size']}' but the baseline used '{baseline['size']}'")
+        return 1
+    print(f"Baseline: {baseline['time']} ({baseline['commit']})  Current: {current['time']} ({current['commit']})")
+    print(f"{'benchmark':<26} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before or "error" in before or "error" in result:
+            print(f"{name:<26} {'n/a':>10}")
+            continue
+        change = result["wall_seconds"] / before["wall_seconds"] - 1 if before["wall_seconds"] else 0
+        print(f"{name:<26} {before['wall_seconds']:>9.3f}s {result['wall_seconds']:>9.3f}s {change:>+8.1%}")
+    regressions = compare_results(baseline, current, args.threshold)
+    for name, metric, before, after, change in regressions:
+        print(f"REGRESSION {name}: {metric} {before} -> {after} ({change:+.1%})")
+    if not regressions:
+        print(f"No regressions above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+def command_list(args):
+    for name, benchmark in BENCHMARKS.items():
+        print(f"{name:<26} {benchmark.description}")
+    return 0
+
+def command_fixtures(args):
+    if args.remove:
+        fixtures.remove_fixtures()
+        print(f"Removed {fixtures.FIXTURE_ROOT}")
+    return 0
+
+def command_child(args):
+    print(json.dumps(run_benchmark(args.name, args.size, args.repeat)))
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench",
+                                     description="Time the tool engines on reproducible synthetic data.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run benchmarks and append the results to the history")
+    run_parser.add_argument("names", nargs="*", help="Benchmarks to run (default: all)")
+    run_parser.add_argument("--size", choices=["small", "full"], default="small")
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    run_parser.add_argument("--save-baseline", action="store_true", help="Also store this run as the baseline")
+    run_parser.set_defaults(handler=command_run)
+
+    baseline_parser = subparsers.add_parser("baseline", help="Store a run from the history as the baseline")
+    baseline_parser.add_argument("--index", type=int, default=-1, help="History entry (default: latest)")
+    baseline_parser.set_defaults(handler=command_baseline)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare the latest run against the baseline")
+    compare_parser.add_argument("--baseline", default=BASELINE_FILE)
+    compare_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    compare_parser.set_defaults(handler=command_compare)
+
+    list_parser = subparsers.add_parser("list", help="List the available benchmarks")
+    list_parser.set_defaults(handler=command_list)
+
+    fixtures_parser = subparsers.add_parser("fixtures", help="Manage the generated fixtures")
+    fixtures_parser.add_argument("--remove", action="store_true", help=f"Delete {fixtures.FIXTURE_ROOT}")
+    fixtures_parser.set_defaults(handler=command_fixtures)
+
+    child_parser = subparsers.add_parser("child")
+    child_parser.add_argument("name", choices=list(BENCHMARKS))
+    child_parser.add_argument("--size", choices=["small", "full"], default="small")
+    child_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    child_parser.set_defaults(handler=command_child)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import os
+import json
+import random
+import shutil
+import tempfile
+from datetime import date, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_ROOT = os.path.join(tempfile.gettempdir(), "mecha_toolbox_benchmarks")
+SAMPLE_PHOTO = os.path.join(REPO_ROOT, "resources", "ui", "cog.jpg")
+
+# Every fixture is generated from this seed, so runs on different days and
+# machines time exactly the same data
+SEED = 1234
+
+WORDS = ("mecha", "toolbox", "alpha", "bravo", "notes", "draft", "final", "backup", "photo",
+         "report", "invoice", "music", "video", "scan", "archive", "project", "data", "log")
+
+def fixture_path(name, **params):
+    suffix = "-".join(f"{key}{value}" for key, value in sorted(params.items()))
+    return os.path.join(FIXTURE_ROOT, f"{name}-{suffix}" if suffix else name)
+
+def build_once(path, builder, *args):
+    # A fixture is only reused once it has been completely written; the
+    # marker lives next to it so it never shows up in the scanned data
+    marker = path + ".complete"
+    if os.path.exists(marker):
+        return path
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+    builder(path, random.Random(SEED), *args)
+    open(marker, "w").close()
+    return path
+
+def random_name(rng, extension=""):
+    return "_".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))) + f"_{rng.randint(0, 99999)}" + extension
+
+def write_random_file(path, rng, size, kind):
+    with open(path, "wb") as f:
+        if kind == "text":
+            line = " ".join(rng.choice(WORDS) for _ in range(12)).encode() + b"\n"
+            f.write((line * (size // len(line) + 1))[:size])
+        elif kind == "zeros":
+            f.write(bytes(size))
+        else:
+            f.write(rng.randbytes(size))
+
+def build_tree(path, rng, depth, breadth, files_per_dir):
+    for _ in range(files_per_dir):
+        write_random_file(os.path.join(path, random_name(rng, ".txt")), rng, rng.randint(0, 2048), "text")
+    if depth == 0:
+        return
+    for i in range(breadth):
+        child = os.path.join(path, f"{random_name(rng)}_{i}")
+        os.makedirs(child)
+        build_tree(child, rng, depth - 1, breadth, files_per_dir)
+
+def directory_tree(depth, breadth, files_per_dir):
+    path = fixture_path("tree", depth=depth, breadth=breadth, files=files_per_dir)
+    return build_once(path, build_tree, depth, breadth, files_per_dir)
+
+def build_source_tree(path, rng, depth, breadth, files_per_dir):
+    # A small project next to the dependency and VCS folders that make up
+    # most of a real checkout
+    for folder in ("src", "node_modules", os.path.join(".git", "objects")):
+        os.makedirs(os.path.join(path, folder))
+    build_tree(os.path.join(path, "src"), rng, 2, breadth, files_per_dir)
+    build_tree(os.path.join(path, "node_modules"), rng, depth, breadth, files_per_dir)
+    build_tree(os.path.join(path, ".git", "objects"), rng, depth - 1, breadth, files_per_dir)
+
+def source_tree(depth, breadth, files_per_dir):
+    path = fixture_path("source", depth=depth, breadth=breadth, files=files_per_dir)
+    return build_once(path, build_source_tree, depth, breadth, files_per_dir)
+
+def build_mixed_folder(path, rng, file_count, max_size):
+    # Text compresses well, random data does not and zeros are the extreme
+    # case, which together cover the range the LZMA step sees in practice
+    extensions = {"text": ".txt", "random": ".bin", "zeros": ".img"}
+    for i in range(file_count):
+        kind = rng.choice(("text", "text", "random", "zeros"))
+        folder = os.path.join(path, f"folder_{i % 8}")
+        os.makedirs(folder, exist_ok=True)
+        size = int(max_size ** rng.random())  # Log-distributed: many small, few large
+        write_random_file(os.path.join(folder, random_name(rng, extensions[kind])), rng, size, kind)
+
+def mixed_folder(file_count, max_size):
+    path = fixture_path("mixed", files=file_count, max=max_size)
+    return build_once(path, build_mixed_folder, file_count, max_size)
+
+def build_duplicates_folder(path, rng, file_count, max_size):
+    # A third of the files are exact copies and a sixth share size and head
+    # with another file but differ near the end, so every stage of the
+    # duplicate finder has work to do
+    originals = []
+    for i in range(file_count):
+        folder = os.path.join(path, f"folder_{i % 8}")
+        os.makedirs(folder, exist_ok=True)
+        target = os.path.join(folder, random_name(rng, ".bin"))
+        roll = rng.random()
+        if originals and roll < 0.33:
+            shutil.copyfile(rng.choice(originals), target)
+        elif originals and roll < 0.5:
+            source = rng.choice(originals)
+            shutil.copyfile(source, target)
+            with open(target, "r+b") as f:
+                f.seek(max(0, os.path.getsize(source) - 1))
+                f.write(b"\xff")
+        else:
+            write_random_file(target, rng, int(max_size ** rng.random()), "random")
+            originals.append(target)
+
+def duplicates_folder(file_count, max_size):
+    path = fixture_path("duplicates", files=file_count, max=max_size)
+    return build_once(path, build_duplicates_folder, file_count, max_size)
+
+def build_pdf(path, rng, pages):
+    import fitz
+    document = fitz.open()
+    for page_num in range(pages):
+        page = document.new_page()
+        page.insert_text((72, 72), f"Slide {page_num + 1}", fontsize=28)
+        text = " ".join(rng.choice(WORDS) for _ in range(150))
+        page.insert_textbox(fitz.Rect(72, 110, 540, 400), text, fontsize=11)
+        for _ in range(6):
+            x, y = rng.uniform(72, 440), rng.uniform(420, 680)
+            page.draw_rect(fitz.Rect(x, y, x + 100, y + 60),
+                           color=(rng.random(), rng.random(), rng.random()),
+                           fill=(rng.random(), rng.random(), rng.random()))
+    document.save(os.path.join(path, "document.pdf"))
+    document.close()
+
+def pdf_document(pages):
+    path = build_once(fixture_path("pdf", pages=pages), build_pdf, pages)
+    return os.path.join(path, "document.pdf")
+
+def build_contacts(path, rng, count, dates_per_contact):
+    # Dates are far in the future so every event stays "upcoming" no matter
+    # when the benchmark runs
+    first_day = date(2100, 1, 1)
+    for i in range(count):
+        folder = os.path.join(path, f"contact_{i:05d}")
+        for subfolder in ("Photos", "Videos", "Lewd"):
+            os.makedirs(os.path.join(folder, subfolder))
+        files = {
+            "info.json": {"Full Name": f"Contact {i}", "Date of Birth": "1990-01-01",
+                          "Hometown": rng.choice(WORDS), "Address": "", "Phone Number": "",
+                          "Email Address": f"contact{i}@example.com"},
+            "memories.json": [" ".join(rng.choice(WORDS) for _ in range(20)) for _ in range(rng.randint(0, 5))],
+            "likes_dislikes.json": {"likes": rng.sample(WORDS, 3), "dislikes": rng.sample(WORDS, 2)},
+            "social_media.json": {"Website": f"https://example.com/{i}"},
+            "important_dates.json": [
+                {"date": (first_day + timedelta(days=rng.randint(0, 364))).isoformat(),
+                 "description": rng.choice(WORDS)}
+                for _ in range(dates_per_contact)],
+            "tags.json": rng.sample(WORDS, rng.randint(0, 3)),
+        }
+        for filename, data in files.items():
+            with open(os.path.join(folder, filename), "w") as f:
+                json.dump(data, f)
+        if i % 4 == 0 and os.path.exists(SAMPLE_PHOTO):
+            shutil.copy(SAMPLE_PHOTO, os.path.join(folder, "photo.jpg"))
+
+def contacts_folder(count, dates_per_contact):
+    path = fixture_path("contacts", count=count, dates=dates_per_contact)
+    return build_once(path, build_contacts, count, dates_per_contact)
+
+def remove_fixtures():
+    if os.path.exists(FIXTURE_ROOT):
+        shutil.rmtree(FIXTURE_ROOT)
@@ -0,0 +1,499 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import threading
+
+# Allow `python -m mecha_toolbox` from any directory, like root.py does
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_MISSING_DEPENDENCY = 3
+EXIT_NO_INPUTS = 4
+
+# Set by main(): the original stdout, reserved for JSON progress lines
+json_output = None
+
+class ProgressReporter:
+    # One JSON object per line on stdout, so scripts can stream-parse progress
+    def __init__(self, tool, stream=None):
+        self.tool = tool
+        self.stream = stream or json_output or sys.stdout
+        self.lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        record = {"event": event, "tool": self.tool, "time": round(time.time(), 3)}
+        record.update(fields)
+        # Batch tools report from several worker threads
+        with self.lock:
+            self.stream.write(json.dumps(record) + "\n")
+            self.stream.flush()
+
+    def callback(self, item):
+        def progress(message, done=None, total=None, bytes_done=None, bytes_total=None, fraction=None, eta=None):
+            fields = {"input": item, "message": message, "done": done, "total": total,
+                      "bytes_done": bytes_done, "bytes_total": bytes_total,
+                      "percent": round(fraction * 100, 1) if fraction is not None else None,
+                      "eta": round(eta, 1) if eta is not None else None}
+            self.emit("progress", **{key: value for key, value in fields.items() if value is not None})
+        return progress
+
+def expand_inputs(patterns, kind="file"):
+    matches = []
+    for pattern in patterns:
+        pattern = os.path.expanduser(pattern)
+        candidates = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for candidate in candidates:
+            if (kind == "dir" and os.path.isdir(candidate)) or (kind == "file" and os.path.isfile(candidate)):
+                if candidate not in matches:
+                    matches.append(candidate)
+    return matches
+
+def run_batch(reporter, items, worker):
+    if not items:
+        reporter.emit("error", message="No inputs matched")
+        return EXIT_NO_INPUTS
+    failed = 0
+    started = time.perf_counter()
+    for item in items:
+        reporter.emit("start", input=item)
+        item_started = time.perf_counter()
+        try:
+            result = worker(item, reporter.callback(item)) or {}
+        except Exception as e:
+            failed += 1
+            reporter.emit("error", input=item, message=str(e))
+            continue
+        reporter.emit("done", input=item, seconds=round(time.perf_counter() - item_started, 3), **result)
+    reporter.emit("summary", total=len(items), succeeded=len(items) - failed, failed=failed,
+                  seconds=round(time.perf_counter() - started, 3))
+    return EXIT_FAILED if failed else EXIT_OK
+
+def missing_dependency(reporter, name):
+    reporter.emit("error", message=f"{name} is not installed")
+    return EXIT_MISSING_DEPENDENCY
+
+def scan_rules(args, directory):
+    from resources.tools.folder_scanner.ignore_rules import build_rules, read_ignore_file
+    exclude = list(args.exclude)
+    for path in args.exclude_from:
+        exclude += read_ignore_file(path)
+    return build_rules(directory, exclude, args.include, common_excludes=args.exclude_common,
+                       use_gitignore=args.gitignore)
+
+def has_filters(args):
+    return bool(args.exclude or args.exclude_from or args.include or args.exclude_common
+                or args.gitignore or args.max_depth is not None)
+
+def run_scan(args):
+    from resources.tools.folder_scanner.scan_engine import write_scan, scan_output_file
+    from resources.tools.folder_scanner.catalog import ScanCatalog
+    reporter = ProgressReporter("scan")
+    if args.catalog and (has_filters(args) or args.format != "text" or args.watch):
+        # The catalog keeps whole trees so scans of a root stay comparable
+        reporter.emit("error", message="--catalog scans always cover the whole tree as text")
+        return EXIT_USAGE
+    if args.watch:
+        return run_watch(args, reporter)
+
+    def scan(directory, progress):
+        output_file = scan_output_file(directory, args.output, args.format)
+        if args.catalog:
+            catalog = ScanCatalog()
+            scan_id = catalog.rescan(directory, progress, verify_files=args.verify)
+            lines = catalog.write_scan_file(scan_id, output_file)
+            return {"output": output_file, "lines": lines, "scan_id": scan_id}
+        lines = write_scan(directory, output_file, progress, max_depth=args.max_depth,
+                           rules=scan_rules(args, directory), output_format=args.format)
+        return {"output": output_file, "lines": lines}
+
+    return run_batch(reporter, expand_inputs(args.inputs, kind="dir"), scan)
+
+def run_watch(args, reporter):
+    from resources.tools.folder_scanner.scan_engine import scan_output_file
+    from resources.tools.folder_scanner.watcher import ScanWatch
+    directories = expand_inputs(args.inputs, kind="dir")
+    if len(directories) != 1:
+        reporter.emit("error", message="--watch takes exactly one directory")
+        return EXIT_USAGE if directories else EXIT_NO_INPUTS
+    directory = directories[0]
+    output_file = scan_output_file(directory, args.output, args.format)
+    watch = ScanWatch(directory, output_file, args.format, rules=scan_rules(args, directory),
+                      max_depth=args.max_depth, poll_interval=args.poll_interval, use_polling=args.poll)
+    reporter.emit("start", input=directory, output=output_file, changes=watch.changes_file)
+    try:
+        watch.run(reporter.callback(directory))
+    except KeyboardInterrupt:
+        pass  # Ctrl+C is how a watch ends
+    reporter.emit("done", input=directory, output=output_file, mode=watch.mode, changes=watch.change_count)
+    return EXIT_OK
+
+def run_scan_diff(args):
+    from resources.tools.folder_scanner.scan_engine import scan_output_file
+    from resources.tools.folder_scanner.catalog import ScanCatalog, format_diff
+    reporter = ProgressReporter("scan-diff")
+    catalog = ScanCatalog()
+    scans = catalog.scans(args.directory)
+    if len(scans) < 2 and (args.old is None or args.new is None):
+        reporter.emit("error", message="Need at least two catalog scans of this folder (scan --catalog)")
+        return EXIT_NO_INPUTS
+    old_id = args.old if args.old is not None else scans[-2]["id"]
+    new_id = args.new if args.new is not None else scans[-1]["id"]
+    try:
+        diff = catalog.diff(old_id, new_id)
+    except (KeyError, ValueError) as e:
+        reporter.emit("error", message=str(e).strip("'\""))
+        return EXIT_USAGE
+    output_folder = os.path.dirname(scan_output_file(args.directory, args.output))
+    name = os.path.basename(os.path.normpath(args.directory))
+    report_file = os.path.join(output_folder, f"{name}_diff_{old_id}_{new_id}.txt")
+    with open(report_file, "w") as f:
+        f.write(format_diff(diff))
+    reporter.emit("done", input=args.directory, old_scan=old_id, new_scan=new_id, output=report_file,
+                  **{key: len(entries) for key, entries in diff.items()})
+    return EXIT_OK
+
+def run_usage(args):
+    from resources.tools.folder_scanner.disk_usage import analyze_usage, usage_output_file, save_usage
+    reporter = ProgressReporter("usage")
+
+    def measure(directory, progress):
+        usage = analyze_usage(directory, progress, top_n=args.top, max_depth=args.max_depth,
+                              rules=scan_rules(args, directory))
+        output_file = save_usage(usage, usage_output_file(directory, args.output))
+        return {"output": output_file, "size": usage["total_size"], "files": usage["total_files"]}
+
+    return run_batch(reporter, expand_inputs(args.inputs, kind="dir"), measure)
+
+def run_duplicates(args):
+    from resources.tools.folder_scanner.duplicates import find_duplicates, duplicates_output_file, save_duplicates
+    reporter = ProgressReporter("duplicates")
+    directories = expand_inputs(args.inputs, kind="dir")
+    if not directories:
+        reporter.emit("error", message="No inputs matched")
+        return EXIT_NO_INPUTS
+    reporter.emit("start", input=directories)
+    started = time.perf_counter()
+    result = find_duplicates(directories, reporter.callback(directories), min_size=args.min_size,
+                             rules_for=lambda directory: scan_rules(args, directory), max_depth=args.max_depth)
+    output_file = save_duplicates(result, duplicates_output_file(directories, args.output))
+    reporter.emit("done", input=directories, seconds=round(time.perf_counter() - started, 3), output=output_file,
+                  files=result["files"], groups=len(result["groups"]), reclaimable=result["reclaimable"])
+    return EXIT_OK
+
+def run_compare(args):
+    from resources.tools.folder_scanner.tree_compare import compare_trees, comparison_output_file, write_comparison
+    reporter = ProgressReporter("compare")
+    for directory in (args.source, args.copy):
+        if not os.path.isdir(directory):
+            reporter.emit("error", message=f"Not a directory: {directory}")
+            return EXIT_NO_INPUTS
+    reporter.emit("start", input=args.source, copy=args.copy)
+    started = time.perf_counter()
+    result = compare_trees(args.source, args.copy, reporter.callback(args.source), verify=args.verify,
+                           rules_for=lambda directory: scan_rules(args, directory), max_depth=args.max_depth)
+    output_file = write_comparison(result, comparison_output_file(args.source, args.output, args.format), args.format)
+    reporter.emit("done", input=args.source, copy=args.copy, seconds=round(time.perf_counter() - started, 3),
+                  output=output_file, **result["summary"])
+    # Like diff(1): 1 when the trees differ, so scripts can check a backup
+    return EXIT_FAILED if result["differences"] else EXIT_OK
+
+def run_pdf(args):
+    reporter = ProgressReporter("pdf")
+    try:
+        from resources.tools.pdf_scraper.pdf_engine import scrape_pdf, default_output_folder
+    except ImportError:
+        return missing_dependency(reporter, "PyMuPDF")
+    inputs = expand_inputs(args.inputs)
+    output_root = args.output or default_output_folder()
+
+    def scrape(pdf_path, progress):
+        # Several PDFs would overwrite each other's slide_N.png in one folder
+        output_folder = output_root
+        if len(inputs) > 1:
+            output_folder = os.path.join(output_root, os.path.splitext(os.path.basename(pdf_path))[0])
+        return {"output": scrape_pdf(pdf_path, output_folder, progress)}
+
+    return run_batch(reporter, inputs, scrape)
+
+def run_convert(args):
+    from resources.services.capabilities import get_capability_service
+    from resources.tools.video_format_converter.conversion_engine import default_output_folder
+    from resources.tools.video_format_converter.conversion_queue import (plan_conversions, convert_queue,
+                                                                         CONVERTED, SKIPPED)
+    from resources.tools.video_format_converter.presets import preset_threads
+    from resources.tools.video_format_converter.conversion_cache import get_conversion_cache, get_output_log
+    reporter = ProgressReporter("convert")
+    segmented = args.segmented or bool(args.segments)
+    if segmented and args.target_size:
+        reporter.emit("error", message="--target-size can't be combined with --segmented")
+        return EXIT_USAGE
+    ffmpeg_path = get_capability_service().path("ffmpeg")
+    if not ffmpeg_path:
+        return missing_dependency(reporter, "ffmpeg")
+    ffprobe_path = get_capability_service().path("ffprobe")
+    if (args.target_size or args.estimate) and not ffprobe_path:
+        return missing_dependency(reporter, "ffprobe")
+    target_size = int(args.target_size * 1024 * 1024) if args.target_size else None
+    encoders = get_capability_service().encoders()
+    output_folder = args.output or default_output_folder()
+    os.makedirs(output_folder, exist_ok=True)
+    plan = plan_conversions(expand_inputs(args.inputs) + expand_inputs(args.inputs, kind="dir"),
+                            args.format, output_folder)
+    if not plan:
+        reporter.emit("error", message="No inputs matched")
+        return EXIT_NO_INPUTS
+
+    def progress(message, done=None, total=None, bytes_done=None, bytes_total=None, fraction=None, eta=None):
+        reporter.emit("progress", message=message, done=done, total=total,
+                      bytes_done=bytes_done, bytes_total=bytes_total,
+                      percent=round(fraction * 100, 1) if fraction is not None else None,
+                      eta=round(eta, 1) if eta is not None else None)
+
+    def file_finished(record):
+        fields = {key: value for key, value in record.items() if key not in ("input", "status", "error")}
+        if record["status"] == CONVERTED:
+            reporter.emit("done", input=record["input"], **fields)
+        elif record["status"] == SKIPPED:
+            reporter.emit("skipped", input=record["input"], output=record["output"], reason="up to date")
+        else:
+            reporter.emit("error", input=record["input"], message=record["error"])
+
+    if args.estimate:
+        from resources.tools.video_format_converter.calibration import estimate_conversion
+        estimates = estimate_conversion(plan, args.format, ffmpeg_path, ffprobe_path, encoders,
+                                        get_capability_service().version("ffmpeg"), target_size, progress)
+        reporter.emit("estimate", files=len(plan), seconds={preset: round(seconds, 1)
+                                                            for preset, seconds in estimates.items()})
+        return EXIT_OK
+
+    threads = args.threads or preset_threads(args.preset)
+    result = convert_queue(plan, args.format, ffmpeg_path, progress, ffprobe_path, threads, args.jobs,
+                           on_file=file_finished, encoders=encoders, segmented=segmented, segments=args.segments,
+                           preset=args.preset, target_size=target_size,
+                           cache=None if args.no_cache else get_conversion_cache(), outputs=get_output_log())
+    reporter.emit("summary", total=len(plan), succeeded=result["converted"], skipped=result["skipped"],
+                  failed=result["failed"], workers=result["workers"], threads=result["threads"],
+                  seconds=result["seconds"], mb_per_second=result["mb_per_second"],
+                  cache_hits=result["cache_hits"], cache_misses=result["cache_misses"],
+                  saved_seconds=result["saved_seconds"])
+    return EXIT_FAILED if result["failed"] else EXIT_OK
+
+def run_thumbs(args):
+    from resources.services.capabilities import get_capability_service
+    from resources.tools.video_thumbnails.thumbnail_engine import (make_thumbnails_batch, LAYOUTS, SHEET, SPRITE,
+                                                                   MADE, CACHED)
+    reporter = ProgressReporter("thumbs")
+    ffmpeg_path = get_capability_service().path("ffmpeg")
+    if not ffmpeg_path:
+        return missing_dependency(reporter, "ffmpeg")
+    ffprobe_path = get_capability_service().path("ffprobe")
+    if not ffprobe_path:
+        return missing_dependency(reporter, "ffprobe")
+    inputs = expand_inputs(args.inputs) + expand_inputs(args.inputs, kind="dir")
+    if not inputs:
+        reporter.emit("error", message="No inputs matched")
+        return EXIT_NO_INPUTS
+    kind = SPRITE if args.sprite else SHEET
+    layout = dict(LAYOUTS[kind])
+    for key in ("columns", "rows", "width"):
+        if getattr(args, key):
+            layout[key] = getattr(args, key)
+
+    def progress(message, done=None, total=None, bytes_done=None, bytes_total=None, fraction=None, eta=None):
+        reporter.emit("progress", message=message, done=done, total=total,
+                      percent=round(fraction * 100, 1) if fraction is not None else None)
+
+    def file_finished(record):
+        fields = {key: value for key, value in record.items() if key not in ("input", "status", "error")}
+        if record["status"] == MADE:
+            reporter.emit("done", input=record["input"], **fields)
+        elif record["status"] == CACHED:
+            reporter.emit("skipped", input=record["input"], reason="up to date", **fields)
+        else:
+            reporter.emit("error", input=record["input"], message=record["error"])
+
+    result = make_thumbnails_batch(inputs, kind, ffmpeg_path, ffprobe_path, progress, file_finished, layout)
+    if not result["files"]:
+        reporter.emit("error", message="No videos found in the inputs")
+        return EXIT_NO_INPUTS
+    reporter.emit("summary", total=len(result["files"]), succeeded=result["made"], skipped=result["cached"],
+                  failed=result["failed"], frames=result["frames"], seconds=result["seconds"])
+    return EXIT_FAILED if result["failed"] else EXIT_OK
+
+def run_encrypt(args):
+    reporter = ProgressReporter("encrypt")
+    try:
+        from resources.tools.folder_encryptor.encryption_engine import encrypt_folder
+    except ImportError:
+        return missing_dependency(reporter, "pyzipper")
+
+    def encrypt(folder_path, progress):
+        password, output_path, log_file = encrypt_folder(folder_path, args.output, progress)
+        # stdout tends to end up in cron mail and CI logs, so the password
+        # stays in the log file unless asked for
+        result = {"output": output_path, "log": log_file}
+        if args.print_password:
+            result["password"] = password
+        return result
+
+    return run_batch(reporter, expand_inputs(args.inputs, kind="dir"), encrypt)
+
+def run_ytdl(args):
+    from resources.services.capabilities import get_capability_service
+    from resources.tools.ytdl.download_engine import (download_highest_quality_video, download_highest_quality_audio,
+                                                      default_output_folder)
+    reporter = ProgressReporter("ytdl")
+    yt_dlp_path = get_capability_service().path("yt-dlp")
+    if not yt_dlp_path:
+        return missing_dependency(reporter, "yt-dlp")
+    if args.no_video and args.no_audio:
+        reporter.emit("error", message="Nothing to download: both --no-video and --no-audio given")
+        return EXIT_USAGE
+    output_folder = args.output or default_output_folder()
+    os.makedirs(output_folder, exist_ok=True)
+
+    def download(url, progress):
+        if not args.no_video:
+            download_highest_quality_video(url, output_folder, yt_dlp_path, progress)
+        if not args.no_audio:
+            download_highest_quality_audio(url, output_folder, yt_dlp_path, progress)
+        return {"output": output_folder}
+
+    return run_batch(reporter, list(dict.fromkeys(args.urls)), download)
+
+def add_filter_arguments(parser):
+    parser.add_argument("--exclude", action="append", default=[], metavar="PATTERN",
+                        help=".gitignore-style pattern to skip (repeatable; '!' re-includes)")
+    parser.add_argument("--exclude-from", action="append", default=[], metavar="FILE",
+                        help="Read exclude patterns from a .gitignore-style file")
+    parser.add_argument("--include", action="append", default=[], metavar="PATTERN",
+                        help="Only keep files matching one of these patterns (repeatable)")
+    parser.add_argument("--exclude-common", action="store_true",
+                        help="Skip VCS, dependency and build folders (.git, node_modules, build, ...)")
+    parser.add_argument("--gitignore", action="store_true", help="Apply the scanned folder's own .gitignore")
+    parser.add_argument("--max-depth", type=int, help="Don't descend below this many levels")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m mecha_toolbox",
+                                     description="Run Mecha's Toolbox tools without starting the GUI. "
+                                                 "Progress is written to stdout as JSON lines.")
+    subparsers = parser.add_subparsers(dest="tool", required=True)
+
+    scan_parser = subparsers.add_parser("scan", help="Write the folder structure of directories to text files")
+    scan_parser.add_argument("inputs", nargs="+", help="Directories or glob patterns")
+    scan_parser.add_argument("-o", "--output", help="Output folder (default: ~/Documents/folder_scanner)")
+    scan_parser.add_argument("--catalog", action="store_true",
+                             help="Store the scan in the catalog; rescans skip unchanged directories")
+    scan_parser.add_argument("--verify", action="store_true",
+                             help="With --catalog, also stat files in unchanged directories")
+    scan_parser.add_argument("--format", default="text", choices=["text", "ndjson", "json"],
+                             help="Indented text, one JSON object per entry, or one compact JSON tree")
+    scan_parser.add_argument("--watch", action="store_true",
+                             help="After scanning, keep the output file up to date until Ctrl+C")
+    scan_parser.add_argument("--poll", action="store_true",
+                             help="With --watch, poll folder mtimes instead of using inotify (e.g. network shares)")
+    scan_parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds between polls")
+    add_filter_arguments(scan_parser)
+    scan_parser.set_defaults(handler=run_scan)
+
+    diff_parser = subparsers.add_parser("scan-diff", help="Diff two catalog scans of a directory")
+    diff_parser.add_argument("directory")
+    diff_parser.add_argument("--from", dest="old", type=int, help="Older scan id (default: second latest)")
+    diff_parser.add_argument("--to", dest="new", type=int, help="Newer scan id (default: latest)")
+    diff_parser.add_argument("-o", "--output", help="Output folder (default: ~/Documents/folder_scanner)")
+    diff_parser.set_defaults(handler=run_scan_diff)
+
+    usage_parser = subparsers.add_parser("usage", help="Write disk usage reports of directories to JSON files")
+    usage_parser.add_argument("inputs", nargs="+", help="Directories or glob patterns")
+    usage_parser.add_argument("-o", "--output", help="Output folder (default: ~/Documents/folder_scanner)")
+    usage_parser.add_argument("--top", type=int, default=25, help="How many of the largest files and folders to list")
+    add_filter_arguments(usage_parser)
+    usage_parser.set_defaults(handler=run_usage)
+
+    duplicates_parser = subparsers.add_parser("duplicates", help="Find identical files across directories")
+    duplicates_parser.add_argument("inputs", nargs="+", help="Directories or glob patterns, searched together")
+    duplicates_parser.add_argument("-o", "--output", help="Output folder (default: ~/Documents/folder_scanner)")
+    duplicates_parser.add_argument("--min-size", type=int, default=1, help="Ignore files smaller than this many bytes")
+    add_filter_arguments(duplicates_parser)
+    duplicates_parser.set_defaults(handler=run_duplicates)
+
+    compare_parser = subparsers.add_parser("compare", help="Check that a copy or backup matches its source")
+    compare_parser.add_argument("source")
+    compare_parser.add_argument("copy")
+    compare_parser.add_argument("--verify", action="store_true",
+                                help="Also compare file contents (parallel, stops at the first differing block)")
+    compare_parser.add_argument("--format", default="text", choices=["text", "ndjson", "json"])
+    compare_parser.add_argument("-o", "--output", help="Output folder (default: ~/Documents/folder_scanner)")
+    add_filter_arguments(compare_parser)
+    compare_parser.set_defaults(handler=run_compare)
+
+    pdf_parser = subparsers.add_parser("pdf", help="Render PDF pages to images plus a markdown index")
+    pdf_parser.add_argument("inputs", nargs="+", help="PDF files or glob patterns")
+    pdf_parser.add_argument("-o", "--output", help="Output folder (default: ~/Documents/PDFScraper)")
+    pdf_parser.set_defaults(handler=run_pdf)
+
+    convert_parser = subparsers.add_parser("convert", help="Convert videos with ffmpeg")
+    convert_parser.add_argument("inputs", nargs="+", help="Video files, folders or glob patterns")
+    convert_parser.add_argument("-f", "--format", required=True, choices=['mp4', 'avi', 'mkv', 'mov', 'webm'])
+    convert_parser.add_argument("-o", "--output", help="Output folder (default: ~/Desktop)")
+    convert_parser.add_argument("-j", "--jobs", type=int,
+                                help="Conversions to run at once (default: cores / threads)")
+    convert_parser.add_argument("--preset", choices=["draft", "balanced", "archival"], default="balanced",
+                                help="Encoder speed/quality trade-off for re-encoded streams (default: balanced)")
+    convert_parser.add_argument("--target-size", type=float, metavar="MB",
+                                help="Two-pass encode sized to about this many MB per file")
+    convert_parser.add_argument("--estimate", action="store_true",
+                                help="Estimate the time for each preset (calibrating once) instead of converting")
+    convert_parser.add_argument("--no-cache", action="store_true",
+                                help="Always run ffmpeg instead of reusing earlier outputs of the same input and settings")
+    convert_parser.add_argument("--threads", type=int, help="ffmpeg threads per conversion (default: from the preset)")
+    convert_parser.add_argument("--segmented", action="store_true",
+                                help="Split each video at keyframes and encode the pieces in parallel")
+    convert_parser.add_argument("--segments", type=int, help="Number of segments (implies --segmented; "
+                                                              "default: one per two cores)")
+    convert_parser.set_defaults(handler=run_convert)
+
+    thumbs_parser = subparsers.add_parser("thumbs", help="Make contact sheets or seek bar sprites from video keyframes")
+    thumbs_parser.add_argument("inputs", nargs="+", help="Video files, folders or glob patterns")
+    thumbs_parser.add_argument("--sprite", action="store_true",
+                               help="A 10x10 sprite of small tiles plus a WebVTT file, instead of a 4x4 contact sheet")
+    thumbs_parser.add_argument("--columns", type=int, help="Tiles per row")
+    thumbs_parser.add_argument("--rows", type=int, help="Rows of tiles")
+    thumbs_parser.add_argument("--width", type=int, help="Tile width in pixels")
+    thumbs_parser.set_defaults(handler=run_thumbs)
+
+    encrypt_parser = subparsers.add_parser("encrypt", help="Zip and AES-encrypt folders")
+    encrypt_parser.add_argument("inputs", nargs="+", help="Folders or glob patterns")
+    encrypt_parser.add_argument("-o", "--output", help="Output folder (default: ~/Documents/ZipGen)")
+    encrypt_parser.add_argument("--print-password", action="store_true",
+                                help="Include the generated password in the JSON output (it is always in the log file)")
+    encrypt_parser.set_defaults(handler=run_encrypt)
+
+    ytdl_parser = subparsers.add_parser("ytdl", help="Download YouTube videos and/or audio with yt-dlp")
+    ytdl_parser.add_argument("urls", nargs="+")
+    ytdl_parser.add_argument("-o", "--output", help="Output folder (default: ~/Downloads)")
+    ytdl_parser.add_argument("--no-video", action="store_true", help="Skip the video download")
+    ytdl_parser.add_argument("--no-audio", action="store_true", help="Skip the audio download")
+    ytdl_parser.set_defaults(handler=run_ytdl)
+
+    return parser
+
+def main(argv=None):
+    global json_output
+    args = build_parser().parse_args(argv)
+    # ffmpeg/yt-dlp and library chatter write to fd 1; point it at stderr so
+    # stdout carries nothing but the JSON progress lines
+    sys.stdout.flush()
+    json_output = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    try:
+        return args.handler(args)
+    finally:
+        json_output.flush()
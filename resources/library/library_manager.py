@@ -1,26 +1,134 @@
 import sys
-import subprocess
-import pkg_resources
 import os
+import re
+import json
+import hashlib
+import subprocess
+from importlib import metadata
 
-def check_and_install_libraries():
-    # Get the path to the requirements.txt file
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    requirements_path = os.path.join(current_dir, 'requirements.txt')
+# Ships with pip and setuptools, so it's almost always there; this check runs
+# before any requirement is installed, so there's a fallback for the rest
+try:
+    from packaging.specifiers import SpecifierSet, InvalidSpecifier
+except ImportError:
+    SpecifierSet = None
 
-    print(f"Checking requirements from: {requirements_path}")
+LIBRARY_DIR = os.path.dirname(os.path.abspath(__file__))
+REQUIREMENTS_PATH = os.path.join(LIBRARY_DIR, 'requirements.txt')
+USER_FOLDER = os.path.join(os.path.dirname(LIBRARY_DIR), 'user')
+DEPENDENCY_CACHE_FILE = os.path.join(USER_FOLDER, 'dependency_check.json')
 
-    # Read the requirements
+REQUIREMENT_PATTERN = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(.*)$')
+SPECIFIER_PATTERN = re.compile(r'(===|==|!=|<=|>=|~=|<|>)\s*([^,\s]+)')
+
+def read_requirements(requirements_path=REQUIREMENTS_PATH):
     with open(requirements_path, 'r') as f:
-        requirements = f.read().splitlines()
+        lines = f.read().splitlines()
+    return [line.split('#', 1)[0].strip() for line in lines if line.split('#', 1)[0].strip()]
+
+def site_packages_dirs():
+    return sorted({path for path in sys.path
+                   if os.path.basename(path) in ('site-packages', 'dist-packages') and os.path.isdir(path)})
+
+def compute_fingerprint(requirements_path=REQUIREMENTS_PATH):
+    # Installing or removing a distribution adds/removes a *.dist-info entry,
+    # which bumps the mtime of the site-packages directory that holds it.
+    digest = hashlib.sha256()
+    with open(requirements_path, 'rb') as f:
+        digest.update(f.read())
+    digest.update(os.path.realpath(sys.executable).encode())
+    for path in site_packages_dirs():
+        digest.update(f"{path}:{os.stat(path).st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+def load_cached_fingerprint():
+    try:
+        with open(DEPENDENCY_CACHE_FILE, 'r') as f:
+            return json.load(f).get('fingerprint')
+    except (OSError, ValueError):
+        return None
+
+def store_fingerprint(fingerprint):
+    os.makedirs(USER_FOLDER, exist_ok=True)
+    temp_path = f"{DEPENDENCY_CACHE_FILE}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump({'fingerprint': fingerprint, 'python': sys.executable}, f)
+    os.replace(temp_path, DEPENDENCY_CACHE_FILE)
+
+def release_parts(version):
+    release = re.match(r'\d+(\.\d+)*', version)
+    return [int(part) for part in release.group(0).split('.')] if release else [0]
+
+def version_key(version):
+    parts = release_parts(version)
+    while len(parts) > 1 and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+def has_prefix(installed, prefix):
+    # 1.4 starts with 1, and 1 with 1.0
+    parts = release_parts(installed)
+    parts += [0] * (len(prefix) - len(parts))
+    return parts[:len(prefix)] == prefix
+
+def specifier_matches(installed, operator, wanted):
+    # Release numbers only; pre/post/dev tags are ignored
+    if operator == '===':
+        return installed == wanted
+    if operator in ('==', '!=') and wanted.endswith('.*'):
+        matches = has_prefix(installed, release_parts(wanted[:-2]))
+        return matches if operator == '==' else not matches
+    have, want = version_key(installed), version_key(wanted)
+    if operator == '==':
+        return have == want
+    if operator == '!=':
+        return have != want
+    if operator == '>=':
+        return have >= want
+    if operator == '<=':
+        return have <= want
+    if operator == '>':
+        return have > want
+    if operator == '<':
+        return have < want
+    # ~=X.Y means >=X.Y and ==X.*, ~=X.Y.Z >=X.Y.Z and ==X.Y.*
+    prefix = release_parts(wanted)[:-1] or release_parts(wanted)
+    return have >= want and has_prefix(installed, prefix)
+
+def is_requirement_satisfied(requirement):
+    match = REQUIREMENT_PATTERN.match(requirement.split(';', 1)[0])
+    if not match:
+        return False
+    name, specifiers = match.groups()
+    specifiers = re.sub(r'^\[[^\]]*\]\s*', '', specifiers)  # Extras
+    try:
+        installed = metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return False
+    if SpecifierSet is not None:
+        try:
+            return SpecifierSet(specifiers).contains(installed, prereleases=True)
+        except InvalidSpecifier:
+            pass
+    return all(specifier_matches(installed, operator, wanted)
+               for operator, wanted in SPECIFIER_PATTERN.findall(specifiers))
+
+def check_and_install_libraries(force=False):
+    requirements_path = REQUIREMENTS_PATH
+
+    # Warm start: nothing relevant changed since the last successful check
+    fingerprint = compute_fingerprint(requirements_path)
+    if not force and load_cached_fingerprint() == fingerprint:
+        return
+
+    print(f"Checking requirements from: {requirements_path}")
 
     # Check if all requirements are satisfied
     missing = []
-    for requirement in requirements:
-        try:
-            pkg_resources.require(requirement)
+    for requirement in read_requirements(requirements_path):
+        if is_requirement_satisfied(requirement):
             print(f"Requirement satisfied: {requirement}")
-        except (pkg_resources.DistributionNotFound, pkg_resources.VersionConflict):
+        else:
             print(f"Requirement missing or outdated: {requirement}")
             missing.append(requirement)
 
@@ -41,8 +149,12 @@ def check_and_install_libraries():
             print(f"   {sys.executable} -m pip install --upgrade -r {requirements_path}")
             print("\nIf you continue to experience issues, please refer to the project documentation or contact support.")
             sys.exit(1)
+        # pip changed site-packages, so fingerprint the new state
+        fingerprint = compute_fingerprint(requirements_path)
     else:
         print("All required libraries are already installed and up to date.")
 
+    store_fingerprint(fingerprint)
+
 if __name__ == "__main__":
-    check_and_install_libraries()
\ No newline at end of file
+    check_and_install_libraries(force=True)
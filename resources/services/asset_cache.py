@@ -0,0 +1,150 @@
+import os
+import sys
+import subprocess
+from collections import OrderedDict
+from PySide6.QtGui import QFont, QFontDatabase, QIcon, QMovie, QPixmap
+from PySide6.QtCore import Qt, QFile, QResource, QSize
+
+RESOURCE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESOURCE_BUNDLE = os.path.join(RESOURCE_PATH, "ui", "assets.rcc")
+ORBITRON_FONT = os.path.join("font", "Orbitron", "Orbitron-VariableFont_wght.ttf")
+BUNDLED_IMAGE_EXTENSIONS = (".png", ".jpg", ".gif")
+
+# Decoded images are far larger than the files they come from; keep the
+# working set bounded
+MEMORY_BUDGET_BYTES = 64 * 1024 * 1024
+
+class AssetCache:
+    def __init__(self, memory_budget=MEMORY_BUDGET_BYTES):
+        self.memory_budget = memory_budget
+        self.entries = OrderedDict()
+        self.total_cost = 0
+        self.font_families = {}
+        self.bundle_loaded = False
+
+    def load_bundle(self, bundle_path=RESOURCE_BUNDLE):
+        # Qt memory-maps a registered binary .rcc, so every asset in it is
+        # served from one mapping instead of many loose file reads
+        if not self.bundle_loaded and os.path.exists(bundle_path):
+            self.bundle_loaded = QResource.registerResource(bundle_path)
+        return self.bundle_loaded
+
+    def resolve(self, path):
+        relative = os.path.relpath(path, RESOURCE_PATH) if os.path.isabs(path) else path
+        if self.bundle_loaded and not relative.startswith(".."):
+            bundled = ":/" + relative.replace(os.sep, "/")
+            if QFile.exists(bundled):
+                return bundled
+        return path if os.path.isabs(path) else os.path.join(RESOURCE_PATH, path)
+
+    def font_family(self, path=ORBITRON_FONT, fallback="Arial"):
+        if path not in self.font_families:
+            font_id = QFontDatabase.addApplicationFont(self.resolve(path))
+            families = QFontDatabase.applicationFontFamilies(font_id) if font_id != -1 else []
+            self.font_families[path] = families[0] if families else fallback
+        return self.font_families[path]
+
+    def font(self, point_size=-1, path=ORBITRON_FONT):
+        return QFont(self.font_family(path), point_size)
+
+    def pixmap(self, path, size=None):
+        resolved = self.resolve(path)
+        # Loose files (e.g. contact photos) can be replaced in place
+        stamp = os.path.getmtime(resolved) if not resolved.startswith(":") and os.path.exists(resolved) else None
+        key = ("pixmap", path, size, stamp)
+        pixmap = self.lookup(key)
+        if pixmap is None:
+            pixmap = QPixmap(resolved)
+            if size is not None and not pixmap.isNull():
+                pixmap = pixmap.scaled(size[0], size[1], Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            self.store(key, pixmap, pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8)
+        return pixmap
+
+    def icon(self, path):
+        key = ("icon", path)
+        icon = self.lookup(key)
+        if icon is None:
+            pixmap = self.pixmap(path)
+            icon = QIcon(pixmap)
+            # Shares the pixmap's data, which is already accounted for
+            self.store(key, icon, 0)
+        return icon
+
+    def movie(self, path, size=None):
+        key = ("movie", path, size)
+        movie = self.lookup(key)
+        if movie is None:
+            resolved = self.resolve(path)
+            movie = QMovie(resolved)
+            if size is not None:
+                movie.setScaledSize(QSize(*size))
+            width, height = size or (movie.frameRect().width(), movie.frameRect().height())
+            # QMovie keeps roughly one decoded frame plus the compressed stream
+            stream_size = QFile(resolved).size()
+            self.store(key, movie, width * height * 4 + stream_size)
+        return movie
+
+    def lookup(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def store(self, key, value, cost):
+        self.entries[key] = (value, cost)
+        self.total_cost += cost
+        self.evict(keep=key)
+
+    def in_use(self, value):
+        # QLabel.setMovie() doesn't keep the movie alive, so while one is
+        # playing the cache may hold the only reference to it; dropping that
+        # would delete it from under the labels still drawing it
+        return isinstance(value, QMovie) and value.state() != QMovie.NotRunning
+
+    def evict(self, keep=None):
+        for key in list(self.entries):
+            if self.total_cost <= self.memory_budget:
+                break
+            value, cost = self.entries[key]
+            if key == keep or self.in_use(value):
+                continue
+            del self.entries[key]
+            self.total_cost -= cost
+
+    def clear(self):
+        for key, (value, cost) in list(self.entries.items()):
+            if not self.in_use(value):
+                del self.entries[key]
+                self.total_cost -= cost
+
+_cache = None
+
+def get_asset_cache():
+    global _cache
+    if _cache is None:
+        _cache = AssetCache()
+        _cache.load_bundle()
+    return _cache
+
+def build_resource_bundle(bundle_path=RESOURCE_BUNDLE):
+    qrc_path = os.path.splitext(bundle_path)[0] + ".qrc"
+    ui_folder = os.path.join(RESOURCE_PATH, "ui")
+    assets = [os.path.join("ui", name) for name in sorted(os.listdir(ui_folder))
+              if name.lower().endswith(BUNDLED_IMAGE_EXTENSIONS)]
+    assets.append(ORBITRON_FONT)
+    lines = ['<!DOCTYPE RCC><RCC version="1.0">', "<qresource>"]
+    for asset in assets:
+        alias = asset.replace(os.sep, "/")
+        source = os.path.relpath(os.path.join(RESOURCE_PATH, asset), os.path.dirname(qrc_path))
+        lines.append(f'<file alias="{alias}">{source}</file>')
+    lines += ["</qresource>", "</RCC>"]
+    with open(qrc_path, "w") as f:
+        f.write("\n".join(lines))
+    subprocess.check_call(["pyside6-rcc", "--binary", qrc_path, "-o", bundle_path])
+    os.remove(qrc_path)
+    return bundle_path
+
+if __name__ == "__main__":
+    if "--build-bundle" in sys.argv:
+        print(f"Resource bundle written to {build_resource_bundle()}")
@@ -0,0 +1,214 @@
+import os
+import json
+import shutil
+import sysconfig
+import threading
+import subprocess
+
+RESOURCE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USER_FOLDER = os.path.join(RESOURCE_PATH, "user")
+CAPABILITIES_CACHE_FILE = os.path.join(USER_FOLDER, "capabilities.json")
+
+PROBED_BINARIES = ("ffmpeg", "ffprobe", "yt-dlp")
+PROBE_TIMEOUT = 15
+# How long a lookup waits on the background probe before answering with
+# what it can tell without running anything
+PROBE_WAIT = 2.0
+
+def find_binary(name):
+    # pip installs console scripts (yt-dlp) next to the interpreter, which
+    # is not always on PATH
+    path = shutil.which(name)
+    if path:
+        return path
+    scripts_dir = sysconfig.get_path("scripts")
+    return shutil.which(name, path=scripts_dir) if scripts_dir else None
+
+def binary_key(path):
+    # Changes when the binary is replaced or upgraded
+    return f"{os.path.realpath(path)}:{os.stat(path).st_mtime_ns}"
+
+def run_probe_command(command):
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=PROBE_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    return result.stdout
+
+def parse_version(output):
+    first_line = output.strip().splitlines()[0] if output.strip() else ""
+    # "ffmpeg version 6.1.1-3ubuntu5 Copyright ..." or a bare "2024.08.06"
+    parts = first_line.split()
+    if "version" in parts and parts.index("version") + 1 < len(parts):
+        return parts[parts.index("version") + 1]
+    return first_line
+
+def parse_table(output, flag_width):
+    # ffmpeg -codecs/-encoders/-formats print a legend, a "--" separator and
+    # then one "<flags> <name> <description>" row per entry
+    rows = {}
+    lines = output.splitlines()
+    for index, line in enumerate(lines):
+        if line.strip().startswith("--"):
+            lines = lines[index + 1:]
+            break
+    for line in lines:
+        flags, _, rest = line.strip().partition(" ")
+        name = rest.strip().split(" ", 1)[0]
+        if name and len(flags) <= flag_width:
+            for alias in name.split(","):
+                rows[alias] = flags
+    return rows
+
+def probe_binary(name, path):
+    version_flag = "--version" if name == "yt-dlp" else "-version"
+    info = {"path": path, "version": parse_version(run_probe_command([path, version_flag]))}
+    if name == "ffmpeg":
+        codecs = parse_table(run_probe_command([path, "-hide_banner", "-codecs"]), 6)
+        encoders = parse_table(run_probe_command([path, "-hide_banner", "-encoders"]), 6)
+        formats = parse_table(run_probe_command([path, "-hide_banner", "-formats"]), 3)
+        info["codecs"] = codecs
+        info["encoders"] = sorted(encoders)
+        info["muxers"] = sorted(fmt for fmt, flags in formats.items() if "E" in flags)
+        info["demuxers"] = sorted(fmt for fmt, flags in formats.items() if "D" in flags)
+    return info
+
+class CapabilityService:
+    def __init__(self, cache_path=CAPABILITIES_CACHE_FILE):
+        self.cache_path = cache_path
+        self.capabilities = {}
+        self.lock = threading.Lock()
+        self.probed = threading.Event()
+        self.probe_thread = None
+        self.probe_late = False
+        self.disk_cache = self.load_cache()
+
+    def load_cache(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        temp_path = f"{self.cache_path}.tmp"
+        with self.lock:
+            data = dict(self.disk_cache)
+        with open(temp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.cache_path)
+
+    def start_probe(self):
+        if self.probe_thread is None:
+            self.probe_thread = threading.Thread(target=self.probe_all, name="capability-probe", daemon=True)
+            self.probe_thread.start()
+
+    def probe_all(self):
+        try:
+            changed = False
+            for name in PROBED_BINARIES:
+                changed = self.refresh(name, save=False) or changed
+            if changed:
+                self.save_cache()
+        finally:
+            self.probed.set()
+
+    def refresh(self, name, save=True):
+        path = find_binary(name)
+        info = None
+        changed = False
+        if path:
+            key = binary_key(path)
+            with self.lock:
+                cached = self.disk_cache.get(name)
+            if cached and cached.get("key") == key:
+                info = cached
+            else:
+                info = probe_binary(name, path)
+                info["key"] = key
+                with self.lock:
+                    self.disk_cache[name] = info
+                changed = True
+        elif name in self.disk_cache:
+            with self.lock:
+                self.disk_cache.pop(name, None)
+            changed = True
+        with self.lock:
+            self.capabilities[name] = info
+        if changed and save:
+            self.save_cache()
+        return changed
+
+    def wait(self, timeout=None):
+        return self.probed.wait(timeout)
+
+    def get(self, name):
+        # Without a background probe (the CLI) a binary is resolved on
+        # demand. While the probe runs, lookups never run ffmpeg themselves:
+        # that would be on the caller's thread, usually the GUI's, and race
+        # the probe. They answer from the disk cache if the binary hasn't
+        # changed, or wait briefly for the probe (only once: a probe that's
+        # running late doesn't stall every lookup after it).
+        with self.lock:
+            known = name in self.capabilities
+        if not known and self.probe_thread is not None and not self.probed.is_set():
+            cached = self.cached(name)
+            if cached is not None:
+                return cached
+            if self.probe_late or not self.probed.wait(PROBE_WAIT):
+                self.probe_late = True
+                return self.unprobed(name)
+        with self.lock:
+            known = name in self.capabilities
+        if not known:
+            self.refresh(name)
+        with self.lock:
+            return self.capabilities.get(name)
+
+    def cached(self, name):
+        path = find_binary(name)
+        with self.lock:
+            cached = self.disk_cache.get(name)
+        try:
+            return cached if path and cached and cached.get("key") == binary_key(path) else None
+        except OSError:
+            return None
+
+    def unprobed(self, name):
+        # The probe hasn't got to it yet: where it is, but no version or
+        # encoder list, which callers treat as unknown
+        path = find_binary(name)
+        return {"path": path, "version": None} if path else None
+
+    def path(self, name):
+        info = self.get(name)
+        return info["path"] if info else None
+
+    def is_available(self, name):
+        return self.get(name) is not None
+
+    def version(self, name):
+        info = self.get(name)
+        return info["version"] if info else None
+
+    def has_encoder(self, encoder):
+        info = self.get("ffmpeg")
+        return bool(info) and encoder in info.get("encoders", ())
+
+    def encoders(self):
+        # None when unknown, so callers can tell "not probed" from "none"
+        info = self.get("ffmpeg")
+        return set(info["encoders"]) if info and "encoders" in info else None
+
+    def has_muxer(self, muxer):
+        info = self.get("ffmpeg")
+        return bool(info) and muxer in info.get("muxers", ())
+
+_service = None
+
+def get_capability_service():
+    global _service
+    if _service is None:
+        _service = CapabilityService()
+    return _service
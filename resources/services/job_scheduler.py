@@ -0,0 +1,342 @@
+import os
+import time
+import queue
+import itertools
+import threading
+import subprocess
+
+CPU = "cpu"
+IO = "io"
+# Jobs that run until cancelled (folder watches) get a thread of their own
+# rather than holding one of the pool's workers for hours
+DEDICATED = "dedicated"
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# CPU-bound jobs (ffmpeg, LZMA, page rendering) each keep at least a core
+# busy, so half the cores leaves room for the GUI; I/O-bound jobs mostly wait
+CPU_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+IO_WORKERS = 4
+PROGRESS_INTERVAL = 0.1
+# How long quitting waits for children to exit and workers to wind down
+SHUTDOWN_TIMEOUT = 5
+
+# Child processes of running jobs, so shutdown can stop them rather than
+# leave them running after the app exits. A job may run several at once
+# (the converter's parallel ffmpeg runs), so each registers itself.
+_children = set()
+_children_lock = threading.Lock()
+
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    def __init__(self, job_id, name, func, kind, priority):
+        self.id = job_id
+        self.name = name
+        self.func = func
+        self.kind = kind
+        self.priority = priority
+        self.state = QUEUED
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.items_done = None
+        self.items_total = None
+        self.bytes_done = None
+        self.bytes_total = None
+        # Set by engines that know their position better than a count does,
+        # e.g. ffmpeg's output time against the input duration
+        self.progress_fraction = None
+        self.progress_eta = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = threading.Event()
+        self.process = None
+
+    def fraction(self):
+        if self.progress_fraction is not None:
+            return min(1.0, self.progress_fraction)
+        if self.bytes_total:
+            return min(1.0, (self.bytes_done or 0) / self.bytes_total)
+        if self.items_total:
+            return min(1.0, (self.items_done or 0) / self.items_total)
+        return None
+
+    def eta(self):
+        fraction = self.fraction()
+        if self.started is None or self.state != RUNNING:
+            return None
+        if self.progress_eta is not None:
+            return self.progress_eta
+        if not fraction:
+            return None
+        elapsed = time.time() - self.started
+        return elapsed * (1 - fraction) / fraction
+
+    def snapshot(self):
+        return {
+            "job": self.id,
+            "name": self.name,
+            "kind": self.kind,
+            "state": self.state,
+            "message": self.message,
+            "items_done": self.items_done,
+            "items_total": self.items_total,
+            "bytes_done": self.bytes_done,
+            "bytes_total": self.bytes_total,
+            "fraction": self.fraction(),
+            "eta": self.eta(),
+            "result": self.result,
+            "error": self.error,
+        }
+
+class JobContext:
+    # Handed to every job function. progress() doubles as the cancellation
+    # point: engines that report progress per unit of work stop at the next
+    # unit once the job is cancelled.
+    def __init__(self, scheduler, job):
+        self.scheduler = scheduler
+        self.job = job
+        self.last_notified = 0.0
+
+    @property
+    def cancelled(self):
+        return self.job.cancel_requested.is_set()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def progress(self, message=None, done=None, total=None, bytes_done=None, bytes_total=None,
+                 fraction=None, eta=None):
+        self.check_cancelled()
+        job = self.job
+        if message is not None:
+            job.message = message
+        if done is not None:
+            job.items_done = done
+        if total is not None:
+            job.items_total = total
+        if bytes_done is not None:
+            job.bytes_done = bytes_done
+        if bytes_total is not None:
+            job.bytes_total = bytes_total
+        if fraction is not None:
+            job.progress_fraction = fraction
+        if eta is not None:
+            job.progress_eta = eta
+        # Per-file/per-page engines can report thousands of times a second;
+        # listeners (the GUI) only need a few updates per second
+        now = time.monotonic()
+        if now - self.last_notified >= PROGRESS_INTERVAL:
+            self.last_notified = now
+            self.scheduler.notify(job)
+
+    def run_process(self, command, **kwargs):
+        # Drop-in for subprocess.run(command, check=True) that terminates the
+        # child when the job is cancelled
+        self.check_cancelled()
+        process = subprocess.Popen(command, **kwargs)
+        self.job.process = process
+        register_process(process)
+        try:
+            while True:
+                try:
+                    process.wait(timeout=0.2)
+                    break
+                except subprocess.TimeoutExpired:
+                    if self.cancelled:
+                        terminate_process(process)
+                        raise JobCancelled()
+        finally:
+            self.job.process = None
+            unregister_process(process)
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, command)
+        return subprocess.CompletedProcess(command, process.returncode)
+
+def terminate_process(process, grace=5):
+    process.terminate()
+    try:
+        process.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+def register_process(process):
+    with _children_lock:
+        _children.add(process)
+
+def unregister_process(process):
+    with _children_lock:
+        _children.discard(process)
+
+def terminate_children(timeout=SHUTDOWN_TIMEOUT):
+    # Terminates every registered child at once, then kills whatever is
+    # still running when the timeout is up
+    with _children_lock:
+        children = list(_children)
+    for process in children:
+        try:
+            process.terminate()
+        except OSError:
+            pass
+    deadline = time.monotonic() + timeout
+    for process in children:
+        try:
+            process.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+class JobScheduler:
+    def __init__(self, cpu_workers=CPU_WORKERS, io_workers=IO_WORKERS):
+        self.worker_counts = {CPU: cpu_workers, IO: io_workers}
+        self.queues = {CPU: queue.PriorityQueue(), IO: queue.PriorityQueue()}
+        self.workers = {CPU: [], IO: []}
+        self.dedicated = []
+        self.jobs = {}
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.sequence = itertools.count()
+
+    def submit(self, name, func, kind=IO, priority=PRIORITY_NORMAL):
+        # func(context) does the work and returns the job's result
+        job = Job(next(self.ids), name, func, kind, priority)
+        if kind == DEDICATED:
+            return self.start_dedicated(job)
+        with self.lock:
+            self.jobs[job.id] = job
+            self.ensure_workers(kind)
+        # Sequence number keeps FIFO order within a priority
+        self.queues[kind].put((priority, next(self.sequence), job))
+        self.notify(job)
+        return job
+
+    def ensure_workers(self, kind):
+        # Workers start lazily, so an idle app holds no threads
+        while len(self.workers[kind]) < self.worker_counts[kind]:
+            worker = threading.Thread(target=self.worker_loop, args=(kind,),
+                                      name=f"job-{kind}-{len(self.workers[kind])}", daemon=True)
+            self.workers[kind].append(worker)
+            worker.start()
+
+    def start_dedicated(self, job):
+        thread = threading.Thread(target=self.dedicated_loop, args=(job,), name=f"job-{job.id}", daemon=True)
+        with self.lock:
+            self.jobs[job.id] = job
+            self.dedicated = [thread for thread in self.dedicated if thread.is_alive()] + [thread]
+        self.notify(job)
+        thread.start()
+        return job
+
+    def dedicated_loop(self, job):
+        if not job.cancel_requested.is_set():
+            self.run_job(job)
+
+    def worker_loop(self, kind):
+        while True:
+            _, _, job = self.queues[kind].get()
+            if job is None:
+                return
+            if job.cancel_requested.is_set():
+                continue
+            self.run_job(job)
+
+    def run_job(self, job):
+        job.state = RUNNING
+        job.started = time.time()
+        self.notify(job)
+        try:
+            job.result = job.func(JobContext(self, job))
+            job.state = CANCELLED if job.cancel_requested.is_set() else DONE
+        except JobCancelled:
+            job.state = CANCELLED
+        except Exception as e:
+            job.state = CANCELLED if job.cancel_requested.is_set() else FAILED
+            job.error = str(e)
+        job.finished = time.time()
+        self.notify(job)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None or job.state in FINISHED_STATES:
+            return False
+        job.cancel_requested.set()
+        if job.state == QUEUED:
+            # Dropped by the worker when dequeued
+            job.state = CANCELLED
+            job.finished = time.time()
+            self.notify(job)
+        return True
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def all_jobs(self):
+        with self.lock:
+            return list(self.jobs.values())
+
+    def active_jobs(self):
+        return [job for job in self.all_jobs() if job.state not in FINISHED_STATES]
+
+    def clear_finished(self):
+        with self.lock:
+            for job_id in [job_id for job_id, job in self.jobs.items() if job.state in FINISHED_STATES]:
+                del self.jobs[job_id]
+
+    def subscribe(self, callback):
+        # callback(event) runs on the thread that changed the job
+        with self.lock:
+            self.listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.listeners:
+                self.listeners.remove(callback)
+
+    def notify(self, job):
+        event = job.snapshot()
+        with self.lock:
+            listeners = list(self.listeners)
+        for callback in listeners:
+            callback(event)
+
+    def shutdown(self, cancel_running=True, timeout=SHUTDOWN_TIMEOUT):
+        # The workers are daemon threads, so the interpreter won't wait for
+        # them: the children are stopped here, and the workers get a moment
+        # to notice and clean up (partial outputs, temp folders)
+        if cancel_running:
+            for job in self.all_jobs():
+                self.cancel(job.id)
+            terminate_children(timeout)
+        for kind, workers in self.workers.items():
+            for _ in workers:
+                self.queues[kind].put((PRIORITY_LOW + 1, next(self.sequence), None))
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            dedicated = list(self.dedicated)
+        for workers in list(self.workers.values()) + [dedicated]:
+            for worker in workers:
+                worker.join(timeout=max(0.0, deadline - time.monotonic()))
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_job_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler()
+        return _scheduler
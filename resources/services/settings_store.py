@@ -0,0 +1,114 @@
+import os
+import json
+import atexit
+import tempfile
+import threading
+
+RESOURCE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USER_FOLDER = os.path.join(RESOURCE_PATH, "user")
+SETTINGS_FILE = os.path.join(USER_FOLDER, "settings.json")
+
+# Rapid changes (e.g. dragging the volume slider) are coalesced into one write
+WRITE_DELAY = 0.5
+
+class SettingsStore:
+    def __init__(self, path=SETTINGS_FILE, write_delay=WRITE_DELAY):
+        self.path = path
+        self.write_delay = write_delay
+        self.lock = threading.RLock()
+        self.write_lock = threading.Lock()
+        self.write_timer = None
+        self.dirty = False
+        self.listeners = []
+        self.data = self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def get(self, key, default=None):
+        with self.lock:
+            return self.data.get(key, default)
+
+    def set(self, key, value):
+        self.update({key: value})
+
+    def update(self, values):
+        with self.lock:
+            changed = {key: value for key, value in values.items() if self.data.get(key, object()) != value}
+            if not changed:
+                return
+            self.data.update(changed)
+            self.dirty = True
+            self.schedule_write()
+            listeners = list(self.listeners)
+        for key, value in changed.items():
+            for watched_key, callback in listeners:
+                if watched_key is None or watched_key == key:
+                    callback(key, value)
+
+    def subscribe(self, callback, key=None):
+        # callback(key, value) runs on the thread that changed the setting
+        with self.lock:
+            self.listeners.append((key, callback))
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            self.listeners = [(key, cb) for key, cb in self.listeners if cb != callback]
+
+    def schedule_write(self):
+        if self.write_timer is not None:
+            self.write_timer.cancel()
+        self.write_timer = threading.Timer(self.write_delay, self.flush)
+        self.write_timer.daemon = True
+        self.write_timer.start()
+
+    def flush(self):
+        # write_lock keeps a slow older snapshot from landing after a newer one
+        with self.write_lock:
+            with self.lock:
+                if self.write_timer is not None:
+                    self.write_timer.cancel()
+                    self.write_timer = None
+                if not self.dirty:
+                    return
+                snapshot = json.dumps(self.data, indent=4)
+                self.dirty = False
+            try:
+                self.write_atomic(snapshot)
+            except OSError:
+                with self.lock:
+                    self.dirty = True
+                raise
+
+    def write_atomic(self, text):
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        # Write to a temp file in the same folder and rename over the original,
+        # so a crash mid-write never leaves a truncated settings.json
+        fd, temp_path = tempfile.mkstemp(prefix=".settings-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_settings():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SettingsStore()
+            atexit.register(_store.flush)
+        return _store
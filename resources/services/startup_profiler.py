@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import functools
+import threading
+from contextlib import contextmanager
+
+RESOURCE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_FOLDER = os.path.join(RESOURCE_PATH, "user", "startup_profile")
+
+# Upper bounds (milliseconds) for the phases that matter for time-to-window.
+# `python root.py --profile-startup` exits non-zero when any of them is exceeded.
+STARTUP_BUDGET_MS = {
+    "import qt": 1500,
+    "import app modules": 300,
+    "dependency check": 150,
+    "MainWindow.__init__": 1500,
+    "font registration": 200,
+    "setup_audio": 400,
+    "CalendarReminderWidget": 300,
+    "update_gifs": 150,
+    "time to window": 4000,
+}
+
+class StartupProfiler:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.phases = []
+        self.marks = []
+        self.depth = 0
+        # Seconds spent waiting on the user, left out of the marks
+        self.waited = 0.0
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            self.phases.append((name, start - self.origin, time.perf_counter() - self.origin, self.depth))
+
+    @contextmanager
+    def excluded(self, name):
+        # For waits on the user (the first-run name prompt): shown in the
+        # report, but not counted towards the marks that follow
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.waited += end - start
+            self.phases.append((name, start - self.origin, end - self.origin, self.depth))
+
+    def timed(self, name):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.phase(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.origin - self.waited))
+
+    def durations_ms(self):
+        durations = {}
+        for name, start, end, _ in self.phases:
+            durations[name] = durations.get(name, 0.0) + (end - start) * 1000
+        for name, at in self.marks:
+            durations.setdefault(name, at * 1000)
+        return durations
+
+    def report_table(self):
+        rows = sorted(self.phases, key=lambda phase: phase[1])
+        lines = [f"{'phase':<40} {'start ms':>10} {'duration ms':>12}", "-" * 64]
+        for name, start, end, depth in rows:
+            label = f"{'  ' * depth}{name}"
+            lines.append(f"{label:<40} {start * 1000:>10.1f} {(end - start) * 1000:>12.1f}")
+        for name, at in self.marks:
+            lines.append(f"{name:<40} {at * 1000:>10.1f} {'':>12}")
+        return "\n".join(lines)
+
+    def trace_events(self):
+        # Chrome trace-event format: load the file in chrome://tracing or Perfetto
+        pid = os.getpid()
+        tid = threading.get_ident()
+        events = [{"name": name, "ph": "X", "ts": start * 1e6, "dur": (end - start) * 1e6,
+                   "pid": pid, "tid": tid, "cat": "startup"}
+                  for name, start, end, _ in self.phases]
+        events += [{"name": name, "ph": "i", "ts": at * 1e6, "s": "g", "pid": pid, "tid": tid, "cat": "startup"}
+                   for name, at in self.marks]
+        return events
+
+    def write_report(self, output_folder=PROFILE_FOLDER):
+        os.makedirs(output_folder, exist_ok=True)
+        table_path = os.path.join(output_folder, "startup_profile.txt")
+        trace_path = os.path.join(output_folder, "startup_trace.json")
+        with open(table_path, "w") as f:
+            f.write(self.report_table() + "\n")
+        with open(trace_path, "w") as f:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f)
+        return table_path, trace_path
+
+    def check_budget(self, budget=STARTUP_BUDGET_MS):
+        durations = self.durations_ms()
+        return [(name, durations[name], limit) for name, limit in budget.items()
+                if name in durations and durations[name] > limit]
+
+profiler = StartupProfiler()
@@ -0,0 +1,84 @@
+import os
+import secrets
+import string
+import datetime
+import pyzipper
+
+def default_output_folder():
+    return os.path.join(os.path.expanduser("~/Documents"), "ZipGen")
+
+def generate_password(length=16):
+    symbols = string.punctuation
+    digits = string.digits
+    uppercase = string.ascii_uppercase
+    lowercase = string.ascii_lowercase
+    
+    password = [
+        secrets.choice(symbols),
+        secrets.choice(digits),
+        secrets.choice(uppercase),
+        secrets.choice(lowercase)
+    ]
+    
+    all_characters = symbols + digits + uppercase + lowercase
+    password += [secrets.choice(all_characters) for _ in range(length - 4)]
+    
+    secrets.SystemRandom().shuffle(password)
+    
+    return ''.join(password)
+
+def list_folder_files(folder_path):
+    file_paths = []
+    for root, _, files in os.walk(folder_path):
+        for file in files:
+            file_paths.append(os.path.join(root, file))
+    return file_paths
+
+def zip_encrypt_folder(folder_path, output_path, password, progress=None):
+    file_paths = list_folder_files(folder_path)
+    sizes = [os.path.getsize(file_path) for file_path in file_paths]
+    bytes_total = sum(sizes)
+    bytes_done = 0
+    try:
+        with pyzipper.AESZipFile(output_path, 'w', compression=pyzipper.ZIP_LZMA, encryption=pyzipper.WZ_AES) as zf:
+            zf.setpassword(password.encode())
+            for index, (file_path, size) in enumerate(zip(file_paths, sizes), start=1):
+                arcname = os.path.relpath(file_path, folder_path)
+                zf.write(file_path, arcname)
+                bytes_done += size
+                if progress:
+                    progress(f"Encrypted {arcname}", index, len(file_paths),
+                             bytes_done=bytes_done, bytes_total=bytes_total)
+    except BaseException:
+        # Failed or cancelled: don't leave a truncated archive behind
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+
+def log_operation(folder_path, output_path, password, log_file):
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    log_entry = f"[{timestamp}] Encrypted: {folder_path} -> {output_path} (Password: {password})\n"
+    with open(log_file, "a") as f:
+        f.write(log_entry)
+
+def encrypt_folder(folder_path, output_folder=None, progress=None):
+    password = generate_password()
+    app_folder = output_folder or default_output_folder()
+    os.makedirs(app_folder, exist_ok=True)
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_filename = f"encrypted_folder_{timestamp}.zip"
+    output_path = os.path.join(app_folder, output_filename)
+    # Batch runs can finish several folders within the same second
+    suffix = 1
+    while os.path.exists(output_path):
+        output_path = os.path.join(app_folder, f"encrypted_folder_{timestamp}_{suffix}.zip")
+        suffix += 1
+
+    if progress:
+        progress("Encrypting folder...")
+    zip_encrypt_folder(folder_path, output_path, password, progress)
+
+    log_file = os.path.join(app_folder, "encryption_log.txt")
+    log_operation(folder_path, output_path, password, log_file)
+    return password, output_path, log_file
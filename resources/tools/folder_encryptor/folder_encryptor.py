@@ -1,88 +1,21 @@
 import subprocess
 import sys
 import os
-import threading
-import zipfile
-import secrets
-import string
-import datetime
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
                                QLabel, QLineEdit, QMessageBox, QFileDialog, QProgressBar)
-from PySide6.QtCore import Signal, QThread
-import pyzipper
-
-class EncryptionThread(QThread):
-    update_progress = Signal(str)
-    encryption_complete = Signal(str, str, str)
-    encryption_failed = Signal(str)
-
-    def __init__(self, folder_path):
-        super().__init__()
-        self.folder_path = folder_path
-
-    def run(self):
-        try:
-            password = generate_password()
-            documents_path = os.path.expanduser("~/Documents")
-            app_folder = os.path.join(documents_path, "ZipGen")
-            if not os.path.exists(app_folder):
-                os.makedirs(app_folder)
-
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_filename = f"encrypted_folder_{timestamp}.zip"
-            output_path = os.path.join(app_folder, output_filename)
-
-            self.update_progress.emit("Encrypting folder...")
-            zip_encrypt_folder(self.folder_path, output_path, password)
-
-            log_file = os.path.join(app_folder, "encryption_log.txt")
-            log_operation(self.folder_path, output_path, password, log_file)
-
-            self.encryption_complete.emit(password, output_path, log_file)
-        except Exception as e:
-            self.encryption_failed.emit(str(e))
-
-def generate_password(length=16):
-    symbols = string.punctuation
-    digits = string.digits
-    uppercase = string.ascii_uppercase
-    lowercase = string.ascii_lowercase
-    
-    password = [
-        secrets.choice(symbols),
-        secrets.choice(digits),
-        secrets.choice(uppercase),
-        secrets.choice(lowercase)
-    ]
-    
-    all_characters = symbols + digits + uppercase + lowercase
-    password += [secrets.choice(all_characters) for _ in range(length - 4)]
-    
-    secrets.SystemRandom().shuffle(password)
-    
-    return ''.join(password)
-
-def zip_encrypt_folder(folder_path, output_path, password):
-    with pyzipper.AESZipFile(output_path, 'w', compression=pyzipper.ZIP_LZMA, encryption=pyzipper.WZ_AES) as zf:
-        zf.setpassword(password.encode())
-        for root, _, files in os.walk(folder_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, folder_path)
-                zf.write(file_path, arcname)
-
-def log_operation(folder_path, output_path, password, log_file):
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_entry = f"[{timestamp}] Encrypted: {folder_path} -> {output_path} (Password: {password})\n"
-    with open(log_file, "a") as f:
-        f.write(log_entry)
+from PySide6.QtCore import Qt
+from resources.tools.folder_encryptor.encryption_engine import encrypt_folder, default_output_folder
+from resources.services.job_scheduler import get_job_scheduler, CPU, DONE, FAILED, CANCELLED
+from resources.widgets.jobs_panel import get_job_events
 
 class FolderEncryptorDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Folder Encryptor")
         self.setMinimumWidth(400)
+        self.job = None
         self.setup_ui()
+        get_job_events().job_event.connect(self.on_job_event)
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -130,11 +63,24 @@ class FolderEncryptorDialog(QDialog):
         self.progress_bar.setVisible(True)
         self.progress_label.setText("Starting encryption...")
 
-        self.encryption_thread = EncryptionThread(folder_path)
-        self.encryption_thread.update_progress.connect(self.update_progress_label)
-        self.encryption_thread.encryption_complete.connect(self.encryption_complete)
-        self.encryption_thread.encryption_failed.connect(self.encryption_failed)
-        self.encryption_thread.start()
+        self.job = get_job_scheduler().submit(
+            f"Encrypt {os.path.basename(os.path.normpath(folder_path))}",
+            lambda context: encrypt_folder(folder_path, progress=context.progress),
+            kind=CPU)
+
+    def on_job_event(self, event):
+        if self.job is None or event["job"] != self.job.id:
+            return
+        if event["state"] == DONE:
+            self.encryption_complete(*event["result"])
+        elif event["state"] == FAILED:
+            self.encryption_failed(event["error"])
+        elif event["state"] == CANCELLED:
+            self.progress_bar.setVisible(False)
+            self.encrypt_button.setEnabled(True)
+            self.progress_label.setText("Encryption cancelled")
+        elif event["message"]:
+            self.update_progress_label(event["message"])
 
     def update_progress_label(self, message):
         self.progress_label.setText(message)
@@ -158,7 +104,7 @@ class FolderEncryptorDialog(QDialog):
         QMessageBox.critical(self, "Error", f"An error occurred: {error_message}")
 
     def view_output_folder(self):
-        output_folder = os.path.expanduser("~/Documents/ZipGen")
+        output_folder = default_output_folder()
         if sys.platform == 'win32':
             os.startfile(output_folder)
         elif sys.platform == 'darwin':
@@ -168,4 +114,5 @@ class FolderEncryptorDialog(QDialog):
 
 def show_folder_encryptor_dialog(parent):
     dialog = FolderEncryptorDialog(parent)
+    dialog.setAttribute(Qt.WA_DeleteOnClose)
     dialog.exec()
\ No newline at end of file
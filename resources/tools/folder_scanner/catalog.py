@@ -0,0 +1,380 @@
+import os
+import time
+import sqlite3
+from resources.tools.folder_scanner.walker import ScanEntry
+from resources.tools.folder_scanner.scan_file import ScanFileWriter
+
+RESOURCE_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+USER_FOLDER = os.path.join(RESOURCE_PATH, "user")
+CATALOG_FILE = os.path.join(USER_FOLDER, "scan_catalog.db")
+
+PROGRESS_EVERY = 256
+INSERT_BATCH = 1000
+
+# Entries are versioned instead of copied per scan: a row is valid from
+# first_scan until last_scan (NULL while it is still current). A rescan only
+# writes rows for what changed, and the state of any stored scan S is the set
+# of rows with first_scan <= S and (last_scan IS NULL or last_scan >= S).
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    root_id INTEGER NOT NULL,
+    started REAL NOT NULL,
+    finished REAL,
+    entries INTEGER,
+    listed_dirs INTEGER,
+    skipped_dirs INTEGER
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    root_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    parent TEXT,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    inode INTEGER NOT NULL,
+    first_scan INTEGER NOT NULL,
+    last_scan INTEGER
+);
+CREATE INDEX IF NOT EXISTS entries_children ON entries (root_id, parent, last_scan);
+CREATE INDEX IF NOT EXISTS entries_paths ON entries (root_id, path, last_scan);
+CREATE INDEX IF NOT EXISTS entries_first_scan ON entries (root_id, first_scan);
+CREATE INDEX IF NOT EXISTS entries_last_scan ON entries (root_id, last_scan);
+"""
+
+ENTRY_COLUMNS = "id, path, name, is_dir, size, mtime, inode"
+
+def join_relative(parent, name):
+    return f"{parent}{os.sep}{name}" if parent else name
+
+def stat_values(stat, is_dir):
+    return (1 if is_dir else 0, 0 if is_dir else stat.st_size, stat.st_mtime, stat.st_ino)
+
+def row_values(row):
+    return (row[3], row[4], row[5], row[6])
+
+class CatalogRescan:
+    # One incremental rescan of a root. A directory whose mtime is unchanged
+    # has the same names in it, so its listing is taken from the catalog and
+    # only its subdirectories are stat'ed (their own changes don't touch the
+    # parent's mtime). Files in such a directory are assumed unchanged unless
+    # verify_files is set; editors and downloaders almost always replace
+    # files by rename, which does bump the directory's mtime.
+    def __init__(self, conn, root_id, root_path, scan_id, previous_scan, progress=None, verify_files=False):
+        self.conn = conn
+        self.root_id = root_id
+        self.root_path = root_path
+        self.scan_id = scan_id
+        self.previous_scan = previous_scan
+        self.progress = progress
+        self.verify_files = verify_files
+        self.entries = 0
+        self.listed_dirs = 0
+        self.skipped_dirs = 0
+        self.pending_inserts = []
+
+    def run(self):
+        root_row = self.conn.execute(
+            f"SELECT {ENTRY_COLUMNS} FROM entries WHERE root_id = ? AND path = '' AND last_scan IS NULL",
+            (self.root_id,)).fetchone()
+        root_values = stat_values(os.stat(self.root_path), True)
+        unchanged = self.update_entry("", None, os.path.basename(self.root_path) or self.root_path,
+                                      root_row, root_values)
+        stack = [("", self.root_path, unchanged)]
+        while stack:
+            relative, absolute, unchanged = stack.pop()
+            stack.extend(self.refresh_directory(relative, absolute, unchanged))
+        self.flush_inserts()
+        if self.progress:
+            self.progress(self.progress_message(), self.entries)
+
+    def progress_message(self):
+        return f"Checked {self.entries} entries, {self.skipped_dirs} unchanged folders skipped"
+
+    def known_children(self, relative):
+        rows = self.conn.execute(
+            f"SELECT {ENTRY_COLUMNS} FROM entries INDEXED BY entries_children "
+            "WHERE root_id = ? AND parent = ? AND last_scan IS NULL",
+            (self.root_id, relative))
+        return {row[2]: row for row in rows}
+
+    def list_children(self, absolute):
+        children = {}
+        with os.scandir(absolute) as iterator:
+            for dir_entry in iterator:
+                try:
+                    is_dir = dir_entry.is_dir(follow_symlinks=False)
+                    children[dir_entry.name] = stat_values(dir_entry.stat(follow_symlinks=False), is_dir)
+                except OSError:
+                    continue
+        return children
+
+    def refresh_directory(self, relative, absolute, unchanged):
+        # Brings one directory's children up to date and returns the
+        # subdirectories still to visit
+        known = self.known_children(relative)
+        if unchanged:
+            self.skipped_dirs += 1
+            current = {}
+            for name, row in known.items():
+                if row[3] or self.verify_files:
+                    try:
+                        current[name] = stat_values(os.lstat(os.path.join(absolute, name)), bool(row[3]))
+                    except OSError:
+                        continue
+                else:
+                    current[name] = row_values(row)
+        else:
+            self.listed_dirs += 1
+            try:
+                current = self.list_children(absolute)
+            except OSError:
+                current = {}
+
+        subdirectories = []
+        for name, row in known.items():
+            if name not in current:
+                self.close_entry(row)
+        for name in sorted(current):
+            values = current[name]
+            child_relative = join_relative(relative, name)
+            child_unchanged = self.update_entry(child_relative, relative, name, known.get(name), values)
+            if values[0]:
+                subdirectories.append((child_relative, os.path.join(absolute, name), child_unchanged))
+            self.entries += 1
+            if self.progress and self.entries % PROGRESS_EVERY == 0:
+                self.progress(self.progress_message(), self.entries)
+        subdirectories.reverse()
+        return subdirectories
+
+    def update_entry(self, relative, parent, name, row, values):
+        # Returns True when the entry is unchanged since the previous scan
+        if row is not None and row_values(row) == values:
+            return True
+        if row is not None:
+            self.close_entry(row, keep_children=bool(row[3]) and values[0])
+        self.pending_inserts.append((self.root_id, relative, parent, name) + values + (self.scan_id,))
+        if len(self.pending_inserts) >= INSERT_BATCH:
+            self.flush_inserts()
+        return False
+
+    def close_entry(self, row, keep_children=False):
+        # Entries stay valid up to the previous scan; a removed directory takes
+        # its whole subtree with it
+        self.conn.execute("UPDATE entries SET last_scan = ? WHERE id = ?", (self.previous_scan, row[0]))
+        if row[3] and not keep_children:
+            prefix = row[1] + os.sep if row[1] else ""
+            self.conn.execute(
+                "UPDATE entries SET last_scan = ? WHERE root_id = ? AND last_scan IS NULL "
+                "AND path >= ? AND path < ?",
+                (self.previous_scan, self.root_id, prefix, prefix[:-1] + chr(ord(os.sep) + 1)))
+
+    def flush_inserts(self):
+        if self.pending_inserts:
+            self.conn.executemany(
+                "INSERT INTO entries (root_id, path, parent, name, is_dir, size, mtime, inode, first_scan) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", self.pending_inserts)
+            self.pending_inserts = []
+
+class ScanCatalog:
+    def __init__(self, path=CATALOG_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def connect(self):
+        # A connection per call keeps the catalog usable from job threads
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def root_id(self, conn, root_path, create=False):
+        row = conn.execute("SELECT id FROM roots WHERE path = ?", (root_path,)).fetchone()
+        if row:
+            return row[0]
+        if not create:
+            return None
+        return conn.execute("INSERT INTO roots (path) VALUES (?)", (root_path,)).lastrowid
+
+    def rescan(self, root_path, progress=None, verify_files=False):
+        # Scans root_path into the catalog, reusing everything that is
+        # unchanged since its last stored scan. Returns the new scan id.
+        root_path = os.path.abspath(root_path)
+        if not os.path.isdir(root_path):
+            raise NotADirectoryError(f"Not a directory: {root_path}")
+        conn = self.connect()
+        try:
+            # One transaction: a failed or cancelled rescan leaves no trace
+            with conn:
+                root_id = self.root_id(conn, root_path, create=True)
+                previous = conn.execute("SELECT MAX(id) FROM scans WHERE root_id = ? AND finished IS NOT NULL",
+                                        (root_id,)).fetchone()[0]
+                scan_id = conn.execute("INSERT INTO scans (root_id, started) VALUES (?, ?)",
+                                       (root_id, time.time())).lastrowid
+                rescan = CatalogRescan(conn, root_id, root_path, scan_id, previous, progress, verify_files)
+                rescan.run()
+                conn.execute("UPDATE scans SET finished = ?, entries = ?, listed_dirs = ?, skipped_dirs = ? "
+                             "WHERE id = ?",
+                             (time.time(), rescan.entries, rescan.listed_dirs, rescan.skipped_dirs, scan_id))
+        finally:
+            conn.close()
+        return scan_id
+
+    def scans(self, root_path=None):
+        query = ("SELECT scans.id, roots.path, scans.started, scans.finished, scans.entries, scans.listed_dirs, "
+                 "scans.skipped_dirs FROM scans JOIN roots ON roots.id = scans.root_id "
+                 "WHERE scans.finished IS NOT NULL")
+        params = ()
+        if root_path is not None:
+            query += " AND roots.path = ?"
+            params = (os.path.abspath(root_path),)
+        conn = self.connect()
+        try:
+            rows = conn.execute(query + " ORDER BY scans.id", params).fetchall()
+        finally:
+            conn.close()
+        keys = ("id", "root", "started", "finished", "entries", "listed_dirs", "skipped_dirs")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def scan_info(self, scan_id):
+        for scan in self.scans():
+            if scan["id"] == scan_id:
+                return scan
+        raise KeyError(f"No stored scan with id {scan_id}")
+
+    def children_at(self, conn, root_id, scan_id, parent):
+        # Without ANALYZE statistics SQLite prefers the first_scan index here,
+        # which reads every row of the root for each directory
+        return conn.execute(
+            "SELECT path, is_dir, size, mtime, inode FROM entries INDEXED BY entries_children "
+            "WHERE root_id = ? AND parent = ? AND first_scan <= ? AND (last_scan IS NULL OR last_scan >= ?) "
+            "ORDER BY name", (root_id, parent, scan_id, scan_id))
+
+    def write_scan_file(self, scan_id, output_file):
+        # Writes a stored scan in the same text format (and index) as a
+        # regular scan, so the result dialog can browse it
+        info = self.scan_info(scan_id)
+        conn = self.connect()
+        try:
+            root_id = self.root_id(conn, info["root"])
+            root_name = os.path.basename(info["root"]) or info["root"]
+            with ScanFileWriter(output_file) as writer:
+                # Same pre-order as the walker: a directory, its files, then
+                # each subdirectory with its subtree
+                stack = [ScanEntry("", root_name, 0, True, 0, None, None)]
+                while stack:
+                    directory = stack.pop()
+                    writer.add(directory)
+                    rows = self.children_at(conn, root_id, scan_id, directory.path)
+                    subdirectories = []
+                    for path, is_dir, size, mtime, inode in rows:
+                        entry = ScanEntry(path, os.path.basename(path), directory.depth + 1, bool(is_dir),
+                                          size, mtime, inode)
+                        if is_dir:
+                            subdirectories.append(entry)
+                        else:
+                            writer.add(entry)
+                    stack.extend(reversed(subdirectories))
+        finally:
+            conn.close()
+        return writer.lines
+
+    def diff(self, old_scan_id, new_scan_id):
+        # Returns {"added", "removed", "modified", "moved"} between two stored
+        # scans of the same root; paths are relative to the root
+        old_info, new_info = self.scan_info(old_scan_id), self.scan_info(new_scan_id)
+        if old_info["root"] != new_info["root"]:
+            raise ValueError("Both scans must be of the same folder")
+        if old_scan_id > new_scan_id:
+            old_scan_id, new_scan_id = new_scan_id, old_scan_id
+        conn = self.connect()
+        try:
+            root_id = self.root_id(conn, old_info["root"])
+            # Valid in the old scan, ended before the new one
+            removed = {row[0]: row for row in conn.execute(
+                "SELECT path, is_dir, size, mtime, inode FROM entries WHERE root_id = ? AND first_scan <= ? "
+                "AND last_scan >= ? AND last_scan < ?", (root_id, old_scan_id, old_scan_id, new_scan_id))}
+            # Valid in the new scan, started after the old one
+            added = {row[0]: row for row in conn.execute(
+                "SELECT path, is_dir, size, mtime, inode FROM entries WHERE root_id = ? AND first_scan > ? "
+                "AND first_scan <= ? AND (last_scan IS NULL OR last_scan >= ?)",
+                (root_id, old_scan_id, new_scan_id, new_scan_id))}
+        finally:
+            conn.close()
+        return build_diff(removed, added)
+
+def build_diff(removed, added):
+    # removed/added map path -> (path, is_dir, size, mtime, inode)
+    modified = []
+    for path in sorted(set(removed) & set(added)):
+        old, new = removed.pop(path), added.pop(path)
+        # A directory's own mtime changes whenever its children do, which
+        # the added/removed lists already cover
+        if old[1] and new[1]:
+            continue
+        modified.append({"path": path, "is_dir": bool(new[1]), "old_size": old[2], "new_size": new[2],
+                         "old_mtime": old[3], "new_mtime": new[3]})
+
+    # Same inode under a different path: moved or renamed
+    added_by_inode = {}
+    for path, row in added.items():
+        added_by_inode.setdefault((row[4], row[1]), []).append(path)
+    moved = []
+    for old_path in sorted(removed):
+        old = removed[old_path]
+        candidates = added_by_inode.get((old[4], old[1]))
+        if not old[4] or not candidates:
+            continue
+        new_path = candidates.pop(0)
+        if not old[1] and added[new_path][2] != old[2]:
+            candidates.insert(0, new_path)
+            continue
+        moved.append({"old_path": old_path, "new_path": new_path, "is_dir": bool(old[1]), "size": old[2]})
+
+    # Report a moved directory once instead of once per entry inside it
+    moved_dirs = [(move["old_path"] + os.sep, move["new_path"] + os.sep) for move in moved if move["is_dir"]]
+    def implied(move):
+        return any(move["old_path"].startswith(old_prefix)
+                   and move["new_path"] == new_prefix + move["old_path"][len(old_prefix):]
+                   for old_prefix, new_prefix in moved_dirs)
+    for move in moved:
+        removed.pop(move["old_path"], None)
+        added.pop(move["new_path"], None)
+    moved = [move for move in moved if not implied(move)]
+
+    def listing(rows):
+        # An added or removed directory is listed once, with a count of the
+        # entries inside it, rather than followed by its whole subtree
+        result = []
+        for path in sorted(rows, key=lambda path: path.split(os.sep)):
+            if result and result[-1]["is_dir"] and path.startswith(result[-1]["path"] + os.sep):
+                result[-1]["entries"] += 1
+                continue
+            entry = {"path": path, "is_dir": bool(rows[path][1]), "size": rows[path][2], "mtime": rows[path][3]}
+            if entry["is_dir"]:
+                entry["entries"] = 0
+            result.append(entry)
+        return result
+    return {"added": listing(added), "removed": listing(removed), "modified": modified, "moved": moved}
+
+def format_diff(diff):
+    lines = [f"Added: {len(diff['added'])}  Removed: {len(diff['removed'])}  "
+             f"Modified: {len(diff['modified'])}  Moved: {len(diff['moved'])}", ""]
+    for sign, key in (("+", "added"), ("-", "removed")):
+        for entry in diff[key]:
+            if entry["is_dir"]:
+                lines.append(f"{sign} {entry['path']}{os.sep} ({entry['entries']} entries inside)")
+            else:
+                lines.append(f"{sign} {entry['path']}")
+    for entry in diff["modified"]:
+        lines.append(f"~ {entry['path']} ({entry['old_size']} -> {entry['new_size']} bytes)")
+    for entry in diff["moved"]:
+        lines.append(f"> {entry['old_path']} -> {entry['new_path']}")
+    return "\n".join(lines)
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import heapq
+from resources.tools.folder_scanner.walker import TreeWalker
+from resources.tools.folder_scanner.scan_engine import default_output_folder
+
+TOP_N = 25
+# Per-directory rows are kept down to this depth; deeper directories only
+# compete for the top-N list, so memory doesn't grow with the tree
+TABLE_DEPTH = 2
+PROGRESS_EVERY = 256
+
+DAY = 24 * 60 * 60
+AGE_BUCKETS = (("Last day", DAY), ("Last week", 7 * DAY), ("Last month", 30 * DAY),
+               ("Last 6 months", 182 * DAY), ("Last year", 365 * DAY), ("Last 3 years", 3 * 365 * DAY),
+               ("Older", None))
+
+class UsageAggregator:
+    # Folds walker entries (with stat data) into disk-usage totals in the
+    # same single pass. Entries arrive in pre-order, so a directory is
+    # complete as soon as an entry at its depth or shallower shows up.
+    def __init__(self, root_path, top_n=TOP_N, table_depth=TABLE_DEPTH, now=None):
+        self.root_path = os.path.normpath(root_path)
+        # Like TreeWalker.root_length: a drive root ("/", "D:\\") already
+        # ends in the separator
+        self.root_length = len(self.root_path.rstrip(os.sep)) + 1
+        self.top_n = top_n
+        self.table_depth = table_depth
+        self.now = now or time.time()
+        self.open_dirs = []
+        self.directories = []
+        self.largest_files = []
+        self.largest_dirs = []
+        self.extensions = {}
+        self.ages = [[0, 0] for _ in AGE_BUCKETS]
+        self.total = None
+
+    def relative(self, path):
+        return path[self.root_length:] if path != self.root_path else "."
+
+    def add(self, entry):
+        self.close_dirs(entry.depth)
+        if entry.is_dir:
+            # [entry, size, files, dirs]
+            self.open_dirs.append([entry, 0, 0, 0])
+            return
+        size = entry.size
+        if self.open_dirs:
+            parent = self.open_dirs[-1]
+            parent[1] += size
+            parent[2] += 1
+
+        extension = os.path.splitext(entry.name)[1].lower() or "(none)"
+        stats = self.extensions.get(extension)
+        if stats is None:
+            stats = self.extensions[extension] = [0, 0]
+        stats[0] += 1
+        stats[1] += size
+
+        self.push_top(self.largest_files, (size, entry.path, entry.mtime))
+
+        age = self.now - entry.mtime
+        for index, (_, limit) in enumerate(AGE_BUCKETS):
+            if limit is None or age < limit:
+                self.ages[index][0] += 1
+                self.ages[index][1] += size
+                break
+
+    def push_top(self, heap, item):
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    def close_dirs(self, depth):
+        while self.open_dirs and self.open_dirs[-1][0].depth >= depth:
+            entry, size, files, dirs = self.open_dirs.pop()
+            if self.open_dirs:
+                parent = self.open_dirs[-1]
+                parent[1] += size
+                parent[2] += files
+                parent[3] += dirs + 1
+                self.push_top(self.largest_dirs, (size, entry.path, files))
+            else:
+                self.total = (size, files, dirs)
+            if entry.depth <= self.table_depth:
+                self.directories.append({"path": self.relative(entry.path), "depth": entry.depth,
+                                         "size": size, "files": files, "dirs": dirs})
+
+    def result(self):
+        self.close_dirs(0)
+        size, files, dirs = self.total or (0, 0, 0)
+        return {
+            "root": self.root_path,
+            "generated": self.now,
+            "total_size": size,
+            "total_files": files,
+            "total_dirs": dirs,
+            "directories": sorted(self.directories, key=lambda row: row["size"], reverse=True),
+            "extensions": sorted(({"extension": extension, "files": count, "size": total}
+                                  for extension, (count, total) in self.extensions.items()),
+                                 key=lambda row: row["size"], reverse=True),
+            "largest_files": [{"path": self.relative(path), "size": size, "mtime": mtime}
+                              for size, path, mtime in sorted(self.largest_files, reverse=True)],
+            "largest_directories": [{"path": self.relative(path), "size": size, "files": files}
+                                    for size, path, files in sorted(self.largest_dirs, reverse=True)],
+            "age": [{"bucket": name, "files": count, "size": total}
+                    for (name, _), (count, total) in zip(AGE_BUCKETS, self.ages)],
+        }
+
+def analyze_usage(root_path, progress=None, top_n=TOP_N, table_depth=TABLE_DEPTH, max_depth=None, rules=None):
+    # Sizes come from the stat data the walker already collected for each
+    # entry (free on Windows, one lstat on POSIX); nothing is stat'ed twice
+    walker = TreeWalker(root_path, with_stat=True, max_depth=max_depth, rules=rules)
+    aggregator = UsageAggregator(root_path, top_n, table_depth)
+    for count, entry in enumerate(walker, start=1):
+        aggregator.add(entry)
+        if progress and count % PROGRESS_EVERY == 0:
+            progress(f"Measured {count} entries", count)
+    usage = aggregator.result()
+    usage["errors"] = len(walker.errors)
+    return usage
+
+def usage_output_file(scanned_directory, output_folder=None):
+    output_folder = output_folder or default_output_folder()
+    os.makedirs(output_folder, exist_ok=True)
+    scanned_folder_name = os.path.basename(os.path.normpath(scanned_directory))
+    return os.path.join(output_folder, f"{scanned_folder_name}_usage.json")
+
+def save_usage(usage, output_file):
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(usage, f, indent=2)
+    return output_file
@@ -0,0 +1,164 @@
+import os
+import hashlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from resources.tools.folder_scanner.walker import TreeWalker
+from resources.tools.folder_scanner.scan_engine import default_output_folder
+
+# The first and last SAMPLE_SIZE bytes tell most same-size files apart
+# (media files differ in their tail even when the headers match)
+SAMPLE_SIZE = 16 * 1024
+READ_BUFFER = 1024 * 1024
+# Hashing is mostly waiting on the disk and hashlib releases the GIL, but too
+# many parallel readers make a spinning drive seek instead of read
+HASH_WORKERS = min(8, os.cpu_count() or 2)
+PROGRESS_EVERY = 256
+PROGRESS_BYTES = 256 * 1024 * 1024
+
+def sample_hash(path, size):
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as f:
+        if size <= 2 * SAMPLE_SIZE:
+            digest.update(f.read())
+        else:
+            digest.update(f.read(SAMPLE_SIZE))
+            f.seek(size - SAMPLE_SIZE)
+            digest.update(f.read(SAMPLE_SIZE))
+    return digest.hexdigest()
+
+def full_hash(path, size=None):
+    digest = hashlib.blake2b()
+    buffer = bytearray(READ_BUFFER)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.hexdigest()
+
+def collect_sizes(roots, progress=None, min_size=1, rules_for=None, max_depth=None):
+    # Stage 1: group every file by size. Hard links to the same file are
+    # not duplicates (deleting one frees nothing), so each inode counts once;
+    # inode numbers are only unique per filesystem, hence the device.
+    by_size = defaultdict(list)
+    seen_paths, seen_inodes = set(), set()
+    errors = []
+    count = 0
+    for root in roots:
+        walker = TreeWalker(root, with_stat=True, max_depth=max_depth, rules=rules_for(root) if rules_for else None)
+        for entry in walker:
+            if entry.is_dir or entry.size < min_size or entry.path in seen_paths:
+                continue
+            seen_paths.add(entry.path)
+            if entry.inode and (entry.device, entry.inode) in seen_inodes:
+                continue
+            seen_inodes.add((entry.device, entry.inode))
+            by_size[entry.size].append(entry.path)
+            count += 1
+            if progress and count % PROGRESS_EVERY == 0:
+                progress(f"Found {count} files", count)
+        errors.extend(walker.errors)
+    return by_size, count, errors
+
+def hash_files(pool, hasher, items, window):
+    # Yields (size, path, digest or OSError) while keeping at most `window`
+    # reads in flight, so millions of candidates don't become millions of
+    # pending futures
+    pending = []
+    items = iter(items)
+    while True:
+        while len(pending) < window:
+            item = next(items, None)
+            if item is None:
+                break
+            size, path = item
+            pending.append((size, path, pool.submit(hasher, path, size)))
+        if not pending:
+            return
+        size, path, future = pending.pop(0)
+        try:
+            yield size, path, future.result()
+        except OSError as e:
+            yield size, path, e
+
+def refine(groups, pool, hasher, window, progress, label, errors):
+    # Splits each (size, paths) group by `hasher` and keeps the sub-groups
+    # that still have more than one file
+    items = [(size, path) for size, paths in groups for path in paths]
+    total = len(items)
+    bytes_total = sum(size for size, _ in items) if hasher is full_hash else None
+    buckets = defaultdict(list)
+    bytes_done = bytes_reported = 0
+    for done, (size, path, digest) in enumerate(hash_files(pool, hasher, items, window), start=1):
+        if isinstance(digest, OSError):
+            errors.append((path, digest.strerror or str(digest)))
+        else:
+            buckets[(size, digest)].append(path)
+        bytes_done += size
+        # Report every few hundred small files or every few big ones
+        if progress and (done % PROGRESS_EVERY == 0 or done == total
+                         or bytes_done - bytes_reported >= PROGRESS_BYTES):
+            bytes_reported = bytes_done
+            progress(f"{label} {done}/{total} files", done, total,
+                     bytes_done=bytes_done if bytes_total else None, bytes_total=bytes_total)
+    return [(size, digest, paths) for (size, digest), paths in buckets.items() if len(paths) > 1]
+
+def find_duplicates(roots, progress=None, min_size=1, workers=HASH_WORKERS, rules_for=None, max_depth=None):
+    # rules_for(root) gives the ScanRules for each root, since patterns
+    # like a .gitignore are relative to the folder they apply to
+    by_size, file_count, errors = collect_sizes(roots, progress, min_size, rules_for, max_depth)
+    candidates = [(size, paths) for size, paths in by_size.items() if len(paths) > 1]
+    candidate_count = sum(len(paths) for _, paths in candidates)
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hash")
+    window = workers * 4
+    try:
+        # Stage 2: head and tail of each same-size file
+        sampled = refine(candidates, pool, sample_hash, window, progress, "Sampled", errors)
+        # Files that fit in the sample were hashed whole already
+        confirmed = [group for group in sampled if group[0] <= 2 * SAMPLE_SIZE]
+        remaining = [(size, paths) for size, _, paths in sampled if size > 2 * SAMPLE_SIZE]
+        # Stage 3: full content, only for what still collides
+        confirmed += refine(remaining, pool, full_hash, window, progress, "Hashed", errors)
+    finally:
+        # Don't wait for queued reads when the job is cancelled
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    groups = [{"size": size, "hash": digest, "paths": sorted(paths), "reclaimable": size * (len(paths) - 1)}
+              for size, digest, paths in confirmed]
+    groups.sort(key=lambda group: (-group["reclaimable"], group["paths"][0]))
+    return {
+        "roots": [os.path.normpath(root) for root in roots],
+        "files": file_count,
+        "candidates": candidate_count,
+        "groups": groups,
+        "reclaimable": sum(group["reclaimable"] for group in groups),
+        "errors": errors,
+    }
+
+def format_duplicates(result):
+    lines = [f"{len(result['groups'])} duplicate groups, {result['reclaimable']:,} bytes reclaimable",
+             f"{result['files']:,} files scanned in {', '.join(result['roots'])}"]
+    for group in result["groups"]:
+        lines.append("")
+        lines.append(f"{len(group['paths'])} copies of {group['size']:,} bytes, "
+                     f"{group['reclaimable']:,} reclaimable")
+        lines.extend(f"    {path}" for path in group["paths"])
+    if result["errors"]:
+        lines.append("")
+        lines.append(f"{len(result['errors'])} paths could not be read:")
+        lines.extend(f"    {path}: {message}" for path, message in result["errors"])
+    return '\n'.join(lines) + '\n'
+
+def duplicates_output_file(roots, output_folder=None):
+    output_folder = output_folder or default_output_folder()
+    os.makedirs(output_folder, exist_ok=True)
+    scanned_folder_name = os.path.basename(os.path.normpath(roots[0]))
+    return os.path.join(output_folder, f"{scanned_folder_name}_duplicates.txt")
+
+def save_duplicates(result, output_file):
+    with open(output_file, 'w', encoding='utf-8', errors='surrogateescape') as f:
+        f.write(format_duplicates(result))
+    return output_file
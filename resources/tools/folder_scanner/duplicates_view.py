@@ -0,0 +1,58 @@
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                               QTreeWidget, QTreeWidgetItem, QHeaderView)
+from PySide6.QtCore import Qt
+from resources.widgets.jobs_panel import format_bytes
+
+# Only the biggest groups go into the tree; the report file has them all
+MAX_GROUPS_SHOWN = 5000
+
+class GroupItem(QTreeWidgetItem):
+    # Sorts the size columns by their byte counts, not the formatted text
+    def __init__(self, group):
+        super().__init__([f"{len(group['paths'])} copies", format_bytes(group["size"]),
+                          format_bytes(group["reclaimable"])])
+        self.sort_keys = (len(group["paths"]), group["size"], group["reclaimable"])
+        for column in (1, 2):
+            self.setTextAlignment(column, Qt.AlignRight | Qt.AlignVCenter)
+        for path in group["paths"]:
+            QTreeWidgetItem(self, [path])
+
+    def __lt__(self, other):
+        column = self.treeWidget().sortColumn()
+        if isinstance(other, GroupItem):
+            return self.sort_keys[column] < other.sort_keys[column]
+        return super().__lt__(other)
+
+def show_duplicates_result(parent, result, output_file, open_file):
+    dialog = QDialog(parent)
+    dialog.setWindowTitle("Duplicate Files")
+    dialog.resize(700, 550)
+    layout = QVBoxLayout(dialog)
+
+    summary = (f"{len(result['groups']):,} duplicate groups, {format_bytes(result['reclaimable'])} reclaimable "
+               f"({result['files']:,} files scanned)")
+    if len(result["groups"]) > MAX_GROUPS_SHOWN:
+        summary += f". Showing the {MAX_GROUPS_SHOWN:,} largest; the report lists all of them"
+    layout.addWidget(QLabel(summary))
+
+    tree = QTreeWidget()
+    tree.setHeaderLabels(["Files", "Size", "Reclaimable"])
+    tree.setUniformRowHeights(True)
+    tree.addTopLevelItems([GroupItem(group) for group in result["groups"][:MAX_GROUPS_SHOWN]])
+    tree.setSortingEnabled(True)
+    tree.sortItems(2, Qt.DescendingOrder)
+    tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+    layout.addWidget(tree)
+
+    button_layout = QHBoxLayout()
+
+    open_report_button = QPushButton("Open Report")
+    open_report_button.clicked.connect(lambda: open_file(output_file))
+    button_layout.addWidget(open_report_button)
+
+    close_button = QPushButton("Close")
+    close_button.clicked.connect(dialog.accept)
+    button_layout.addWidget(close_button)
+
+    layout.addLayout(button_layout)
+    dialog.exec_()
@@ -1,21 +1,41 @@
 import os
 import sys
 import subprocess
+from datetime import datetime
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
-                               QLabel, QLineEdit, QDialogButtonBox, QTextEdit,
-                               QFileDialog, QApplication)
+                               QLabel, QLineEdit, QDialogButtonBox, QTreeView,
+                               QFileDialog, QApplication, QProgressDialog, QMessageBox,
+                               QCheckBox, QComboBox, QPlainTextEdit, QSpinBox)
 from PySide6.QtCore import Qt
+from resources.tools.folder_scanner.scan_engine import write_scan, scan_output_file
+from resources.tools.folder_scanner.ignore_rules import build_rules
+from resources.tools.folder_scanner.scan_tree_model import ScanTreeModel
+from resources.tools.folder_scanner.catalog import ScanCatalog, format_diff
+from resources.tools.folder_scanner.disk_usage import analyze_usage, usage_output_file
+from resources.tools.folder_scanner.usage_view import show_usage_result
+from resources.tools.folder_scanner.duplicates import find_duplicates, duplicates_output_file, save_duplicates
+from resources.tools.folder_scanner.duplicates_view import show_duplicates_result
+from resources.tools.folder_scanner.watcher import ScanWatch
+from resources.tools.folder_scanner.tree_compare import (compare_trees, comparison_output_file, write_comparison,
+                                                         format_comparison)
+from resources.services.job_scheduler import get_job_scheduler, IO, DEDICATED, DONE, FAILED, FINISHED_STATES
+from resources.widgets.jobs_panel import get_job_events
 
-def scan_folder_structure(root_path):
-    structure = []
-    for root, dirs, files in os.walk(root_path):
-        level = root.replace(root_path, '').count(os.sep)
-        indent = ' ' * 4 * (level)
-        structure.append(f'{indent}{os.path.basename(root)}/')
-        subindent = ' ' * 4 * (level + 1)
-        for f in files:
-            structure.append(f'{subindent}{f}')
-    return '\n'.join(structure)
+CLIPBOARD_LIMIT_BYTES = 16 * 1024 * 1024
+REPORT_PREVIEW_LINES = 5000
+
+MODE_STRUCTURE = "Folder structure"
+MODE_USAGE = "Disk usage"
+MODE_DUPLICATES = "Duplicate files"
+MODE_COMPARE = "Compare two folders"
+# Duplicate search and compare take several folders, separated by this
+DIRECTORY_SEPARATOR = ";"
+INPUT_LABELS = {
+    MODE_DUPLICATES: f"Enter the directory paths to search, separated by {DIRECTORY_SEPARATOR}:",
+    MODE_COMPARE: f"Enter the source and the copy to compare, separated by {DIRECTORY_SEPARATOR}:",
+}
+# Output format label -> scan_file format
+OUTPUT_FORMATS = {"Indented text": "text", "NDJSON (one entry per line)": "ndjson", "Compact JSON tree": "json"}
 
 def show_folder_scanner_dialog(parent):
     dialog = QDialog(parent)
@@ -30,11 +50,87 @@ def show_folder_scanner_dialog(parent):
     input_layout.addWidget(input_field)
 
     browse_button = QPushButton("Browse")
-    browse_button.clicked.connect(lambda: select_folder(input_field))
+    browse_button.clicked.connect(lambda: select_folder(input_field,
+                                                        append=mode_combo.currentText() in (MODE_DUPLICATES, MODE_COMPARE)))
     input_layout.addWidget(browse_button)
 
     layout.addLayout(input_layout)
 
+    mode_layout = QHBoxLayout()
+    mode_layout.addWidget(QLabel("Mode:"))
+    mode_combo = QComboBox()
+    mode_combo.addItems([MODE_STRUCTURE, MODE_USAGE, MODE_DUPLICATES, MODE_COMPARE])
+    mode_layout.addWidget(mode_combo, 1)
+    layout.addLayout(mode_layout)
+
+    # Rescans of a catalogued folder only revisit directories that changed
+    catalog_checkbox = QCheckBox("Keep in catalog (fast rescans and scan diffs)")
+    layout.addWidget(catalog_checkbox)
+    mode_combo.currentTextChanged.connect(lambda mode: catalog_checkbox.setEnabled(mode == MODE_STRUCTURE))
+
+    # Keeps the output file up to date from file system notifications
+    watch_checkbox = QCheckBox("Keep watching for changes (updates the output file live)")
+    layout.addWidget(watch_checkbox)
+    mode_combo.currentTextChanged.connect(lambda mode: input_label.setText(
+        INPUT_LABELS.get(mode, "Enter the directory path to scan:")))
+
+    # Compare mode: matching size and mtime is enough unless this is set
+    verify_checkbox = QCheckBox("Verify file contents (reads both copies)")
+    verify_checkbox.setEnabled(False)
+    layout.addWidget(verify_checkbox)
+    mode_combo.currentTextChanged.connect(lambda mode: verify_checkbox.setEnabled(mode == MODE_COMPARE))
+
+    format_layout = QHBoxLayout()
+    format_layout.addWidget(QLabel("Output format:"))
+    format_combo = QComboBox()
+    format_combo.addItems(list(OUTPUT_FORMATS))
+    format_layout.addWidget(format_combo, 1)
+    layout.addLayout(format_layout)
+
+    # Filters prune folders before they are listed, so skipping
+    # node_modules or .git saves the time of walking them at all
+    common_checkbox = QCheckBox("Skip VCS, dependency and build folders (.git, node_modules, build, ...)")
+    layout.addWidget(common_checkbox)
+    gitignore_checkbox = QCheckBox("Apply the folder's .gitignore")
+    layout.addWidget(gitignore_checkbox)
+
+    layout.addWidget(QLabel("Exclude patterns (.gitignore syntax, one per line, ! re-includes):"))
+    exclude_field = QPlainTextEdit()
+    exclude_field.setPlaceholderText("*.log\ncache/\n!important.log")
+    exclude_field.setMaximumHeight(70)
+    layout.addWidget(exclude_field)
+
+    include_layout = QHBoxLayout()
+    include_layout.addWidget(QLabel("Only files matching:"))
+    include_field = QLineEdit()
+    include_field.setPlaceholderText("e.g. *.py *.md (empty keeps all files)")
+    include_layout.addWidget(include_field, 1)
+    layout.addLayout(include_layout)
+
+    depth_layout = QHBoxLayout()
+    depth_layout.addWidget(QLabel("Max depth:"))
+    depth_spinbox = QSpinBox()
+    depth_spinbox.setRange(0, 1000)
+    depth_spinbox.setSpecialValueText("Unlimited")
+    depth_layout.addWidget(depth_spinbox)
+    depth_layout.addStretch()
+    layout.addLayout(depth_layout)
+
+    # The catalog keeps whole trees so stored scans stay comparable
+    filter_widgets = [format_combo, common_checkbox, gitignore_checkbox, exclude_field, include_field, depth_spinbox]
+    def update_filters():
+        catalog = catalog_checkbox.isChecked() and mode_combo.currentText() == MODE_STRUCTURE
+        for widget in filter_widgets:
+            widget.setEnabled(not catalog)
+        format_combo.setEnabled(not catalog and mode_combo.currentText() in (MODE_STRUCTURE, MODE_COMPARE))
+        watch_checkbox.setEnabled(not catalog and mode_combo.currentText() == MODE_STRUCTURE)
+    catalog_checkbox.toggled.connect(update_filters)
+    mode_combo.currentTextChanged.connect(update_filters)
+
+    compare_button = QPushButton("Compare Stored Scans...")
+    compare_button.clicked.connect(lambda: show_catalog_diff_dialog(dialog, input_field.text()))
+    layout.addWidget(compare_button)
+
     button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
     button_box.accepted.connect(dialog.accept)
     button_box.rejected.connect(dialog.reject)
@@ -42,44 +138,270 @@ def show_folder_scanner_dialog(parent):
 
     if dialog.exec_() == QDialog.Accepted:
         directory = input_field.text()
-        if directory:
-            result = scan_folder_structure(directory)
-            save_and_show_scan_result(parent, result, directory)
-        else:
+        filters = {
+            "exclude": exclude_field.toPlainText().splitlines(),
+            "include": include_field.text().split(),
+            "common_excludes": common_checkbox.isChecked(),
+            "use_gitignore": gitignore_checkbox.isChecked(),
+            "max_depth": depth_spinbox.value() or None,
+        }
+        if not directory:
             show_error_message(parent, "No directory selected")
+        elif mode_combo.currentText() == MODE_USAGE:
+            start_usage_scan(parent, directory, filters)
+        elif mode_combo.currentText() == MODE_DUPLICATES:
+            start_duplicate_search(parent, split_directories(directory), filters)
+        elif mode_combo.currentText() == MODE_COMPARE:
+            directories = split_directories(directory)
+            if len(directories) != 2:
+                show_error_message(parent, f"Enter exactly two folders separated by {DIRECTORY_SEPARATOR}")
+            else:
+                start_compare(parent, directories[0], directories[1], verify_checkbox.isChecked(), filters,
+                              OUTPUT_FORMATS[format_combo.currentText()])
+        elif catalog_checkbox.isChecked():
+            start_scan(parent, directory, use_catalog=True)
+        elif watch_checkbox.isChecked():
+            start_watch(parent, directory, filters, OUTPUT_FORMATS[format_combo.currentText()])
+        else:
+            start_scan(parent, directory, filters=filters, output_format=OUTPUT_FORMATS[format_combo.currentText()])
 
-def select_folder(input_field):
-    folder = QFileDialog.getExistingDirectory()
-    if folder:
-        input_field.setText(folder)
+def split_directories(text):
+    return [path.strip() for path in text.split(DIRECTORY_SEPARATOR) if path.strip()]
+
+def filter_rules(filters, directory):
+    if not filters:
+        return None
+    return build_rules(directory, filters["exclude"], filters["include"],
+                       common_excludes=filters["common_excludes"], use_gitignore=filters["use_gitignore"])
+
+def start_scan(parent, directory, use_catalog=False, filters=None, output_format="text"):
+    output_file = scan_output_file(directory, output_format=output_format)
+    max_depth = filters["max_depth"] if filters else None
+
+    def scan(context):
+        if use_catalog:
+            catalog = ScanCatalog()
+            scan_id = catalog.rescan(directory, context.progress)
+            catalog.write_scan_file(scan_id, output_file)
+        else:
+            write_scan(directory, output_file, context.progress, max_depth=max_depth,
+                       rules=filter_rules(filters, directory), output_format=output_format)
+        return output_file
+
+    def on_done(result):
+        if output_format == "text":
+            show_scan_result(parent, result, os.path.dirname(result))
+        else:
+            show_scan_written(parent, result)
+
+    run_scanner_job(parent, f"Scan {os.path.basename(os.path.normpath(directory))}",
+                    f"Scanning {directory}...", scan, on_done)
+
+def start_watch(parent, directory, filters=None, output_format="text"):
+    output_file = scan_output_file(directory, output_format=output_format)
+    watch = ScanWatch(directory, output_file, output_format, rules=filter_rules(filters, directory),
+                      max_depth=filters["max_depth"] if filters else None)
 
-def save_and_show_scan_result(parent, result, scanned_directory):
-    documents_path = os.path.expanduser("~/Documents")
-    output_folder = os.path.join(documents_path, "folder_scanner")
-    os.makedirs(output_folder, exist_ok=True)
+    def run(context):
+        return watch.run(context.progress, lambda: context.cancelled)
 
-    scanned_folder_name = os.path.basename(scanned_directory)
-    output_file = os.path.join(output_folder, f"{scanned_folder_name}_scan.txt")
+    # Runs until stopped from the Jobs panel, so there's no progress dialog
+    name = f"Watch {os.path.basename(os.path.normpath(directory))}"
+    job = get_job_scheduler().submit(name, run, kind=DEDICATED)
+    events = get_job_events()
 
-    with open(output_file, 'w') as f:
-        f.write(result)
+    def on_job_event(event):
+        if event["job"] != job.id or event["state"] not in FINISHED_STATES:
+            return
+        events.job_event.disconnect(on_job_event)
+        if event["state"] == FAILED:
+            show_error_message(parent, f"{name} failed: {event['error']}")
 
-    show_scan_result(parent, result, output_file, output_folder)
+    events.job_event.connect(on_job_event)
+    QMessageBox.information(parent, "Folder Scanner",
+                            f"Watching {directory}.\n\n{output_file} and {watch.changes_file} are kept up to date "
+                            "until the watch is cancelled in the Jobs panel.")
+
+def start_usage_scan(parent, directory, filters=None):
+    output_file = usage_output_file(directory)
+
+    def measure(context):
+        return analyze_usage(directory, context.progress, max_depth=filters["max_depth"] if filters else None,
+                             rules=filter_rules(filters, directory))
+
+    run_scanner_job(parent, f"Disk usage of {os.path.basename(os.path.normpath(directory))}",
+                    f"Measuring {directory}...", measure,
+                    lambda usage: show_usage_result(parent, usage, output_file))
+
+def start_duplicate_search(parent, directories, filters=None):
+    output_file = duplicates_output_file(directories)
+
+    def search(context):
+        result = find_duplicates(directories, context.progress,
+                                 rules_for=lambda directory: filter_rules(filters, directory),
+                                 max_depth=filters["max_depth"] if filters else None)
+        save_duplicates(result, output_file)
+        return result
+
+    run_scanner_job(parent, f"Duplicates in {os.path.basename(os.path.normpath(directories[0]))}",
+                    f"Looking for duplicates in {', '.join(directories)}...", search,
+                    lambda result: show_duplicates_result(parent, result, output_file, open_file))
+
+def start_compare(parent, source, copy, verify=False, filters=None, output_format="text"):
+    output_file = comparison_output_file(source, output_format=output_format)
+
+    def compare(context):
+        result = compare_trees(source, copy, context.progress, verify=verify,
+                               rules_for=lambda directory: filter_rules(filters, directory),
+                               max_depth=filters["max_depth"] if filters else None)
+        write_comparison(result, output_file, output_format)
+        return result
+
+    run_scanner_job(parent, f"Compare {os.path.basename(os.path.normpath(source))}",
+                    f"Comparing {source} with {copy}...", compare,
+                    lambda result: show_comparison_result(parent, result, output_file))
+
+def run_scanner_job(parent, name, label, work, on_done):
+    # The work runs as a background job so huge or remote trees don't
+    # freeze the window; the progress dialog can cancel it
+    job = get_job_scheduler().submit(name, work, kind=IO)
+
+    progress_dialog = QProgressDialog(label, "Cancel", 0, 0, parent)
+    progress_dialog.setWindowTitle("Folder Scanner")
+    progress_dialog.setMinimumDuration(0)
+    progress_dialog.canceled.connect(lambda: get_job_scheduler().cancel(job.id))
+    events = get_job_events()
+
+    def on_job_event(event):
+        if event["job"] != job.id:
+            return
+        if event["state"] not in FINISHED_STATES:
+            if event["message"]:
+                progress_dialog.setLabelText(event["message"])
+            return
+        events.job_event.disconnect(on_job_event)
+        progress_dialog.canceled.disconnect()
+        progress_dialog.close()
+        if event["state"] == DONE:
+            on_done(event["result"])
+        elif event["state"] == FAILED:
+            show_error_message(parent, f"{name} failed: {event['error']}")
+
+    events.job_event.connect(on_job_event)
+    progress_dialog.show()
+
+def show_catalog_diff_dialog(parent, directory):
+    catalog = ScanCatalog()
+    scans = catalog.scans(directory) if directory else []
+    if len(scans) < 2:
+        show_error_message(parent, "Scan this folder into the catalog at least twice to compare scans")
+        return
 
-def show_scan_result(parent, result, output_file, output_folder):
+    dialog = QDialog(parent)
+    dialog.setWindowTitle("Compare Stored Scans")
+    dialog.resize(600, 500)
+    layout = QVBoxLayout(dialog)
+
+    combo_layout = QHBoxLayout()
+    old_combo, new_combo = QComboBox(), QComboBox()
+    for scan in scans:
+        label = f"#{scan['id']}  {datetime.fromtimestamp(scan['started']):%Y-%m-%d %H:%M}  ({scan['entries']} entries)"
+        old_combo.addItem(label, scan["id"])
+        new_combo.addItem(label, scan["id"])
+    old_combo.setCurrentIndex(len(scans) - 2)
+    new_combo.setCurrentIndex(len(scans) - 1)
+    combo_layout.addWidget(QLabel("From"))
+    combo_layout.addWidget(old_combo, 1)
+    combo_layout.addWidget(QLabel("to"))
+    combo_layout.addWidget(new_combo, 1)
+    layout.addLayout(combo_layout)
+
+    report_text = QPlainTextEdit()
+    report_text.setReadOnly(True)
+    layout.addWidget(report_text)
+
+    def compare():
+        old_id, new_id = old_combo.currentData(), new_combo.currentData()
+        report = format_diff(catalog.diff(old_id, new_id))
+        output_folder = os.path.dirname(scan_output_file(directory))
+        name = os.path.basename(os.path.normpath(directory))
+        report_file = os.path.join(output_folder, f"{name}_diff_{old_id}_{new_id}.txt")
+        with open(report_file, 'w') as f:
+            f.write(report)
+        # Only the summary and first changes are shown; the file has it all
+        lines = report.splitlines()
+        if len(lines) > REPORT_PREVIEW_LINES:
+            lines = lines[:REPORT_PREVIEW_LINES] + [f"... see {report_file} for the full report"]
+        report_text.setPlainText("\n".join(lines))
+
+    button_layout = QHBoxLayout()
+    compare_button = QPushButton("Compare")
+    compare_button.clicked.connect(compare)
+    button_layout.addWidget(compare_button)
+    close_button = QPushButton("Close")
+    close_button.clicked.connect(dialog.accept)
+    button_layout.addWidget(close_button)
+    layout.addLayout(button_layout)
+
+    compare()
+    dialog.exec_()
+
+def show_comparison_result(parent, result, output_file):
+    dialog = QDialog(parent)
+    dialog.setWindowTitle("Folder Comparison")
+    dialog.resize(600, 500)
+    layout = QVBoxLayout(dialog)
+
+    report_text = QPlainTextEdit()
+    report_text.setReadOnly(True)
+    lines = format_comparison(result).splitlines()
+    if len(lines) > REPORT_PREVIEW_LINES:
+        lines = lines[:REPORT_PREVIEW_LINES] + [f"... see {output_file} for the full report"]
+    report_text.setPlainText("\n".join(lines))
+    layout.addWidget(report_text)
+
+    button_layout = QHBoxLayout()
+
+    open_file_button = QPushButton("Open Report")
+    open_file_button.clicked.connect(lambda: open_file(output_file))
+    button_layout.addWidget(open_file_button)
+
+    close_button = QPushButton("Close")
+    close_button.clicked.connect(dialog.accept)
+    button_layout.addWidget(close_button)
+
+    layout.addLayout(button_layout)
+    dialog.exec_()
+
+def select_folder(input_field, append=False):
+    folder = QFileDialog.getExistingDirectory()
+    if not folder:
+        return
+    if append and input_field.text().strip():
+        input_field.setText(f"{input_field.text().strip()}{DIRECTORY_SEPARATOR}{folder}")
+    else:
+        input_field.setText(folder)
+
+def show_scan_result(parent, output_file, output_folder):
     dialog = QDialog(parent)
     dialog.setWindowTitle("Scan Result")
+    dialog.resize(600, 500)
     layout = QVBoxLayout(dialog)
 
-    result_text = QTextEdit()
-    result_text.setPlainText(result)
-    result_text.setReadOnly(True)
-    layout.addWidget(result_text)
+    # Directories are read from the scan file as they are expanded, so even
+    # a multi-million line scan opens instantly
+    model = ScanTreeModel(output_file, dialog)
+    result_tree = QTreeView()
+    result_tree.setHeaderHidden(True)
+    result_tree.setUniformRowHeights(True)
+    result_tree.setModel(model)
+    result_tree.expand(model.index(0, 0))
+    layout.addWidget(result_tree)
 
     button_layout = QHBoxLayout()
     
     copy_button = QPushButton("Copy to Clipboard")
-    copy_button.clicked.connect(lambda: QApplication.clipboard().setText(result))
+    copy_button.clicked.connect(lambda: copy_scan_result(dialog, output_file))
     button_layout.addWidget(copy_button)
 
     open_file_button = QPushButton("Open Output File")
@@ -97,6 +419,39 @@ def show_scan_result(parent, result, output_file, output_folder):
     layout.addLayout(button_layout)
 
     dialog.exec_()
+    model.close()
+
+def show_scan_written(parent, output_file):
+    # JSON output is meant for other tools, so there's no tree to show
+    dialog = QDialog(parent)
+    dialog.setWindowTitle("Scan Result")
+    layout = QVBoxLayout(dialog)
+    layout.addWidget(QLabel(f"Scan written to {output_file}"))
+
+    button_layout = QHBoxLayout()
+
+    open_file_button = QPushButton("Open Output File")
+    open_file_button.clicked.connect(lambda: open_file(output_file))
+    button_layout.addWidget(open_file_button)
+
+    open_folder_button = QPushButton("Open Output Folder")
+    open_folder_button.clicked.connect(lambda: open_folder(os.path.dirname(output_file)))
+    button_layout.addWidget(open_folder_button)
+
+    close_button = QPushButton("Close")
+    close_button.clicked.connect(dialog.accept)
+    button_layout.addWidget(close_button)
+
+    layout.addLayout(button_layout)
+    dialog.exec_()
+
+def copy_scan_result(parent, output_file):
+    if os.path.getsize(output_file) > CLIPBOARD_LIMIT_BYTES:
+        QMessageBox.information(parent, "Scan Result",
+                                "This scan is too large for the clipboard. Use Open Output File instead.")
+        return
+    with open(output_file, 'r', encoding='utf-8', errors='replace') as f:
+        QApplication.clipboard().setText(f.read())
 
 def open_file(file_path):
     if sys.platform == 'win32':
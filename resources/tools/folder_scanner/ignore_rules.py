@@ -0,0 +1,124 @@
+import os
+import re
+
+# Version control, dependency and build folders: usually most of the entries
+# in a source tree and almost never what a scan is for
+COMMON_EXCLUDES = (".git/", ".hg/", ".svn/", "node_modules/", "__pycache__/", ".venv/", "venv/",
+                   ".tox/", ".mypy_cache/", ".pytest_cache/", "build/", "dist/", "target/")
+
+def translate(pattern):
+    # Turns a .gitignore glob into a regex over a '/'-separated relative path
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')  # Zero or more directories
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            parts.append('[^/]*')
+        elif c == '?':
+            parts.append('[^/]')
+        elif c == '[' and pattern.find(']', i + 2) != -1:
+            end = pattern.find(']', i + 2)
+            body = pattern[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            parts.append('[' + body.replace('\\', '\\\\') + ']')
+            i = end + 1
+            continue
+        elif c == '\\' and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return ''.join(parts)
+
+class IgnoreRule:
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.negate = pattern.startswith('!')
+        if self.negate:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        # Like git: a slash anywhere but the end anchors the pattern to the
+        # scan root, otherwise it matches the name at any depth
+        anchored = '/' in pattern
+        regex = translate(pattern.lstrip('/'))
+        self.regex = re.compile(regex if anchored else '(?:.*/)?' + regex, re.DOTALL)
+
+    def matches(self, path, is_dir):
+        return (is_dir or not self.dir_only) and self.regex.fullmatch(path) is not None
+
+def parse_patterns(lines):
+    rules = []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.endswith('\\ '):
+            line = line.rstrip()
+        if line and not line.startswith('#'):
+            rules.append(IgnoreRule(line))
+    return rules
+
+def read_ignore_file(path):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read().splitlines()
+
+class ScanRules:
+    # Decides which entries a scan keeps. Exclude patterns follow .gitignore
+    # (last match wins, "!" re-includes); include patterns, if any, limit the
+    # files kept. Directories are only ever pruned by excludes, and the walker
+    # asks before listing them, so an excluded folder is never descended into.
+    def __init__(self, exclude=(), include=()):
+        self.exclude = parse_patterns(exclude)
+        self.include = parse_patterns(include)
+        # Without negations the order doesn't matter, so every pattern can be
+        # tested in one regex call per entry
+        self.combined = not any(rule.negate for rule in self.exclude)
+        self.dir_regex = self.combine(self.exclude)
+        self.file_regex = self.combine([rule for rule in self.exclude if not rule.dir_only])
+
+    def combine(self, rules):
+        if not rules:
+            return None
+        return re.compile('|'.join(f'(?:{rule.regex.pattern})' for rule in rules), re.DOTALL)
+
+    def __bool__(self):
+        return bool(self.exclude or self.include)
+
+    def excluded(self, path, is_dir):
+        if not self.exclude:
+            return False
+        if self.combined:
+            regex = self.dir_regex if is_dir else self.file_regex
+            return regex is not None and regex.fullmatch(path) is not None
+        for rule in reversed(self.exclude):
+            if rule.matches(path, is_dir):
+                return not rule.negate
+        return False
+
+    def keep(self, path, is_dir):
+        if self.excluded(path, is_dir):
+            return False
+        if self.include and not is_dir:
+            return any(rule.matches(path, False) for rule in self.include if not rule.negate)
+        return True
+
+def build_rules(root_path, exclude=(), include=(), common_excludes=False, use_gitignore=False):
+    # Collects patterns from the scanner options; the root's own .gitignore
+    # goes first so explicit patterns can override it
+    patterns = list(COMMON_EXCLUDES) if common_excludes else []
+    gitignore = os.path.join(root_path, ".gitignore")
+    if use_gitignore and os.path.isfile(gitignore):
+        patterns += read_ignore_file(gitignore)
+    patterns += exclude
+    rules = ScanRules(patterns, include)
+    return rules if rules else None
@@ -0,0 +1,45 @@
+import os
+from resources.tools.folder_scanner.walker import TreeWalker
+from resources.tools.folder_scanner.scan_file import SCAN_FORMATS, open_scan_writer, format_entry
+
+PROGRESS_EVERY = 256
+
+def scan_folder_structure(root_path, progress=None, max_depth=None, rules=None):
+    walker = TreeWalker(root_path, max_depth=max_depth, rules=rules)
+    structure = []
+    for count, entry in enumerate(walker, start=1):
+        structure.append(format_entry(entry))
+        if progress and count % PROGRESS_EVERY == 0:
+            progress(f"Scanned {count} entries", count)
+    if progress:
+        progress(f"Scanned {len(structure)} entries", len(structure))
+    return '\n'.join(structure)
+
+def write_scan(root_path, output_file, progress=None, max_depth=None, rules=None, output_format="text"):
+    # Same output as save_scan_result(scan_folder_structure(...)), written
+    # line by line as the walk goes, so memory stays flat however big the
+    # tree is. Returns the number of entries written.
+    walker = TreeWalker(root_path, max_depth=max_depth, rules=rules, with_stat=output_format != "text")
+    with open_scan_writer(output_format, output_file, root_path) as writer:
+        for entry in walker:
+            writer.add(entry)
+            if progress and writer.lines % PROGRESS_EVERY == 0:
+                progress(f"Scanned {writer.lines} entries", writer.lines)
+    if progress:
+        progress(f"Scanned {writer.lines} entries", writer.lines)
+    return writer.lines
+
+def default_output_folder():
+    return os.path.join(os.path.expanduser("~/Documents"), "folder_scanner")
+
+def scan_output_file(scanned_directory, output_folder=None, output_format="text"):
+    output_folder = output_folder or default_output_folder()
+    os.makedirs(output_folder, exist_ok=True)
+    scanned_folder_name = os.path.basename(os.path.normpath(scanned_directory))
+    return os.path.join(output_folder, f"{scanned_folder_name}_scan{SCAN_FORMATS[output_format]}")
+
+def save_scan_result(result, scanned_directory, output_folder=None):
+    output_file = scan_output_file(scanned_directory, output_folder)
+    with open(output_file, 'w') as f:
+        f.write(result)
+    return output_file
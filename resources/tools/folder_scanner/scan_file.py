@@ -0,0 +1,209 @@
+import os
+import json
+import struct
+from collections import namedtuple
+
+INDENT = ' ' * 4
+
+# One record per directory, in the order the directories appear in the scan
+# file: the offset of its line, the offset just past its subtree and how many
+# directories the subtree holds (itself included). With these a reader can
+# list a directory's children and jump over their subtrees without reading
+# them.
+INDEX_RECORD = struct.Struct("<QQQ")
+
+ScanLine = namedtuple("ScanLine", ["name", "is_dir", "offset", "end", "dir_number"])
+
+def format_entry(entry):
+    # A newline in a file name would otherwise split it across two lines
+    name = entry.name.replace('\n', '\\n')
+    return f'{INDENT * entry.depth}{name}/' if entry.is_dir else f'{INDENT * entry.depth}{name}'
+
+def index_path_for(output_file):
+    return os.path.splitext(output_file)[0] + ".idx"
+
+class ScanFileWriter:
+    # Streams scan entries to the text file as they arrive. Everything goes
+    # to .part files that are renamed into place on success, so a cancelled
+    # or failed scan never leaves a truncated result behind.
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.index_file = index_path_for(output_file)
+        self.text = open(output_file + ".part", "wb")
+        self.index = open(self.index_file + ".part", "wb")
+        self.offset = 0
+        self.lines = 0
+        self.dir_count = 0
+        self.open_dirs = []
+
+    def add(self, entry):
+        self.close_dirs(entry.depth)
+        line = (format_entry(entry) + '\n').encode("utf-8", "surrogateescape")
+        if entry.is_dir:
+            self.open_dirs.append((self.dir_count, self.offset, entry.depth))
+            self.dir_count += 1
+        self.text.write(line)
+        self.offset += len(line)
+        self.lines += 1
+
+    def close_dirs(self, depth):
+        # An entry at `depth` ends every open directory at that depth or deeper
+        while self.open_dirs and self.open_dirs[-1][2] >= depth:
+            number, start, _ = self.open_dirs.pop()
+            self.index.seek(number * INDEX_RECORD.size)
+            self.index.write(INDEX_RECORD.pack(start, self.offset, self.dir_count - number))
+
+    def commit(self):
+        self.close_dirs(0)
+        self.text.close()
+        self.index.close()
+        os.replace(self.output_file + ".part", self.output_file)
+        os.replace(self.index_file + ".part", self.index_file)
+
+    def abort(self):
+        self.text.close()
+        self.index.close()
+        for path in (self.output_file + ".part", self.index_file + ".part"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+def entry_record(entry, relative_path=None):
+    record = {"name": entry.name, "type": "dir" if entry.is_dir else "file"}
+    if relative_path is not None:
+        record["path"] = relative_path
+        record["depth"] = entry.depth
+    if not entry.is_dir:
+        record["size"] = entry.size
+    record["mtime"] = entry.mtime
+    return record
+
+class JsonScanWriter:
+    # Machine-readable scan output. "ndjson" writes one object per entry with
+    # its path relative to the root, in scan order; "json" writes the whole
+    # tree as one compact nested document. Both need stat'ed entries and,
+    # like ScanFileWriter, only appear under their final name on success.
+    def __init__(self, output_file, root_path, nested=False):
+        self.output_file = output_file
+        self.root_length = len(os.path.normpath(root_path).rstrip(os.sep)) + 1
+        self.nested = nested
+        self.out = open(output_file + ".part", "w", encoding="utf-8")
+        self.lines = 0
+        self.open_depths = []
+        self.need_comma = False
+
+    def relative(self, entry):
+        if entry.depth == 0:
+            return "."
+        relative = entry.path[self.root_length:]
+        return relative if os.sep == '/' else relative.replace(os.sep, '/')
+
+    def add(self, entry):
+        if self.nested:
+            self.add_nested(entry)
+        else:
+            self.out.write(json.dumps(entry_record(entry, self.relative(entry))) + "\n")
+        self.lines += 1
+
+    def add_nested(self, entry):
+        self.close_dirs(entry.depth)
+        if self.need_comma:
+            self.out.write(",")
+        text = json.dumps(entry_record(entry), separators=(",", ":"))
+        if entry.is_dir:
+            # Leave the object open for its children
+            self.out.write(text[:-1] + ',"children":[')
+            self.open_depths.append(entry.depth)
+            self.need_comma = False
+        else:
+            self.out.write(text)
+            self.need_comma = True
+
+    def close_dirs(self, depth):
+        while self.open_depths and self.open_depths[-1] >= depth:
+            self.open_depths.pop()
+            self.out.write("]}")
+            self.need_comma = True
+
+    def commit(self):
+        self.close_dirs(0)
+        if self.nested:
+            self.out.write("\n")
+        self.out.close()
+        os.replace(self.output_file + ".part", self.output_file)
+
+    def abort(self):
+        self.out.close()
+        if os.path.exists(self.output_file + ".part"):
+            os.remove(self.output_file + ".part")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+# Output format -> file extension
+SCAN_FORMATS = {"text": ".txt", "ndjson": ".ndjson", "json": ".json"}
+
+def open_scan_writer(output_format, output_file, root_path):
+    if output_format == "text":
+        return ScanFileWriter(output_file)
+    if output_format in SCAN_FORMATS:
+        return JsonScanWriter(output_file, root_path, nested=output_format == "json")
+    raise ValueError(f"Unknown scan format: {output_format}")
+
+class ScanFileReader:
+    def __init__(self, output_file):
+        self.text = open(output_file, "rb")
+        self.index = open(index_path_for(output_file), "rb")
+
+    def record(self, dir_number):
+        self.index.seek(dir_number * INDEX_RECORD.size)
+        return INDEX_RECORD.unpack(self.index.read(INDEX_RECORD.size))
+
+    def root(self):
+        start, end, _ = self.record(0)
+        self.text.seek(start)
+        line = self.text.readline().rstrip(b'\n')
+        return ScanLine(line.decode("utf-8", "surrogateescape")[:-1], True, start, end, 0)
+
+    def first_child_offset(self, directory):
+        self.text.seek(directory.offset)
+        return directory.offset + len(self.text.readline())
+
+    def read_children(self, offset, dir_number, end, depth, limit):
+        # Reads up to `limit` children of a directory at `depth`, starting at
+        # `offset` (a child line) whose first subdirectory is `dir_number`.
+        # Returns the children plus where to continue from.
+        children = []
+        indent = len(INDENT) * (depth + 1)
+        self.text.seek(offset)
+        while offset < end and len(children) < limit:
+            raw = self.text.readline()
+            name = raw.rstrip(b'\n')[indent:].decode("utf-8", "surrogateescape")
+            if name.endswith('/'):
+                start, subtree_end, subtree_dirs = self.record(dir_number)
+                children.append(ScanLine(name[:-1], True, start, subtree_end, dir_number))
+                dir_number += subtree_dirs
+                offset = subtree_end
+                self.text.seek(offset)
+            else:
+                children.append(ScanLine(name, False, offset, offset + len(raw), None))
+                offset += len(raw)
+        return children, offset, dir_number
+
+    def close(self):
+        self.text.close()
+        self.index.close()
@@ -0,0 +1,109 @@
+from PySide6.QtCore import Qt, QAbstractItemModel, QModelIndex
+from PySide6.QtWidgets import QApplication, QStyle
+from resources.tools.folder_scanner.scan_file import ScanFileReader
+
+# Children are read from the scan file in batches as the view scrolls, so a
+# directory with a million entries never gets loaded in one go
+FETCH_BATCH = 500
+
+class ScanNode:
+    def __init__(self, line, parent, row, depth):
+        self.name = line.name
+        self.is_dir = line.is_dir
+        self.offset = line.offset
+        self.end = line.end
+        self.dir_number = line.dir_number
+        self.parent = parent
+        self.row = row
+        self.depth = depth
+        self.children = []
+        # Where the next batch of children starts; set on first fetch
+        self.next_offset = None
+        self.next_dir = None
+
+class ScanTreeModel(QAbstractItemModel):
+    # Tree view over a streamed scan file. Only directories the user expands
+    # are read, so memory follows what is on screen, not the size of the scan.
+    def __init__(self, output_file, parent=None):
+        super().__init__(parent)
+        self.reader = ScanFileReader(output_file)
+        self.root = ScanNode(self.reader.root(), None, 0, 0)
+        style = QApplication.style()
+        self.dir_icon = style.standardIcon(QStyle.SP_DirIcon)
+        self.file_icon = style.standardIcon(QStyle.SP_FileIcon)
+
+    def node(self, index):
+        return index.internalPointer() if index.isValid() else None
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        node = self.node(parent)
+        child = self.root if node is None else node.children[row]
+        return self.createIndex(row, column, child)
+
+    def parent(self, index):
+        node = self.node(index)
+        if node is None or node.parent is None:
+            return QModelIndex()
+        return self.createIndex(node.parent.row, 0, node.parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        node = self.node(parent)
+        if node is None:
+            return 1
+        return len(node.children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.node(parent)
+        if node is None:
+            return True
+        if not node.is_dir:
+            return False
+        return bool(node.children) or self.start_offset(node) < node.end
+
+    def start_offset(self, node):
+        if node.next_offset is None:
+            node.next_offset = self.reader.first_child_offset(node)
+            node.next_dir = node.dir_number + 1
+        return node.next_offset
+
+    def canFetchMore(self, parent):
+        node = self.node(parent)
+        return node is not None and node.is_dir and self.start_offset(node) < node.end
+
+    def fetchMore(self, parent):
+        node = self.node(parent)
+        lines, node.next_offset, node.next_dir = self.reader.read_children(
+            self.start_offset(node), node.next_dir, node.end, node.depth, FETCH_BATCH)
+        if not lines:
+            return
+        first_row = len(node.children)
+        self.beginInsertRows(parent, first_row, first_row + len(lines) - 1)
+        for row, line in enumerate(lines, start=first_row):
+            node.children.append(ScanNode(line, node, row, node.depth + 1))
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        node = self.node(index)
+        if node is None:
+            return None
+        if role == Qt.DisplayRole:
+            return node.name
+        if role == Qt.DecorationRole:
+            return self.dir_icon if node.is_dir else self.file_icon
+        return None
+
+    def path_parts(self, index):
+        node = self.node(index)
+        parts = []
+        while node is not None:
+            parts.append(node.name)
+            node = node.parent
+        return list(reversed(parts))
+
+    def close(self):
+        self.reader.close()
@@ -0,0 +1,245 @@
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from resources.tools.folder_scanner.walker import TreeWalker
+from resources.tools.folder_scanner.scan_engine import default_output_folder
+from resources.tools.folder_scanner.scan_file import SCAN_FORMATS
+
+PROGRESS_EVERY = 256
+# FAT keeps mtimes to 2 s and some copy tools round them, so a copy whose
+# mtime is off by less than this still counts as unchanged
+MTIME_TOLERANCE = 2.0
+# Content checks split files into chunks that are compared in parallel
+CHUNK_SIZE = 64 * 1024 * 1024
+READ_BUFFER = 1024 * 1024
+COMPARE_WORKERS = min(8, os.cpu_count() or 2)
+
+MISSING = "missing"    # In the source, not in the copy
+EXTRA = "extra"        # In the copy, not in the source
+CHANGED = "changed"
+
+class KeyedEntry:
+    # A walker entry plus its position in the walker's pre-order. Both roots
+    # are walked in that same order, so their entries can be merged like two
+    # sorted lists without holding either tree in memory.
+    def __init__(self, entry, root_length):
+        self.entry = entry
+        self.relative = entry.path[root_length:]
+        parts = self.relative.split(os.sep)
+        # Within a folder, files come before subfolders, each sorted by name
+        self.key = tuple((1, part) for part in parts[:-1]) + ((1 if entry.is_dir else 0, parts[-1]),)
+        if os.sep != '/':
+            self.relative = self.relative.replace(os.sep, '/')
+
+class TreeSide:
+    def __init__(self, root_path, rules=None, max_depth=None):
+        self.walker = TreeWalker(root_path, with_stat=True, max_depth=max_depth, rules=rules)
+        self.iterator = iter(self.walker)
+        self.root = next(self.iterator)
+        self.root_length = self.walker.root_length
+        self.current = self.advance()
+
+    def advance(self):
+        entry = next(self.iterator, None)
+        self.current = KeyedEntry(entry, self.root_length) if entry is not None else None
+        return self.current
+
+    def skip_subtree(self, directory):
+        # Consumes everything below `directory`; returns (files, bytes)
+        files = size = 0
+        prefix = directory.key
+        while self.advance() is not None and self.current.key[:len(prefix)] == prefix:
+            if not self.current.entry.is_dir:
+                files += 1
+                size += self.current.entry.size
+        return files, size
+
+def side_info(entry):
+    return {"size": entry.size, "mtime": entry.mtime} if not entry.is_dir else {"mtime": entry.mtime}
+
+class ContentCheck:
+    # State shared by the chunks of one file; the first differing chunk sets
+    # `difference` and the remaining chunks return without reading
+    def __init__(self, difference_entry, source_path, copy_path, size):
+        self.difference = difference_entry
+        self.source_path = source_path
+        self.copy_path = copy_path
+        self.size = size
+        self.first_difference = None
+        self.lock = threading.Lock()
+
+    def chunks(self):
+        return [(self, offset, min(CHUNK_SIZE, self.size - offset)) for offset in range(0, self.size, CHUNK_SIZE)]
+
+def compare_chunk(check, offset, length):
+    if check.first_difference is not None:
+        return
+    with open(check.source_path, 'rb', buffering=0) as a, open(check.copy_path, 'rb', buffering=0) as b:
+        a.seek(offset)
+        b.seek(offset)
+        position = offset
+        end = offset + length
+        while position < end:
+            count = min(READ_BUFFER, end - position)
+            block_a, block_b = a.read(count), b.read(count)
+            if block_a != block_b:
+                mismatch = next((i for i, (x, y) in enumerate(zip(block_a, block_b)) if x != y),
+                                min(len(block_a), len(block_b)))
+                with check.lock:
+                    if check.first_difference is None or position + mismatch < check.first_difference:
+                        check.first_difference = position + mismatch
+                return
+            position += count
+            if check.first_difference is not None:
+                return  # Another chunk already found a difference
+
+def verify_contents(checks, progress=None, workers=COMPARE_WORKERS):
+    # Both copies are read locally anyway, so blocks are compared byte for
+    # byte; that is exact and cheaper than hashing each side
+    chunks = [chunk for check in checks for chunk in check.chunks()]
+    bytes_total = sum(length for _, _, length in chunks)
+    bytes_done = 0
+    window = workers * 2
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="compare")
+    try:
+        pending = []
+        chunk_iter = iter(chunks)
+        while True:
+            while len(pending) < window:
+                chunk = next(chunk_iter, None)
+                if chunk is None:
+                    break
+                pending.append((chunk, pool.submit(compare_chunk, *chunk)))
+            if not pending:
+                break
+            (check, _, length), future = pending.pop(0)
+            try:
+                future.result()
+            except OSError as e:
+                check.difference["reasons"] = ["unreadable"]
+                check.difference["error"] = e.strerror or str(e)
+                check.first_difference = -1
+            bytes_done += length
+            if progress:
+                progress(f"Verified {bytes_done // (1024 * 1024)} of {bytes_total // (1024 * 1024)} MB", None, None,
+                         bytes_done=bytes_done, bytes_total=bytes_total)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def compare_trees(source_root, copy_root, progress=None, verify=False, rules_for=None, max_depth=None,
+                  workers=COMPARE_WORKERS):
+    source = TreeSide(source_root, rules_for(source_root) if rules_for else None, max_depth)
+    copy = TreeSide(copy_root, rules_for(copy_root) if rules_for else None, max_depth)
+    differences, checks = [], []
+    compared = 0
+    while source.current is not None or copy.current is not None:
+        a, b = source.current, copy.current
+        if b is None or (a is not None and a.key < b.key):
+            difference = {"status": MISSING, "path": a.relative, "type": "dir" if a.entry.is_dir else "file",
+                          "source": side_info(a.entry)}
+            differences.append(difference)
+            if a.entry.is_dir:
+                # A missing folder is one line, not one per file inside it
+                difference["files"], difference["bytes"] = source.skip_subtree(a)
+            else:
+                source.advance()
+        elif a is None or b.key < a.key:
+            difference = {"status": EXTRA, "path": b.relative, "type": "dir" if b.entry.is_dir else "file",
+                          "copy": side_info(b.entry)}
+            differences.append(difference)
+            if b.entry.is_dir:
+                difference["files"], difference["bytes"] = copy.skip_subtree(b)
+            else:
+                copy.advance()
+        else:
+            if not a.entry.is_dir:
+                reasons = []
+                if a.entry.size != b.entry.size:
+                    reasons.append("size")
+                elif abs(a.entry.mtime - b.entry.mtime) >= MTIME_TOLERANCE and not verify:
+                    reasons.append("mtime")
+                difference = {"status": CHANGED, "path": a.relative, "type": "file", "reasons": reasons,
+                              "source": side_info(a.entry), "copy": side_info(b.entry)}
+                if reasons:
+                    differences.append(difference)
+                elif verify and a.entry.size:
+                    # Kept in place so the report stays in tree order; dropped
+                    # below if the contents match
+                    differences.append(difference)
+                    checks.append(ContentCheck(difference, a.entry.path, b.entry.path, a.entry.size))
+            source.advance()
+            copy.advance()
+        compared += 1
+        if progress and compared % PROGRESS_EVERY == 0:
+            progress(f"Compared {compared} entries", compared)
+
+    if checks:
+        verify_contents(checks, progress, workers)
+        for check in checks:
+            if check.first_difference is not None and check.first_difference >= 0:
+                check.difference["reasons"] = ["content"]
+                check.difference["offset"] = check.first_difference
+        differences = [difference for difference in differences
+                       if difference["status"] != CHANGED or difference["reasons"]]
+
+    summary = {status: sum(1 for difference in differences if difference["status"] == status)
+               for status in (MISSING, EXTRA, CHANGED)}
+    summary.update({"compared": compared, "verified": len(checks),
+                    "errors": len(source.walker.errors) + len(copy.walker.errors)})
+    return {"source": os.path.normpath(source_root), "copy": os.path.normpath(copy_root),
+            "summary": summary, "differences": differences}
+
+def describe(difference):
+    if difference["status"] == MISSING:
+        extra = f" ({difference['files']} files, {difference['bytes']:,} bytes)" if "files" in difference else ""
+        return f"- {difference['path']}{'/' if difference['type'] == 'dir' else ''}{extra}"
+    if difference["status"] == EXTRA:
+        extra = f" ({difference['files']} files, {difference['bytes']:,} bytes)" if "files" in difference else ""
+        return f"+ {difference['path']}{'/' if difference['type'] == 'dir' else ''}{extra}"
+    source, copy = difference["source"], difference["copy"]
+    reasons = []
+    for reason in difference["reasons"]:
+        if reason == "size":
+            reasons.append(f"size {source['size']:,} -> {copy['size']:,}")
+        elif reason == "mtime":
+            reasons.append(f"mtime {copy['mtime'] - source['mtime']:+.0f}s")
+        elif reason == "content":
+            reasons.append(f"content differs at byte {difference['offset']:,}")
+        else:
+            reasons.append(f"unreadable: {difference.get('error', '')}")
+    return f"~ {difference['path']} ({', '.join(reasons)})"
+
+def format_comparison(result):
+    summary = result["summary"]
+    lines = [f"Source: {result['source']}", f"Copy:   {result['copy']}",
+             f"{summary[MISSING]} missing, {summary[EXTRA]} extra, {summary[CHANGED]} changed "
+             f"({summary['compared']} entries compared, {summary['verified']} files verified by content)"]
+    if result["differences"]:
+        lines.append("")
+        lines.extend(describe(difference) for difference in result["differences"])
+    return '\n'.join(lines) + '\n'
+
+def write_comparison(result, output_file, output_format="text"):
+    # Same formats as scans: indented text, NDJSON (a summary line, then one
+    # line per difference) or one compact JSON document
+    with open(output_file + ".part", 'w', encoding='utf-8', errors='surrogateescape') as f:
+        if output_format == "text":
+            f.write(format_comparison(result))
+        elif output_format == "ndjson":
+            header = {key: result[key] for key in ("source", "copy", "summary")}
+            f.write(json.dumps(header) + "\n")
+            for difference in result["differences"]:
+                f.write(json.dumps(difference) + "\n")
+        elif output_format == "json":
+            f.write(json.dumps(result, separators=(",", ":")) + "\n")
+        else:
+            raise ValueError(f"Unknown scan format: {output_format}")
+    os.replace(output_file + ".part", output_file)
+    return output_file
+
+def comparison_output_file(source_root, output_folder=None, output_format="text"):
+    output_folder = output_folder or default_output_folder()
+    os.makedirs(output_folder, exist_ok=True)
+    scanned_folder_name = os.path.basename(os.path.normpath(source_root))
+    return os.path.join(output_folder, f"{scanned_folder_name}_compare{SCAN_FORMATS[output_format]}")
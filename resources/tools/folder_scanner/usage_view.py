@@ -0,0 +1,92 @@
+from datetime import datetime
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                               QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView,
+                               QAbstractItemView, QFileDialog)
+from PySide6.QtCore import Qt
+from resources.tools.folder_scanner.disk_usage import save_usage
+from resources.widgets.jobs_panel import format_bytes
+
+# (title, key in the usage dict, [(header, field, kind)])
+USAGE_TABLES = (
+    ("Folders", "directories", [("Folder", "path", "text"), ("Size", "size", "bytes"),
+                                ("Files", "files", "count"), ("Subfolders", "dirs", "count")]),
+    ("Largest Files", "largest_files", [("File", "path", "text"), ("Size", "size", "bytes"),
+                                        ("Modified", "mtime", "time")]),
+    ("Largest Folders", "largest_directories", [("Folder", "path", "text"), ("Size", "size", "bytes"),
+                                                ("Files", "files", "count")]),
+    ("Extensions", "extensions", [("Extension", "extension", "text"), ("Size", "size", "bytes"),
+                                  ("Files", "files", "count")]),
+    ("Age", "age", [("Modified", "bucket", "text"), ("Size", "size", "bytes"),
+                    ("Files", "files", "count")]),
+)
+
+class SortItem(QTableWidgetItem):
+    # Shows a formatted value but sorts by the raw number behind it
+    def __init__(self, text, sort_key):
+        super().__init__(text)
+        self.sort_key = sort_key
+        self.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+    def __lt__(self, other):
+        if isinstance(other, SortItem):
+            return self.sort_key < other.sort_key
+        return super().__lt__(other)
+
+def make_item(value, kind):
+    if kind == "bytes":
+        return SortItem(format_bytes(value), value)
+    if kind == "count":
+        return SortItem(f"{value:,}", value)
+    if kind == "time":
+        return SortItem(f"{datetime.fromtimestamp(value):%Y-%m-%d %H:%M}", value)
+    return QTableWidgetItem(str(value))
+
+def make_table(rows, columns):
+    table = QTableWidget(len(rows), len(columns))
+    table.setHorizontalHeaderLabels([header for header, _, _ in columns])
+    table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    table.setSelectionBehavior(QAbstractItemView.SelectRows)
+    table.verticalHeader().setVisible(False)
+    # Fill before enabling sorting, otherwise rows reshuffle mid-insert
+    for row, values in enumerate(rows):
+        for column, (_, field, kind) in enumerate(columns):
+            table.setItem(row, column, make_item(values[field], kind))
+    table.setSortingEnabled(True)
+    table.sortItems(1, Qt.DescendingOrder)
+    table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+    return table
+
+def show_usage_result(parent, usage, output_file):
+    dialog = QDialog(parent)
+    dialog.setWindowTitle("Disk Usage")
+    dialog.resize(700, 550)
+    layout = QVBoxLayout(dialog)
+
+    summary = (f"{usage['root']}: {format_bytes(usage['total_size'])} in "
+               f"{usage['total_files']:,} files and {usage['total_dirs']:,} folders")
+    if usage.get("errors"):
+        summary += f" ({usage['errors']} folders could not be read)"
+    layout.addWidget(QLabel(summary))
+
+    tabs = QTabWidget()
+    for title, key, columns in USAGE_TABLES:
+        tabs.addTab(make_table(usage[key], columns), title)
+    layout.addWidget(tabs)
+
+    button_layout = QHBoxLayout()
+
+    export_button = QPushButton("Export JSON")
+    export_button.clicked.connect(lambda: export_usage(dialog, usage, output_file))
+    button_layout.addWidget(export_button)
+
+    close_button = QPushButton("Close")
+    close_button.clicked.connect(dialog.accept)
+    button_layout.addWidget(close_button)
+
+    layout.addLayout(button_layout)
+    dialog.exec_()
+
+def export_usage(parent, usage, output_file):
+    file_path, _ = QFileDialog.getSaveFileName(parent, "Export Disk Usage", output_file, "JSON Files (*.json)")
+    if file_path:
+        save_usage(usage, file_path)
@@ -0,0 +1,118 @@
+import os
+import itertools
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Listing a directory is mostly waiting on the filesystem (and the GIL is
+# released meanwhile), so more threads than cores pays off, especially on
+# network shares
+WALK_WORKERS = min(32, (os.cpu_count() or 2) * 4)
+
+# device is only known for entries stat'ed by the walker; catalog and
+# watcher entries leave it out
+ScanEntry = namedtuple("ScanEntry", ["path", "name", "depth", "is_dir", "size", "mtime", "inode", "device"],
+                       defaults=(None,))
+
+def make_entry(dir_entry, depth, with_stat):
+    is_dir = dir_entry.is_dir(follow_symlinks=False)
+    if not with_stat:
+        return ScanEntry(dir_entry.path, dir_entry.name, depth, is_dir, None, None, None)
+    stat = dir_entry.stat(follow_symlinks=False)
+    return ScanEntry(dir_entry.path, dir_entry.name, depth, is_dir,
+                     0 if is_dir else stat.st_size, stat.st_mtime, stat.st_ino, stat.st_dev)
+
+def root_entry(root_path, with_stat=False):
+    root_path = os.path.normpath(root_path)
+    name = os.path.basename(root_path) or root_path
+    if not with_stat:
+        return ScanEntry(root_path, name, 0, True, None, None, None)
+    stat = os.stat(root_path)
+    return ScanEntry(root_path, name, 0, True, 0, stat.st_mtime, stat.st_ino, stat.st_dev)
+
+def list_directory(directory, with_stat=False, keep=None):
+    # Returns (subdirectories, files) of a directory entry, sorted by name
+    # so scans of the same tree always come out in the same order. `keep`
+    # filters by path before anything is stat'ed.
+    dirs, files = [], []
+    depth = directory.depth + 1
+    with os.scandir(directory.path) as iterator:
+        for dir_entry in iterator:
+            try:
+                if keep is not None and not keep(dir_entry.path, dir_entry.is_dir(follow_symlinks=False)):
+                    continue
+                entry = make_entry(dir_entry, depth, with_stat)
+            except OSError:
+                continue  # Vanished or unreadable between listing and stat
+            (dirs if entry.is_dir else files).append(entry)
+    dirs.sort(key=lambda entry: entry.name)
+    files.sort(key=lambda entry: entry.name)
+    return dirs, files
+
+class TreeWalker:
+    # Yields ScanEntry tuples in the same pre-order as the text scan: a
+    # directory, then its files, then each subdirectory in turn. Listings
+    # run on a thread pool ahead of the consumer; at most `prefetch` of
+    # them are held in memory at once. Entries rejected by `rules` (see
+    # ignore_rules.ScanRules) are skipped, and excluded folders never listed.
+    def __init__(self, root_path, workers=WALK_WORKERS, max_depth=None, with_stat=False, prefetch=None,
+                 rules=None):
+        self.root = root_entry(root_path, with_stat)
+        self.root_length = len(self.root.path.rstrip(os.sep)) + 1
+        self.rules = rules
+        self.workers = workers
+        self.max_depth = max_depth
+        self.with_stat = with_stat
+        self.prefetch_limit = prefetch or workers * 4
+        self.errors = []
+        self.dirs_listed = 0
+        self.files_seen = 0
+
+    def should_descend(self, entry):
+        return self.max_depth is None or entry.depth < self.max_depth
+
+    def keep(self, path, is_dir):
+        relative = path[self.root_length:]
+        if os.sep != '/':
+            relative = relative.replace(os.sep, '/')
+        return self.rules.keep(relative, is_dir)
+
+    def list(self, directory):
+        return list_directory(directory, self.with_stat, self.keep if self.rules else None)
+
+    def __iter__(self):
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scan")
+        pending = {}
+        stack = [self.root]
+        try:
+            while stack:
+                directory = stack.pop()
+                yield directory
+                if not self.should_descend(directory):
+                    continue
+                future = pending.pop(directory.path, None)
+                if future is None:
+                    future = pool.submit(self.list, directory)
+                try:
+                    dirs, files = future.result()
+                except OSError as e:
+                    self.errors.append((directory.path, e.strerror or str(e)))
+                    continue
+                self.dirs_listed += 1
+                self.files_seen += len(files)
+                stack.extend(reversed(dirs))
+                self.prefetch(pool, pending, stack)
+                yield from files
+        finally:
+            # Stop promptly when the consumer gives up (e.g. a cancelled job)
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def prefetch(self, pool, pending, stack):
+        # The top of the stack is consumed next, so list from there down
+        for directory in itertools.islice(reversed(stack), self.prefetch_limit):
+            if len(pending) >= self.prefetch_limit:
+                break
+            if directory.path not in pending and self.should_descend(directory):
+                pending[directory.path] = pool.submit(self.list, directory)
+
+def walk_tree(root_path, **kwargs):
+    return iter(TreeWalker(root_path, **kwargs))
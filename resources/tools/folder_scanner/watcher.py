@@ -0,0 +1,430 @@
+import os
+import json
+import time
+import stat
+import queue
+import threading
+from resources.tools.folder_scanner.walker import TreeWalker, ScanEntry, list_directory
+from resources.tools.folder_scanner.scan_file import open_scan_writer, index_path_for
+
+try:
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+# With inotify the loop just waits on the event queue; this only bounds how
+# long a stop request takes to be noticed
+EVENT_WAIT = 1.0
+# Events arriving this close together are applied as one batch
+BATCH_WINDOW = 0.5
+POLL_INTERVAL = 5.0
+# The snapshot file is rewritten from memory once changes have stopped for
+# WRITE_INTERVAL. While they keep coming the wait doubles with each
+# rewrite, up to MAX_WRITE_INTERVAL, and is never less than WRITE_COST
+# times what the last rewrite took, so a busy folder in a big tree isn't
+# written out in full every couple of seconds; the changes log has
+# everything in between.
+WRITE_INTERVAL = 2.0
+MAX_WRITE_INTERVAL = 60.0
+WRITE_COST = 10
+# Polling only sees a new file when its folder changes; files that are
+# still being written are re-stat'ed until they stop changing for this long
+SETTLE_TIME = 60.0
+
+class LiveNode:
+    # One entry of the in-memory tree; slots keep a million-entry tree small
+    __slots__ = ("name", "is_dir", "size", "mtime", "inode", "children")
+
+    def __init__(self, name, is_dir, size, mtime, inode):
+        self.name = name
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+        self.inode = inode
+        self.children = {} if is_dir else None
+
+def node_from_entry(entry):
+    return LiveNode(entry.name, entry.is_dir, entry.size, entry.mtime, entry.inode)
+
+def node_from_stat(name, st):
+    is_dir = stat.S_ISDIR(st.st_mode)
+    return LiveNode(name, is_dir, 0 if is_dir else st.st_size, st.st_mtime, st.st_ino)
+
+class LiveTree:
+    # The scanned tree held in memory and patched one path at a time, so a
+    # change costs a stat (or one folder listing), never a re-walk
+    def __init__(self, root_path, rules=None, max_depth=None):
+        # Absolute, like the event paths and the ignored outputs it's
+        # compared with; the CLI passes the root as typed
+        self.root_path = os.path.normpath(os.path.abspath(root_path))
+        self.rules = rules
+        self.max_depth = max_depth
+        self.root = None
+        # The watch's own output files, if they live inside the tree
+        self.ignored = set()
+
+    def load(self, progress=None):
+        walker = TreeWalker(self.root_path, with_stat=True, max_depth=self.max_depth, rules=self.rules)
+        stack = []
+        for count, entry in enumerate(walker, start=1):
+            node = node_from_entry(entry)
+            del stack[entry.depth:]
+            if stack:
+                stack[-1].children[entry.name] = node
+            else:
+                self.root = node
+            if entry.is_dir:
+                stack.append(node)
+            if progress and count % 256 == 0:
+                progress(f"Scanned {count} entries", count)
+        return self.root
+
+    def parts_of(self, path):
+        # Path components below the root, or None for paths outside it
+        path = os.path.normpath(path)
+        if path == self.root_path:
+            return []
+        prefix = self.root_path.rstrip(os.sep) + os.sep
+        if not path.startswith(prefix):
+            return None
+        return path[len(prefix):].split(os.sep)
+
+    def find(self, parts):
+        node = self.root
+        for name in parts:
+            if node is None or not node.is_dir:
+                return None
+            node = node.children.get(name)
+        return node
+
+    def keep(self, parts, is_dir):
+        if self.max_depth is not None and len(parts) > self.max_depth:
+            return False
+        return self.rules is None or self.rules.keep('/'.join(parts), is_dir)
+
+    def keep_path(self, path, is_dir):
+        return self.keep(self.parts_of(path), is_dir)
+
+    def fill(self, node, path, depth):
+        # Lists a newly appeared folder (and its subfolders) into the tree
+        stack = [(node, path, depth)]
+        while stack:
+            node, path, depth = stack.pop()
+            if self.max_depth is not None and depth >= self.max_depth:
+                continue
+            try:
+                dirs, files = list_directory(ScanEntry(path, node.name, depth, True, 0, node.mtime, node.inode),
+                                             True, self.keep_path)
+            except OSError:
+                continue
+            for entry in files + dirs:
+                child = node_from_entry(entry)
+                node.children[entry.name] = child
+                if entry.is_dir:
+                    stack.append((child, entry.path, depth + 1))
+
+    def refresh(self, path):
+        # Brings one path in line with the disk; returns the changes made
+        parts = self.parts_of(path)
+        if parts is None or os.path.normpath(os.path.abspath(path)) in self.ignored:
+            return []
+        if not parts:
+            self.root.mtime = os.stat(self.root_path).st_mtime
+            return []
+        parent = self.find(parts[:-1])
+        if parent is None or not parent.is_dir:
+            return []  # Inside an excluded or not yet known folder
+        name = parts[-1]
+        relative = '/'.join(parts)
+        existing = parent.children.get(name)
+        try:
+            st = os.lstat(path)
+        except OSError:
+            st = None
+        if st is None or not self.keep(parts, stat.S_ISDIR(st.st_mode)):
+            if existing is None:
+                return []
+            del parent.children[name]
+            return [("removed", relative, existing)]
+        node = node_from_stat(name, st)
+        if existing is not None and existing.is_dir == node.is_dir:
+            if node.is_dir:
+                existing.mtime = node.mtime
+                return []
+            if (existing.size, existing.mtime) == (node.size, node.mtime):
+                return []
+            existing.size, existing.mtime, existing.inode = node.size, node.mtime, node.inode
+            return [("modified", relative, existing)]
+        changes = [("removed", relative, existing)] if existing is not None else []
+        if node.is_dir:
+            self.fill(node, path, len(parts))
+        parent.children[name] = node
+        return changes + [("added", relative, node)]
+
+    def move(self, source, destination):
+        # A rename inside the tree relinks the existing subtree instead of
+        # listing it again
+        source_parts, destination_parts = self.parts_of(source), self.parts_of(destination)
+        node = self.find(source_parts) if source_parts else None
+        destination_parent = self.find(destination_parts[:-1]) if destination_parts else None
+        if (node is None or destination_parent is None or not destination_parent.is_dir
+                or not self.keep(destination_parts, node.is_dir)):
+            return self.refresh(source) + self.refresh(destination)
+        del self.find(source_parts[:-1]).children[source_parts[-1]]
+        changes = []
+        replaced = destination_parent.children.get(destination_parts[-1])
+        if replaced is not None:
+            changes.append(("removed", '/'.join(destination_parts), replaced))
+        node.name = destination_parts[-1]
+        destination_parent.children[node.name] = node
+        changes.append(("moved", '/'.join(source_parts), node, '/'.join(destination_parts)))
+        return changes
+
+    def directories(self):
+        stack = [(self.root, self.root_path)]
+        while stack:
+            node, path = stack.pop()
+            yield node, path
+            for child in node.children.values():
+                if child.is_dir:
+                    stack.append((child, os.path.join(path, child.name)))
+
+    def poll(self):
+        # Fallback when there are no change notifications: a folder's mtime
+        # changes whenever an entry in it is added, removed or renamed, so
+        # only folders whose mtime moved are listed again
+        # Collect first: refreshing a parent updates its subfolders' mtimes
+        changed = []
+        for node, path in self.directories():
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue  # The parent's listing will notice it is gone
+            if mtime != node.mtime:
+                node.mtime = mtime
+                changed.append((node, path))
+        changes = []
+        for node, path in changed:
+            try:
+                names = set(os.listdir(path))
+            except OSError:
+                continue
+            for name in sorted(names | set(node.children)):
+                changes += self.refresh(os.path.join(path, name))
+        return changes
+
+    def entries(self):
+        # Pre-order ScanEntry tuples in the walker's order, for the writers
+        stack = [(self.root, self.root_path, 0)]
+        while stack:
+            node, path, depth = stack.pop()
+            yield ScanEntry(path, node.name, depth, node.is_dir, node.size, node.mtime, node.inode)
+            children = sorted(node.children.items())
+            for name, child in children:
+                if not child.is_dir:
+                    yield ScanEntry(os.path.join(path, name), name, depth + 1, False,
+                                    child.size, child.mtime, child.inode)
+            stack.extend((child, os.path.join(path, name), depth + 1)
+                         for name, child in reversed(children) if child.is_dir)
+
+def changes_file_for(output_file):
+    return os.path.splitext(output_file)[0] + "_changes.ndjson"
+
+def change_record(change):
+    action, relative, node = change[:3]
+    record = {"time": round(time.time(), 3), "event": action, "path": relative,
+              "type": "dir" if node.is_dir else "file"}
+    if len(change) > 3:
+        record["to"] = change[3]
+    if action != "removed":
+        if not node.is_dir:
+            record["size"] = node.size
+        record["mtime"] = node.mtime
+    return record
+
+def observer_alive(observer):
+    # The observer thread only dispatches. The watching is done by an
+    # emitter thread per watch and, for inotify, a reader thread behind it;
+    # either can die (e.g. watch limit hit on a new folder) while the
+    # observer itself carries on.
+    if not observer.is_alive():
+        return False
+    for emitter in observer.emitters:
+        if not emitter.is_alive():
+            return False
+        reader = getattr(emitter, "_inotify", None)
+        if isinstance(reader, threading.Thread) and not reader.is_alive():
+            return False
+    return True
+
+class EventQueue:
+    # watchdog event handler that only hands events to the watch loop
+    def __init__(self):
+        self.events = queue.Queue()
+
+    def dispatch(self, event):
+        self.events.put(event)
+
+class ScanWatch:
+    # Keeps a scan output file live: one walk up front, then changes from
+    # inotify (or the platform's equivalent via watchdog) are applied to the
+    # in-memory tree, appended to a changes log and, debounced, written
+    # back to the output file. Without watchdog, or when the system runs out
+    # of inotify watches, it polls folder mtimes instead.
+    def __init__(self, root_path, output_file, output_format="text", rules=None, max_depth=None,
+                 poll_interval=POLL_INTERVAL, use_polling=False):
+        self.tree = LiveTree(root_path, rules, max_depth)
+        self.output_file = output_file
+        self.output_format = output_format
+        self.changes_file = changes_file_for(output_file)
+        # Rewriting the output must not show up as a change in the tree
+        self.tree.ignored = {os.path.normpath(os.path.abspath(path)) for path in
+                             (output_file, output_file + ".part", index_path_for(output_file),
+                              index_path_for(output_file) + ".part", self.changes_file)}
+        self.poll_interval = poll_interval
+        self.use_polling = use_polling or Observer is None
+        self.mode = None
+        self.change_count = 0
+        self.dirty = False
+        self.last_written = 0.0
+        self.write_interval = WRITE_INTERVAL
+        self.write_time = 0.0
+        self.last_change = 0.0
+        self.settling = {}
+
+    def write_snapshot(self):
+        started = time.monotonic()
+        try:
+            with open_scan_writer(self.output_format, self.output_file, self.tree.root_path) as writer:
+                for entry in self.tree.entries():
+                    writer.add(entry)
+        except PermissionError:
+            return  # Open in another program on Windows; try again next time
+        self.dirty = False
+        self.last_written = time.monotonic()
+        self.write_time = self.last_written - started
+
+    def start_observer(self):
+        if self.use_polling:
+            return None
+        handler = EventQueue()
+        observer = Observer()
+        try:
+            observer.schedule(handler, self.tree.root_path, recursive=True)
+            observer.start()
+        except OSError:
+            # ENOSPC/EMFILE: out of inotify watches or instances
+            return None
+        self.handler = handler
+        return observer
+
+    def stop_observer(self, observer):
+        observer.stop()
+        observer.join()
+
+    def next_batch(self):
+        try:
+            events = [self.handler.events.get(timeout=EVENT_WAIT)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + BATCH_WINDOW
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                events.append(self.handler.events.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return events
+
+    def apply_events(self, events):
+        # Paths touched several times in a batch are only re-stat'ed once
+        changes, touched = [], {}
+        for event in events:
+            if event.event_type in ("opened", "closed_no_write"):
+                continue
+            if event.event_type == "moved":
+                changes += self.tree.move(event.src_path, event.dest_path)
+                touched.pop(event.src_path, None)
+            else:
+                touched[event.src_path] = True
+        for path in touched:
+            changes += self.tree.refresh(path)
+        return changes
+
+    def wait(self, seconds, stop):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if stop and stop():
+                return
+            time.sleep(min(EVENT_WAIT, max(0, deadline - time.monotonic())))
+
+    def settle(self, changes):
+        # Polling mode only: re-stat files that were just added or changed
+        now = time.monotonic()
+        for change in changes:
+            if change[0] in ("added", "modified") and not change[2].is_dir:
+                self.settling[os.path.join(self.tree.root_path, *change[1].split('/'))] = now
+        updates = []
+        for path, since in list(self.settling.items()):
+            refreshed = self.tree.refresh(path)
+            if refreshed:
+                self.settling[path] = now
+                updates += refreshed
+            elif now - since >= SETTLE_TIME:
+                del self.settling[path]
+        return updates
+
+    def record(self, changes):
+        with open(self.changes_file, "a", encoding="utf-8") as f:
+            for change in changes:
+                f.write(json.dumps(change_record(change)) + "\n")
+        self.change_count += len(changes)
+        self.dirty = True
+        self.last_change = time.monotonic()
+
+    def write_if_due(self):
+        now = time.monotonic()
+        if not self.dirty or now - self.last_written < self.write_time * WRITE_COST:
+            return
+        if now - self.last_change >= WRITE_INTERVAL:
+            self.write_snapshot()
+            self.write_interval = WRITE_INTERVAL
+        elif now - self.last_written >= self.write_interval:
+            self.write_snapshot()
+            self.write_interval = min(self.write_interval * 2, MAX_WRITE_INTERVAL)
+
+    def run(self, progress=None, stop=None):
+        self.tree.load(progress)
+        self.write_snapshot()
+        observer = self.start_observer()
+        self.mode = "inotify" if observer is not None else "polling"
+        if progress:
+            progress(f"Watching {self.tree.root_path} ({self.mode})", 0)
+        try:
+            while not (stop and stop()):
+                if observer is not None and not observer_alive(observer):
+                    # Polling compares against the tree, so it also picks up
+                    # whatever changed while the emitter was dead
+                    self.stop_observer(observer)
+                    observer = None
+                    self.mode = "polling"
+                if observer is not None:
+                    changes = self.apply_events(self.next_batch())
+                else:
+                    self.wait(self.poll_interval, stop)
+                    changes = self.tree.poll()
+                    changes += self.settle(changes)
+                if changes:
+                    self.record(changes)
+                    if progress:
+                        progress(f"Watching {self.tree.root_path} ({self.mode}): {self.change_count} changes",
+                                 self.change_count)
+                self.write_if_due()
+        finally:
+            if observer is not None:
+                self.stop_observer(observer)
+            if self.dirty:
+                self.write_snapshot()
+        return self.output_file
@@ -6,7 +6,7 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, Q
                                QRadioButton, QButtonGroup, QDialogButtonBox, QScrollArea,
                                QComboBox, QSpinBox, QDoubleSpinBox, QGroupBox)
 from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QFont, QFontDatabase
+from resources.services.asset_cache import get_asset_cache
 
 class FoodInputDialog(QDialog):
     def __init__(self, parent=None):
@@ -88,13 +88,8 @@ class MacroCalculator(QWidget):
         layout = QVBoxLayout(self)
         layout.setSpacing(20)
 
-        # Set Orbitron font
-        font_id = QFontDatabase.addApplicationFont(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "font", "Orbitron", "Orbitron-VariableFont_wght.ttf"))
-        if font_id != -1:
-            font_family = QFontDatabase.applicationFontFamilies(font_id)[0]
-        else:
-            font_family = "Arial"
-        self.setFont(QFont(font_family, 10))
+        # Set Orbitron font (already registered by the shared asset cache)
+        self.setFont(get_asset_cache().font(10))
 
         # BMR Calculator
         bmr_group = QGroupBox("BMR Calculator")
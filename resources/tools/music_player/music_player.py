@@ -1,12 +1,12 @@
 import os
 import sys
 import random
-import json
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                                QListWidget, QLabel, QFileDialog, QMessageBox, QListWidgetItem)
 from PySide6.QtCore import Qt, QUrl, QDir, Signal
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PySide6.QtCore import QSettings
+from resources.services.settings_store import get_settings
 
 class SongWidget(QWidget):
     play_requested = Signal(str)
@@ -88,12 +88,7 @@ class MusicPlayer(QWidget):
         layout.addWidget(self.now_playing_label)
 
     def check_first_launch(self):
-        settings_path = os.path.join(self.user_folder, "settings.json")
-        settings = {}
-        if os.path.exists(settings_path):
-            with open(settings_path, "r") as f:
-                settings = json.load(f)
-        
+        settings = get_settings()
         if not settings.get("music_player_first_launch", True):
             return
 
@@ -104,9 +99,7 @@ class MusicPlayer(QWidget):
                 "Enjoy your tunes!")
         QMessageBox.information(self, "Music Player - First Launch", message)
         
-        settings["music_player_first_launch"] = False
-        with open(settings_path, "w") as f:
-            json.dump(settings, f)
+        settings.set("music_player_first_launch", False)
 
     def refresh_playlists(self):
         playlists_dir = os.path.join(QDir.homePath(), "Music", "playlists")
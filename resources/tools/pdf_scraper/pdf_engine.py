@@ -0,0 +1,46 @@
+import os
+import fitz
+
+IMG_SUBFOLDER = "img"
+
+def default_output_folder():
+    return os.path.join(os.path.expanduser("~/Documents"), "PDFScraper")
+
+def convert_pdf_to_images(pdf_path, img_output_folder, progress=None):
+    pdf = fitz.open(pdf_path)
+    image_paths = []
+    page_count = len(pdf)
+    for page_num in range(page_count):
+        page = pdf[page_num]
+        zoom = 2
+        mat = fitz.Matrix(zoom, zoom)
+        pix = page.get_pixmap(matrix=mat)
+        image_filename = f"slide_{page_num + 1}.png"
+        image_path = os.path.join(img_output_folder, image_filename)
+        pix.save(image_path)
+        image_paths.append(image_path)
+        if progress:
+            progress(f"Converted page {page_num + 1} to image", page_num + 1, page_count)
+    pdf.close()
+    return image_paths
+
+def create_markdown_file(image_paths, output_folder, img_subfolder, progress=None):
+    md_filename = "slides.md"
+    md_filepath = os.path.join(output_folder, md_filename)
+    with open(md_filepath, 'w') as md_file:
+        md_file.write('# Slides\n\n')
+        for image_path in image_paths:
+            image_filename = os.path.basename(image_path)
+            md_file.write(f"![]({img_subfolder}/{image_filename})\n\n")
+    if progress:
+        progress(f"Markdown file created: {md_filepath}")
+    return md_filepath
+
+def scrape_pdf(pdf_path, output_folder=None, progress=None):
+    output_folder = output_folder or default_output_folder()
+    img_output_folder = os.path.join(output_folder, IMG_SUBFOLDER)
+    os.makedirs(img_output_folder, exist_ok=True)
+
+    image_paths = convert_pdf_to_images(pdf_path, img_output_folder, progress)
+    create_markdown_file(image_paths, output_folder, IMG_SUBFOLDER, progress)
+    return output_folder
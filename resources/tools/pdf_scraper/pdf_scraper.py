@@ -1,69 +1,21 @@
-import fitz
 import os
 import sys
 import subprocess
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
                                QLabel, QLineEdit, QMessageBox, QFileDialog, QProgressBar)
-from PySide6.QtCore import Signal, QThread
-
-class PDFScraperThread(QThread):
-    update_progress = Signal(str)
-    scraping_complete = Signal(str)
-    scraping_failed = Signal(str)
-
-    def __init__(self, pdf_path):
-        super().__init__()
-        self.pdf_path = pdf_path
-
-    def run(self):
-        try:
-            documents_path = os.path.expanduser("~/Documents")
-            output_folder = os.path.join(documents_path, "PDFScraper")
-            img_subfolder = "img"
-            img_output_folder = os.path.join(output_folder, img_subfolder)
-            
-            if not os.path.exists(img_output_folder):
-                os.makedirs(img_output_folder)
-
-            image_paths = self.convert_pdf_to_images(self.pdf_path, img_output_folder)
-            self.create_markdown_file(image_paths, output_folder, img_subfolder)
-
-            self.scraping_complete.emit(output_folder)
-        except Exception as e:
-            self.scraping_failed.emit(str(e))
-
-    def convert_pdf_to_images(self, pdf_path, img_output_folder):
-        pdf = fitz.open(pdf_path)
-        image_paths = []
-        for page_num in range(len(pdf)):
-            page = pdf[page_num]
-            zoom = 2
-            mat = fitz.Matrix(zoom, zoom)
-            pix = page.get_pixmap(matrix=mat)
-            image_filename = f"slide_{page_num + 1}.png"
-            image_path = os.path.join(img_output_folder, image_filename)
-            pix.save(image_path)
-            image_paths.append(image_path)
-            self.update_progress.emit(f"Converted page {page_num + 1} to image")
-        pdf.close()
-        return image_paths
-
-    def create_markdown_file(self, image_paths, output_folder, img_subfolder):
-        md_filename = "slides.md"
-        md_filepath = os.path.join(output_folder, md_filename)
-        with open(md_filepath, 'w') as md_file:
-            md_file.write('# Slides\n\n')
-            for image_path in image_paths:
-                image_filename = os.path.basename(image_path)
-                md_file.write(f"![]({img_subfolder}/{image_filename})\n\n")
-        self.update_progress.emit(f"Markdown file created: {md_filepath}")
+from PySide6.QtCore import Qt
+from resources.tools.pdf_scraper.pdf_engine import scrape_pdf, default_output_folder
+from resources.services.job_scheduler import get_job_scheduler, CPU, DONE, FAILED, CANCELLED
+from resources.widgets.jobs_panel import get_job_events
 
 class PDFScraperDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("PDF Scraper")
         self.setMinimumWidth(400)
+        self.job = None
         self.setup_ui()
+        get_job_events().job_event.connect(self.on_job_event)
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -111,11 +63,24 @@ class PDFScraperDialog(QDialog):
         self.progress_bar.setVisible(True)
         self.progress_label.setText("Starting PDF scraping...")
 
-        self.scraper_thread = PDFScraperThread(pdf_path)
-        self.scraper_thread.update_progress.connect(self.update_progress_label)
-        self.scraper_thread.scraping_complete.connect(self.scraping_complete)
-        self.scraper_thread.scraping_failed.connect(self.scraping_failed)
-        self.scraper_thread.start()
+        self.job = get_job_scheduler().submit(
+            f"Scrape {os.path.basename(pdf_path)}",
+            lambda context: scrape_pdf(pdf_path, progress=context.progress),
+            kind=CPU)
+
+    def on_job_event(self, event):
+        if self.job is None or event["job"] != self.job.id:
+            return
+        if event["state"] == DONE:
+            self.scraping_complete(event["result"])
+        elif event["state"] == FAILED:
+            self.scraping_failed(event["error"])
+        elif event["state"] == CANCELLED:
+            self.progress_bar.setVisible(False)
+            self.scrape_button.setEnabled(True)
+            self.progress_label.setText("PDF scraping cancelled")
+        elif event["message"]:
+            self.update_progress_label(event["message"])
 
     def update_progress_label(self, message):
         self.progress_label.setText(message)
@@ -136,7 +101,7 @@ class PDFScraperDialog(QDialog):
         QMessageBox.critical(self, "Error", f"An error occurred: {error_message}")
 
     def view_output_folder(self):
-        output_folder = os.path.expanduser("~/Documents/PDFScraper")
+        output_folder = default_output_folder()
         if sys.platform == 'win32':
             os.startfile(output_folder)
         elif sys.platform == 'darwin':
@@ -146,4 +111,5 @@ class PDFScraperDialog(QDialog):
 
 def show_pdf_scraper_dialog(parent):
     dialog = PDFScraperDialog(parent)
+    dialog.setAttribute(Qt.WA_DeleteOnClose)
     dialog.exec()
\ No newline at end of file
@@ -10,6 +10,7 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QListWidget, Q
                                QComboBox, QListView)
 from PySide6.QtGui import QIcon, QPixmap, QDesktopServices, QFont
 from PySide6.QtCore import Qt, Signal, QSettings, QDate, QUrl, QSize
+from resources.services.settings_store import get_settings
 
 class ContactListItem(QWidget):
     def __init__(self, contact, parent=None):
@@ -122,44 +123,21 @@ class Contact:
             os.makedirs(os.path.join(self.folder_path, folder), exist_ok=True)
 
 class SocialBlackbook(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, social_folder=None):
         super().__init__(parent)
         self.setWindowTitle("Social Blackbook")
         self.contacts = {}
-        self.social_folder = self.get_social_folder()
+        self.social_folder = social_folder or self.get_social_folder()
         self.setup_ui()
         self.load_contacts()
 
     def get_social_folder(self):
-        # Get the path to the main user folder
-        user_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "user")
-        settings_path = os.path.join(user_folder, "settings.json")
-
-        # Ensure the user folder exists
-        os.makedirs(user_folder, exist_ok=True)
-
-        # If settings file doesn't exist, create it with default values
-        if not os.path.exists(settings_path):
-            default_settings = {
-                "user_name": "Cassius",
-                "music_player_first_launch": False,
-                "volume": 100,
-                "social_folder": ""
-            }
-            with open(settings_path, 'w') as f:
-                json.dump(default_settings, f, indent=4)
-
-        # Load existing settings
-        with open(settings_path, 'r') as f:
-            existing_settings = json.load(f)
-
-        social_folder = existing_settings.get("social_folder")
+        settings = get_settings()
+        social_folder = settings.get("social_folder")
         if not social_folder:
             social_folder = QFileDialog.getExistingDirectory(self, "Select Social Folder")
             if social_folder:
-                existing_settings["social_folder"] = social_folder
-                with open(settings_path, 'w') as f:
-                    json.dump(existing_settings, f, indent=4)
+                settings.set("social_folder", social_folder)
             else:
                 QMessageBox.critical(self, "Error", "No folder selected. The Social Blackbook will not function correctly.")
                 return None
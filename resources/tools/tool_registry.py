@@ -0,0 +1,50 @@
+import importlib
+from collections import namedtuple
+
+# Lightweight description of a tool. Nothing here imports the tool itself,
+# so building the menu costs nothing; the module is loaded on first use.
+ToolManifest = namedtuple("ToolManifest", ["key", "name", "module", "entry", "kind"])
+
+SCREEN = "screen"
+DIALOG = "dialog"
+
+TOOL_MANIFESTS = (
+    ToolManifest("notebook", "Notebook", "screens.notebook", "NotebookScreen", SCREEN),
+    ToolManifest("rss_updates", "RSS Updates", "screens.rss_updates", "RSSUpdatesScreen", SCREEN),
+    ToolManifest("social_blackbook", "Social Blackbook",
+                 "resources.tools.social_blackbook.social_blackbook", "show_social_blackbook", SCREEN),
+    ToolManifest("youtube_downloader", "YouTube Downloader",
+                 "resources.tools.ytdl.ytdl", "show_youtube_downloader", DIALOG),
+    ToolManifest("folder_scanner", "Folder Scanner",
+                 "resources.tools.folder_scanner.folder_scanner", "show_folder_scanner_dialog", DIALOG),
+    ToolManifest("video_format_converter", "Video Format Converter",
+                 "resources.tools.video_format_converter.video_format_converter", "show_video_format_converter", DIALOG),
+    ToolManifest("video_thumbnails", "Video Thumbnails",
+                 "resources.tools.video_thumbnails.video_thumbnails", "show_video_thumbnails", DIALOG),
+    ToolManifest("folder_encryptor", "Folder Encryptor",
+                 "resources.tools.folder_encryptor.folder_encryptor", "show_folder_encryptor_dialog", DIALOG),
+    ToolManifest("pdf_scraper", "PDF Scraper",
+                 "resources.tools.pdf_scraper.pdf_scraper", "show_pdf_scraper_dialog", DIALOG),
+    ToolManifest("music_player", "Music Player",
+                 "resources.tools.music_player.music_player", "show_music_player", SCREEN),
+    ToolManifest("macro_calculator", "Macro Calculator",
+                 "resources.tools.macro_calculator.macro_calculator", "show_macro_calculator", SCREEN),
+)
+
+_manifests_by_key = {manifest.key: manifest for manifest in TOOL_MANIFESTS}
+_entry_cache = {}
+
+def get_manifest(key):
+    return _manifests_by_key[key]
+
+def load_tool_entry(key):
+    entry = _entry_cache.get(key)
+    if entry is None:
+        manifest = get_manifest(key)
+        module = importlib.import_module(manifest.module)
+        entry = getattr(module, manifest.entry)
+        _entry_cache[key] = entry
+    return entry
+
+def is_tool_loaded(key):
+    return key in _entry_cache
@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import threading
+from resources.tools.video_format_converter.conversion_engine import run_ffmpeg, main_video
+from resources.tools.video_format_converter.stream_plan import (probe_media, plan_streams, stream_options,
+                                                                pick_encoder, ENCODERS, TRANSCODE)
+from resources.tools.video_format_converter.presets import PRESETS, encoder_options, preset_threads
+
+RESOURCE_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CALIBRATION_FILE = os.path.join(RESOURCE_PATH, "user", "encoder_calibration.json")
+
+CORES = os.cpu_count() or 2
+# A few seconds of synthetic 720p per preset. testsrc2 alone compresses far
+# more easily than camera footage; the moving noise brings it closer.
+CALIBRATION_SECONDS = 3
+CALIBRATION_WIDTH = 1280
+CALIBRATION_HEIGHT = 720
+CALIBRATION_SOURCE = (f"testsrc2=size={CALIBRATION_WIDTH}x{CALIBRATION_HEIGHT}:rate=30:"
+                      f"duration={CALIBRATION_SECONDS},noise=alls=16:allf=t+u")
+# x264 and libvpx run their first pass with faster analysis, so two passes
+# cost about one and a half
+TWO_PASS_FACTOR = 1.5
+# Remuxes only copy packets, so they go about as fast as the disk
+REMUX_BYTES_PER_SECOND = 200 * 1024 * 1024
+
+_lock = threading.Lock()
+
+def load_calibration():
+    try:
+        with open(CALIBRATION_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_calibration(data):
+    os.makedirs(os.path.dirname(CALIBRATION_FILE), exist_ok=True)
+    with open(CALIBRATION_FILE + ".part", 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(CALIBRATION_FILE + ".part", CALIBRATION_FILE)
+
+def measure_speed(ffmpeg_path, encoder, preset, threads, progress=None):
+    # Media seconds encoded per wall-clock second at 720p. progress gets
+    # ffmpeg's reports, so a cancelled estimate stops the encode (and frees
+    # _lock) instead of finishing it.
+    stream = {"action": TRANSCODE, "encoder": encoder, "options": encoder_options(encoder, preset)}
+    command = ([ffmpeg_path, '-f', 'lavfi', '-i', CALIBRATION_SOURCE, '-map', '0:0'] + stream_options(stream, 0)
+               + ['-threads', str(threads), '-f', 'null', os.devnull])
+    started = time.perf_counter()
+    run_ffmpeg(command, CALIBRATION_SECONDS, progress, label=f"Calibrating {encoder} ({PRESETS[preset]})")
+    return CALIBRATION_SECONDS / max(time.perf_counter() - started, 0.001)
+
+def calibrate(ffmpeg_path, output_format, encoders=None, version=None, progress=None):
+    # Returns {preset: speed} for the format's video encoder. Results are
+    # kept per ffmpeg version, so this only encodes the first time.
+    encoder = pick_encoder(ENCODERS[output_format]["video"], encoders)
+    speeds = {}
+    with _lock:
+        data = load_calibration()
+        for number, preset in enumerate(PRESETS):
+            threads = preset_threads(preset)
+            key = f"{version or ffmpeg_path}|{encoder}|{preset}|{threads}"
+            if key not in data:
+                if progress:
+                    progress(f"Calibrating {encoder} ({PRESETS[preset]})...", number, len(PRESETS))
+                data[key] = round(measure_speed(ffmpeg_path, encoder, preset, threads, progress), 3)
+                save_calibration(data)
+            speeds[preset] = data[key]
+    return speeds
+
+def probe_inputs(plan, ffprobe_path='ffprobe', progress=None):
+    probed = []
+    for number, item in enumerate(plan):
+        if progress:
+            progress(f"Probing {os.path.basename(item['input'])}", number, len(plan))
+        probed.append((probe_media(item["input"], ffprobe_path), item["size"]))
+    return probed
+
+def estimate_seconds(probed, output_format, speeds, encoders=None, target_size=None):
+    # Returns {preset: seconds}. Encode time is taken to scale with the
+    # pixel count against the 720p calibration clip; files ffprobe can't
+    # read are left out. Batches divide by the files converting at once.
+    estimates = {}
+    for preset, speed in speeds.items():
+        total = 0.0
+        for media, size in probed:
+            if media is None:
+                continue
+            streams = plan_streams(media["streams"], output_format, encoders, preset, bool(target_size))
+            video = main_video(streams)
+            if video is None or not media["duration"]:
+                total += size / REMUX_BYTES_PER_SECOND
+                continue
+            info = next(stream for stream in media["streams"] if stream["index"] == video["index"])
+            pixels = (info.get("width") or CALIBRATION_WIDTH) * (info.get("height") or CALIBRATION_HEIGHT)
+            seconds = media["duration"] * pixels / (CALIBRATION_WIDTH * CALIBRATION_HEIGHT) / speed
+            total += seconds * (TWO_PASS_FACTOR if target_size else 1)
+        parallel = max(1, min(len(probed), CORES // preset_threads(preset)))
+        estimates[preset] = total / parallel
+    return estimates
+
+def estimate_conversion(plan, output_format, ffmpeg_path='ffmpeg', ffprobe_path='ffprobe', encoders=None,
+                        version=None, target_size=None, progress=None):
+    speeds = calibrate(ffmpeg_path, output_format, encoders, version, progress)
+    return estimate_seconds(probe_inputs(plan, ffprobe_path, progress), output_format, speeds, encoders, target_size)
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+
+if os.name == 'nt':
+    import msvcrt
+
+    def lock_file(f):
+        # Retries for about ten seconds, then raises OSError
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def lock_file(f):
+        fcntl.flock(f, fcntl.LOCK_EX)
+
+    def unlock_file(f):
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+RESOURCE_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CACHE_FOLDER = os.path.join(RESOURCE_PATH, "user", "conversion_cache")
+OUTPUT_LOG_FILE = os.path.join(RESOURCE_PATH, "user", "conversion_outputs.json")
+CACHE_LIMIT = 10 * 1024 * 1024 * 1024
+
+# The fingerprint reads SAMPLE_COUNT blocks spread evenly over the file
+# (always including the first and last), so it costs the same for a 100 MB
+# clip and a 50 GB recording. Size and mtime catch the usual edits; the
+# samples catch a file replaced by another of the same size.
+SAMPLE_COUNT = 16
+SAMPLE_SIZE = 64 * 1024
+
+def fingerprint(path):
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        if stat.st_size <= SAMPLE_COUNT * SAMPLE_SIZE:
+            digest.update(f.read())
+        else:
+            step = (stat.st_size - SAMPLE_SIZE) / (SAMPLE_COUNT - 1)
+            for number in range(SAMPLE_COUNT):
+                f.seek(int(number * step))
+                digest.update(f.read(SAMPLE_SIZE))
+    return f"{stat.st_size}:{stat.st_mtime_ns}:{digest.hexdigest()}"
+
+def cache_key(input_file, arguments):
+    # arguments is the complete ffmpeg command with the input and output
+    # paths left out, so the same file converted the same way from anywhere
+    # to anywhere hits the same entry
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(fingerprint(input_file).encode())
+    digest.update(json.dumps(arguments).encode())
+    return digest.hexdigest()
+
+@contextmanager
+def locked_file(thread_lock, lock_path):
+    # The thread lock covers this process's workers; the file lock other
+    # processes. The lock file is never deleted, so every process always
+    # locks the same file.
+    with thread_lock:
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        with open(lock_path, 'a+b') as f:
+            lock_file(f)
+            try:
+                yield
+            finally:
+                unlock_file(f)
+
+def place_file(source, destination):
+    # A hard link costs nothing; across filesystems (or on ones without
+    # links) fall back to a copy. The destination is removed first so a
+    # link never points ffmpeg's -y truncation at the shared data.
+    if os.path.lexists(destination):
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+    return destination
+
+class ConversionCache:
+    # Finished outputs keyed by cache_key(), evicted least recently used
+    # first once they add up to more than `limit` bytes. The index is
+    # re-read before every change under a lock file, so the GUI and CLI
+    # (and several CLI runs) can share a cache.
+    def __init__(self, folder=CACHE_FOLDER, limit=CACHE_LIMIT):
+        self.folder = folder
+        self.limit = limit
+        self.index_file = os.path.join(folder, "index.json")
+        self.lock_path = os.path.join(folder, "index.lock")
+        self.lock = threading.Lock()
+
+    def locked(self):
+        return locked_file(self.lock, self.lock_path)
+
+    def load(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault("entries", {})
+        index.setdefault("stats", {"hits": 0, "misses": 0, "saved_seconds": 0.0})
+        return index
+
+    def save(self, index):
+        os.makedirs(self.folder, exist_ok=True)
+        with open(self.index_file + ".part", 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(self.index_file + ".part", self.index_file)
+
+    def entry_path(self, key, entry):
+        return os.path.join(self.folder, key + entry["extension"])
+
+    # A cache that can't be read or written (a full disk, a folder that
+    # isn't one) only costs a run its shortcut: fetch() then misses and
+    # store() keeps nothing, and neither fails the conversion
+
+    def fetch(self, key, output_file):
+        # Puts the cached output at output_file and returns the encode time
+        # it saved, or returns None (a miss)
+        try:
+            with self.locked():
+                return self.fetch_entry(key, output_file)
+        except OSError:
+            return None
+
+    def fetch_entry(self, key, output_file):
+        index = self.load()
+        entry = index["entries"].get(key)
+        if entry is not None:
+            try:
+                place_file(self.entry_path(key, entry), output_file)
+            except OSError:
+                entry = None  # Deleted from under us; convert again
+            else:
+                entry["last_used"] = time.time()
+                index["stats"]["hits"] += 1
+                index["stats"]["saved_seconds"] = round(index["stats"]["saved_seconds"] + entry["seconds"], 3)
+                self.save(index)
+                return entry["seconds"]
+        index["entries"].pop(key, None)
+        index["stats"]["misses"] += 1
+        self.save(index)
+        return None
+
+    def store(self, key, output_file, seconds):
+        try:
+            size = os.path.getsize(output_file)
+            if size > self.limit:
+                return
+            with self.locked():
+                index = self.load()
+                entry = {"extension": os.path.splitext(output_file)[1], "size": size,
+                         "seconds": round(seconds, 3), "last_used": time.time()}
+                os.makedirs(self.folder, exist_ok=True)
+                place_file(output_file, self.entry_path(key, entry))
+                index["entries"][key] = entry
+                self.evict(index)
+                self.save(index)
+        except OSError:
+            pass
+
+    def evict(self, index):
+        entries = index["entries"]
+        total = sum(entry["size"] for entry in entries.values())
+        for key in sorted(entries, key=lambda key: entries[key]["last_used"]):
+            if total <= self.limit:
+                break
+            total -= entries[key]["size"]
+            path = self.entry_path(key, entries.pop(key))
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def summary(self):
+        with self.lock:
+            index = self.load()
+        summary = dict(index["stats"])
+        summary["entries"] = len(index["entries"])
+        summary["bytes"] = sum(entry["size"] for entry in index["entries"].values())
+        summary["limit"] = self.limit
+        return summary
+
+    def clear(self):
+        try:
+            with self.locked():
+                for name in os.listdir(self.folder):
+                    path = os.path.join(self.folder, name)
+                    if path != self.lock_path:
+                        os.remove(path)
+        except OSError:
+            pass
+
+class OutputLog:
+    # The cache key each output was converted with, so an existing output
+    # only counts as up to date when it came from the same input with the
+    # same settings. Its size and mtime are kept too, so a file replaced or
+    # rewritten since doesn't count either.
+    def __init__(self, path=OUTPUT_LOG_FILE):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self.lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def matches(self, output_file, key):
+        entry = self.load().get(os.path.abspath(output_file))
+        try:
+            stat = os.stat(output_file)
+        except OSError:
+            return False
+        return (entry is not None and entry["key"] == key and entry["size"] == stat.st_size
+                and entry["mtime_ns"] == stat.st_mtime_ns)
+
+    def record(self, output_file, key):
+        # Like the cache, a log that can't be written only means the file
+        # is converted again next time
+        try:
+            stat = os.stat(output_file)
+            with locked_file(self.lock, self.lock_path):
+                log = self.load()
+                # Outputs deleted since are dropped, so the log stays the size of what's on disk
+                log = {path: entry for path, entry in log.items() if os.path.exists(path)}
+                log[os.path.abspath(output_file)] = {"key": key, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                with open(self.path + ".part", 'w', encoding='utf-8') as f:
+                    json.dump(log, f)
+                os.replace(self.path + ".part", self.path)
+        except OSError:
+            pass
+
+_cache = None
+_output_log = None
+
+def get_conversion_cache():
+    global _cache
+    if _cache is None:
+        _cache = ConversionCache()
+    return _cache
+
+def get_output_log():
+    global _output_log
+    if _output_log is None:
+        _output_log = OutputLog()
+    return _output_log
@@ -0,0 +1,281 @@
+import os
+import re
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+from collections import deque
+from resources.services.job_scheduler import terminate_process, register_process, unregister_process
+from resources.tools.video_format_converter.stream_plan import (probe_media, plan_streams, stream_arguments,
+                                                                stream_options, is_remux, describe_plan, TRANSCODE,
+                                                                DROP)
+from resources.tools.video_format_converter.presets import RATE_OPTIONS, parse_bitrate
+
+# Seconds ffmpeg gets to finish up after "q" before it is terminated
+QUIT_GRACE = 5
+STDERR_LINES = 20
+DURATION_PATTERN = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+# Size-targeted encodes: what the container adds on top of the streams, what
+# to assume for audio whose bitrate ffprobe doesn't report, and a floor so a
+# tiny target still produces a watchable file
+CONTAINER_OVERHEAD = 0.02
+AUDIO_BITRATE_GUESS = 128000
+MIN_VIDEO_BITRATE = 100000
+
+OUTPUT_FORMATS = ['mp4', 'avi', 'mkv', 'mov', 'webm']
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.webm')
+
+def default_output_folder():
+    return os.path.expanduser("~/Desktop")
+
+def output_path_for(input_file, output_format, output_folder=None):
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+    return os.path.join(output_folder or default_output_folder(), f"{base_name}.{output_format}")
+
+def parse_number(value):
+    try:
+        return float(value.rstrip('x'))
+    except (AttributeError, ValueError):
+        return None  # "N/A" until ffmpeg has something to report
+
+class ProgressStream:
+    # ffmpeg's -progress output is blocks of key=value lines, each ended by
+    # progress=continue (or progress=end for the last one). feed() takes one
+    # line at a time and returns a status dict whenever a block is complete.
+    def __init__(self, duration=None):
+        self.duration = duration
+        self.values = {}
+
+    def feed(self, line):
+        key, separator, value = line.strip().partition('=')
+        if not separator:
+            return None
+        if key != 'progress':
+            self.values[key] = value
+            return None
+        block, self.values = self.values, {}
+        return self.status(block, value == 'end')
+
+    def status(self, block, finished):
+        # out_time_us is the current one; older builds only have out_time_ms,
+        # which despite the name is in microseconds as well
+        position = parse_number(block.get('out_time_us', block.get('out_time_ms')))
+        position = max(0.0, position / 1000000) if position is not None else None
+        speed = parse_number(block.get('speed'))
+        fraction = eta = None
+        if self.duration and position is not None:
+            fraction = 1.0 if finished else min(1.0, position / self.duration)
+            if speed:
+                eta = max(0.0, self.duration - position) / speed
+        frame = parse_number(block.get('frame'))
+        return {
+            "position": position,
+            "duration": self.duration,
+            "fraction": fraction,
+            "frame": int(frame) if frame is not None else None,
+            "fps": parse_number(block.get('fps')),
+            "speed": speed,
+            "eta": eta,
+            "finished": finished,
+        }
+
+def format_status(status, label="Converting"):
+    parts = []
+    if status["fraction"] is not None:
+        parts.append(f"{status['fraction'] * 100:.0f}%")
+    elif status["position"] is not None:
+        parts.append(f"{status['position']:.0f}s converted")
+    if status["fps"]:
+        parts.append(f"{status['fps']:.0f} fps")
+    if status["speed"]:
+        parts.append(f"{status['speed']:.2f}x")
+    return f"{label}: " + ", ".join(parts) if parts else f"{label}..."
+
+class StderrTail(threading.Thread):
+    # Drains ffmpeg's stderr so it can't fill the pipe and stall the encode,
+    # keeping the last lines for error messages. Also picks the duration out
+    # of ffmpeg's input banner for when ffprobe had nothing to say.
+    def __init__(self, stream):
+        super().__init__(daemon=True)
+        self.stream = stream
+        self.lines = deque(maxlen=STDERR_LINES)
+        self.duration = None
+
+    def run(self):
+        for line in self.stream:
+            line = line.rstrip()
+            if line:
+                self.lines.append(line)
+            if self.duration is None:
+                match = DURATION_PATTERN.search(line)
+                if match:
+                    hours, minutes, seconds = match.groups()
+                    self.duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+def stop_ffmpeg(process):
+    # "q" makes ffmpeg stop reading, flush and close the output cleanly;
+    # terminate is the fallback for a process that doesn't respond
+    try:
+        process.stdin.write('q')
+        process.stdin.close()
+    except (OSError, ValueError):
+        pass
+    try:
+        process.wait(timeout=QUIT_GRACE)
+    except subprocess.TimeoutExpired:
+        terminate_process(process)
+
+def run_ffmpeg(command, duration=None, progress=None, label="Converting"):
+    # Runs an ffmpeg command with -progress on stdout and reports each block
+    # through progress(message, fraction=, eta=). Raising from progress (the
+    # job scheduler does once a job is cancelled) stops ffmpeg.
+    # -y because the stdin pipe is kept for "q", so ffmpeg can't ask about
+    # overwriting; the callers pick the output path
+    command = command[:1] + ['-y', '-hide_banner', '-nostats', '-progress', 'pipe:1'] + command[1:]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               text=True, errors='replace')
+    # Registered so quitting the app stops it (see JobScheduler.shutdown)
+    register_process(process)
+    stderr = StderrTail(process.stderr)
+    stderr.start()
+    stream = ProgressStream(duration)
+    try:
+        for line in process.stdout:
+            if stream.duration is None:
+                stream.duration = stderr.duration
+            status = stream.feed(line)
+            if status is None or progress is None:
+                continue
+            progress(format_status(status, label), fraction=status["fraction"], eta=status["eta"])
+        process.wait()
+    except BaseException:
+        stop_ffmpeg(process)
+        raise
+    finally:
+        unregister_process(process)
+        stderr.join(timeout=1)
+        process.stdout.close()
+    if process.returncode != 0:
+        message = stderr.lines[-1] if stderr.lines else "no output"
+        raise RuntimeError(f"ffmpeg exited with code {process.returncode}: {message}")
+    return process.returncode
+
+def build_conversion_command(input_file, output_file, output_format, ffmpeg_path='ffmpeg', threads=None,
+                             streams=None):
+    # streams is the per-stream plan from ffprobe; without one (no ffprobe,
+    # or a file it can't read) ffmpeg picks its default streams and encoders
+    command = [ffmpeg_path, '-i', input_file]
+    if streams is not None:
+        command += stream_arguments(streams)
+    if threads and (streams is None or not is_remux(streams)):
+        # threads caps the encoder's threads, for running several conversions at once
+        command += ['-threads', str(threads)]
+    return command + [output_file]
+
+def main_video(streams):
+    return next((stream for stream in streams or () if stream["type"] == "video" and stream["action"] == TRANSCODE),
+                None)
+
+def target_video_bitrate(target_size, duration, streams, probed):
+    # Whatever the size allows once the audio (at its preset or probed
+    # bitrate) and the container overhead are paid for
+    bit_rates = {stream["index"]: stream.get("bit_rate") for stream in probed}
+    audio = 0
+    for stream in streams:
+        if stream["type"] != "audio" or stream["action"] == DROP:
+            continue
+        if stream["action"] == TRANSCODE:
+            rate = parse_bitrate(dict(stream["options"]).get('b'))
+        else:
+            rate = parse_bitrate(bit_rates.get(stream["index"]))
+        audio += rate or AUDIO_BITRATE_GUESS
+    video = target_size * 8 * (1 - CONTAINER_OVERHEAD) / duration - audio
+    return max(MIN_VIDEO_BITRATE, int(video))
+
+def with_pass(stream, bitrate, passlog, number):
+    options = [(option, value) for option, value in stream["options"] if option not in RATE_OPTIONS]
+    options += [('b', str(bitrate)), ('pass', str(number)), ('passlogfile', passlog)]
+    return dict(stream, options=options)
+
+def scaled_progress(progress, start, share, remaining_after=None):
+    # Maps one ffmpeg run's progress onto part of the job's bar.
+    # remaining_after(elapsed, fraction) adds the time the runs after this
+    # one will take to its ETA.
+    if progress is None:
+        return None
+    started = time.perf_counter()
+
+    def report(message, done=None, total=None, bytes_done=None, bytes_total=None, fraction=None, eta=None):
+        if eta is not None and fraction and remaining_after:
+            eta += remaining_after(time.perf_counter() - started, fraction)
+        progress(message, fraction=start + share * fraction if fraction is not None else None, eta=eta)
+    return report
+
+def convert_two_pass(input_file, output_file, output_format, ffmpeg_path, progress, threads, streams, duration,
+                     target_size, probed):
+    video = main_video(streams)
+    bitrate = target_video_bitrate(target_size, duration, streams, probed)
+    # The pass log goes next to the output; two jobs converting in the same
+    # folder each get their own
+    work_folder = tempfile.mkdtemp(prefix=".passlog-", dir=os.path.dirname(os.path.abspath(output_file)))
+    passlog = os.path.join(work_folder, "pass")
+    try:
+        first = with_pass(video, bitrate, passlog, 1)
+        command = [ffmpeg_path, '-i', input_file, '-map', f"0:{video['index']}"] + stream_options(first, 0)
+        if threads:
+            command += ['-threads', str(threads)]
+        command += ['-an', '-sn', '-dn', '-f', 'null', os.devnull]
+        # The second pass takes about as long as the first took in all
+        run_ffmpeg(command, duration, scaled_progress(progress, 0.0, 0.5,
+                                                      lambda elapsed, fraction: elapsed / fraction),
+                   f"Pass 1 at {bitrate // 1000} kb/s")
+        second = [with_pass(stream, bitrate, passlog, 2) if stream is video else stream for stream in streams]
+        run_ffmpeg(build_conversion_command(input_file, output_file, output_format, ffmpeg_path, threads, second),
+                   duration, scaled_progress(progress, 0.5, 0.5), "Pass 2")
+    finally:
+        shutil.rmtree(work_folder, ignore_errors=True)
+
+def remove_old_output(output_file):
+    # An earlier output may be a hard link into the conversion cache, and
+    # ffmpeg -y would truncate the cached copy through it; a new file never
+    # shares anything
+    if os.path.lexists(output_file):
+        os.remove(output_file)
+
+def convert_video(input_file, output_file, output_format, ffmpeg_path='ffmpeg', progress=None,
+                  ffprobe_path='ffprobe', threads=None, encoders=None, preset=None, target_size=None, media=None):
+    # encoders is the set of encoders this ffmpeg has (see the capability
+    # service), used to pick a fallback when the preferred one is missing.
+    # preset names an entry of presets.PRESETS; target_size (bytes) switches
+    # the video to a two-pass encode at whatever bitrate hits that size.
+    # media is probe_media()'s result when the caller already has it.
+    if os.path.exists(output_file) and os.path.samefile(input_file, output_file):
+        # ffmpeg refuses this anyway, and the cleanup below must never
+        # delete the input
+        raise ValueError(f"Output would overwrite the input: {output_file}")
+    remove_old_output(output_file)
+    if media is None and ffprobe_path:
+        media = probe_media(input_file, ffprobe_path)
+    if target_size and not (media and media["duration"]):
+        raise ValueError("A target size needs the video's duration, and ffprobe couldn't read it")
+    streams = plan_streams(media["streams"], output_format, encoders, preset, bool(target_size)) if media else None
+    if target_size and main_video(streams) is None:
+        raise ValueError("A target size needs a video stream to encode")
+    label = "Remuxing" if streams is not None and is_remux(streams) else "Converting"
+    if progress:
+        progress(f"Starting ffmpeg ({describe_plan(streams)})..." if streams else "Starting ffmpeg...")
+    try:
+        if target_size:
+            convert_two_pass(input_file, output_file, output_format, ffmpeg_path, progress, threads, streams,
+                             media["duration"], target_size, media["streams"])
+        else:
+            run_ffmpeg(build_conversion_command(input_file, output_file, output_format, ffmpeg_path, threads,
+                                                streams),
+                       media["duration"] if media else None, progress, label)
+    except BaseException:
+        # A cancelled or failed conversion leaves a truncated file behind
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        raise
+    return output_file
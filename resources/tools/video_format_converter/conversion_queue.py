@@ -0,0 +1,271 @@
+import os
+import time
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from resources.services.job_scheduler import JobCancelled
+from resources.tools.video_format_converter.conversion_engine import (convert_video, output_path_for,
+                                                                      build_conversion_command, VIDEO_EXTENSIONS)
+from resources.tools.video_format_converter.stream_plan import probe_media, plan_streams
+from resources.tools.video_format_converter.conversion_cache import cache_key
+from resources.tools.video_format_converter.segmented import convert_segmented, format_segment_report
+
+CORES = os.cpu_count() or 2
+# x264/x265 scale well up to a few threads per process and poorly after
+# that, so many small processes convert a pile of clips faster than one big
+# one. Together they use every core once: parallel runs * threads = cores.
+FFMPEG_THREADS = min(2, CORES)
+
+CONVERTED = "converted"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+def parallel_conversions(threads=FFMPEG_THREADS, cores=CORES):
+    return max(1, cores // max(1, threads))
+
+def collect_videos(paths):
+    # Files are taken as given; folders are searched recursively and keep
+    # their layout under the output folder. Returns (input, subfolder) pairs.
+    videos, seen = [], set()
+    for path in paths:
+        if os.path.isdir(path):
+            found = []
+            for directory, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                relative = os.path.relpath(directory, path)
+                found.extend((os.path.join(directory, name), "" if relative == "." else relative)
+                             for name in sorted(filenames) if name.lower().endswith(VIDEO_EXTENSIONS))
+        else:
+            found = [(path, "")]
+        for video, subfolder in found:
+            key = os.path.abspath(video)
+            if key not in seen:
+                seen.add(key)
+                videos.append((video, subfolder))
+    return videos
+
+def up_to_date(input_file, output_file):
+    try:
+        return os.path.getmtime(output_file) >= os.path.getmtime(input_file)
+    except OSError:
+        return False
+
+def unique_output(output_file, input_file, taken):
+    # Inputs that would share an output (clip.avi and clip.mov, or C0001.MP4
+    # picked from two cards) would overwrite each other while converting in
+    # parallel. The first keeps the plain name; later ones get their source
+    # extension and, if that's taken too, a number. Plans are built in input
+    # order, so a rerun maps every input to the same output again.
+    base, extension = os.path.splitext(output_file)
+    source = os.path.splitext(input_file)[1].lstrip('.').lower()
+    candidates = itertools.chain([output_file, f"{base}_{source}{extension}"],
+                                 (f"{base}_{source}_{number}{extension}" for number in itertools.count(2)))
+    for candidate in candidates:
+        # Case-insensitive, for Windows and macOS drives
+        key = os.path.normcase(os.path.abspath(candidate)).lower()
+        if key not in taken:
+            taken.add(key)
+            return candidate
+
+def plan_conversions(paths, output_format, output_folder):
+    plan, taken = [], set()
+    for input_file, subfolder in collect_videos(paths):
+        output_file = unique_output(output_path_for(input_file, output_format, os.path.join(output_folder, subfolder)),
+                                    input_file, taken)
+        plan.append({"input": input_file, "output": output_file, "size": os.path.getsize(input_file)})
+    return plan
+
+def cache_arguments(media, output_format, ffmpeg_path, threads, encoders, preset, target_size, segmented,
+                    segments):
+    # Everything besides the input that decides what comes out: the ffmpeg
+    # command without its paths, plus the settings that change the commands
+    # themselves (the two-pass bitrate, the segment split)
+    streams = plan_streams(media["streams"], output_format, encoders, preset, bool(target_size)) if media else None
+    arguments = [output_format] + build_conversion_command(None, None, output_format, ffmpeg_path,
+                                                           None if segmented else threads, streams)
+    if target_size:
+        arguments += ['two-pass', str(target_size)]
+    if segmented:
+        arguments += ['segmented', str(segments)]
+    return arguments
+
+class QueueProgress:
+    # Folds the progress of the files converting in parallel into one
+    # report: files done, and bytes of input done, counting each running
+    # file by ffmpeg's position in it. While one file is running its own
+    # status line (fps, speed, pass) is passed on too.
+    def __init__(self, plan, progress):
+        self.progress = progress
+        self.total = len(plan)
+        self.bytes_total = sum(item["size"] for item in plan)
+        self.done = 0
+        self.bytes_finished = 0
+        self.running = {}
+        self.statuses = {}
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def file_progress(self, item):
+        def progress(message, done=None, total=None, bytes_done=None, bytes_total=None, fraction=None, eta=None):
+            with self.lock:
+                if fraction is not None:
+                    self.running[item["input"]] = item["size"] * fraction
+                self.statuses[item["input"]] = (message, eta)
+                self.report()
+        return progress
+
+    def finish(self, item):
+        with self.lock:
+            self.running.pop(item["input"], None)
+            self.statuses.pop(item["input"], None)
+            self.done += 1
+            self.bytes_finished += item["size"]
+            self.report()
+
+    def bytes_done(self):
+        return self.bytes_finished + int(sum(self.running.values()))
+
+    def throughput(self):
+        elapsed = time.perf_counter() - self.started
+        return self.bytes_done() / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        if self.progress is None:
+            return
+        throughput = self.throughput()
+        message = (f"{self.done}/{self.total} files, {len(self.statuses)} converting, "
+                   f"{throughput / (1024 * 1024):.1f} MB/s")
+        # A lone file's ETA is ffmpeg's own; a batch's comes from the bytes
+        # still to go at the rate so far
+        eta = (self.bytes_total - self.bytes_done()) / throughput if throughput else None
+        if len(self.statuses) == 1:
+            (path, (status, status_eta)), = self.statuses.items()
+            if self.total == 1:
+                message, eta = status, status_eta
+            elif status:
+                message += f"; {os.path.basename(path)}: {status}"
+        self.progress(message, self.done, self.total, bytes_done=self.bytes_done(), bytes_total=self.bytes_total,
+                      eta=eta)
+
+def convert_queue(plan, output_format, ffmpeg_path='ffmpeg', progress=None, ffprobe_path='ffprobe',
+                  threads=FFMPEG_THREADS, workers=None, on_file=None, encoders=None, segmented=False,
+                  segments=None, preset=None, target_size=None, cache=None, outputs=None):
+    # Converts every planned file, several at once. Outputs that are already
+    # up to date are skipped, so an interrupted batch can simply be run
+    # again: with outputs (an OutputLog), those made from the same input
+    # with the same settings; without, those newer than their input.
+    # on_file(record) is called as each file finishes. segmented splits each
+    # file across the cores instead, one file at a time. cache (a
+    # ConversionCache) hands back earlier outputs of the same input
+    # converted with the same arguments instead of running ffmpeg again.
+    workers = 1 if segmented else workers or parallel_conversions(threads)
+    queue_progress = QueueProgress(plan, progress)
+    records = []
+    records_lock = threading.Lock()
+
+    def convert(item):
+        record = {"input": item["input"], "output": item["output"], "bytes": item["size"]}
+        media, key = None, None
+        if cache is not None or outputs is not None:
+            media = probe_media(item["input"], ffprobe_path) if ffprobe_path else None
+            try:
+                key = cache_key(item["input"], cache_arguments(media, output_format, ffmpeg_path, threads, encoders,
+                                                               preset, target_size, segmented, segments))
+            except OSError:
+                pass  # An unreadable input fails in ffmpeg, with its message
+        if outputs is not None:
+            skip = key is not None and outputs.matches(item["output"], key)
+        else:
+            skip = up_to_date(item["input"], item["output"])
+        if skip:
+            record["status"] = SKIPPED
+        else:
+            started = time.perf_counter()
+            try:
+                os.makedirs(os.path.dirname(item["output"]), exist_ok=True)
+                saved = None
+                if cache is not None and key is not None:
+                    saved = cache.fetch(key, item["output"])
+                    record["cached"] = saved is not None
+                if saved is not None:
+                    record["saved_seconds"] = saved
+                elif segmented:
+                    record["segmented"] = convert_segmented(item["input"], item["output"], output_format, ffmpeg_path,
+                                                            queue_progress.file_progress(item), ffprobe_path,
+                                                            encoders, segments, preset)
+                else:
+                    convert_video(item["input"], item["output"], output_format, ffmpeg_path,
+                                  queue_progress.file_progress(item), ffprobe_path, threads, encoders, preset,
+                                  target_size, media)
+                if cache is not None and key is not None and saved is None:
+                    cache.store(key, item["output"], time.perf_counter() - started)
+                if outputs is not None and key is not None:
+                    outputs.record(item["output"], key)
+                record["status"] = CONVERTED
+            except JobCancelled:
+                raise
+            except Exception as e:
+                record["status"] = FAILED
+                record["error"] = str(e)
+            record["seconds"] = round(time.perf_counter() - started, 3)
+            if record["status"] == CONVERTED and record["seconds"] and not record.get("cached"):
+                record["mb_per_second"] = round(item["size"] / record["seconds"] / (1024 * 1024), 2)
+        with records_lock:
+            records.append(record)
+        queue_progress.finish(item)
+        if on_file:
+            on_file(record)
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="convert")
+    try:
+        futures = [pool.submit(convert, item) for item in plan]
+        for future in futures:
+            future.result()
+    finally:
+        # On cancel the running conversions stop at their next progress
+        # report; the queued ones never start
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    elapsed = time.perf_counter() - queue_progress.started
+    converted = [record for record in records if record["status"] == CONVERTED]
+    cached = [record for record in records if record.get("cached")]
+    converted_bytes = sum(record["bytes"] for record in converted)
+    order = {item["input"]: index for index, item in enumerate(plan)}
+    records.sort(key=lambda record: order[record["input"]])
+    return {
+        "files": records,
+        "converted": len(converted),
+        "skipped": sum(1 for record in records if record["status"] == SKIPPED),
+        "failed": sum(1 for record in records if record["status"] == FAILED),
+        "workers": workers,
+        "threads": None if segmented else threads,
+        "cache_hits": len(cached) if cache is not None else None,
+        "cache_misses": sum(1 for record in records if record.get("cached") is False) if cache is not None else None,
+        "saved_seconds": round(sum(record["saved_seconds"] for record in cached), 3),
+        "seconds": round(elapsed, 3),
+        "mb_per_second": round(converted_bytes / elapsed / (1024 * 1024), 2) if elapsed > 0 else 0.0,
+    }
+
+def format_queue_result(result):
+    if result["threads"]:
+        mode = f"{result['workers']} at a time, -threads {result['threads']} each"
+    else:
+        mode = "split into segments"
+    if result.get("cache_hits") is not None:
+        mode += (f"; cache: {result['cache_hits']} hits, {result['cache_misses']} misses, "
+                 f"{result['saved_seconds']:.1f}s of encoding saved")
+    lines = [f"{result['converted']} converted, {result['skipped']} skipped (up to date), {result['failed']} failed "
+             f"in {result['seconds']:.1f}s, {result['mb_per_second']:.1f} MB/s overall ({mode})"]
+    for record in result["files"]:
+        name = os.path.basename(record["input"])
+        if record.get("cached"):
+            lines.append(f"{name}: from the cache, saved {record['saved_seconds']:.1f}s")
+        elif record["status"] == CONVERTED:
+            lines.append(f"{name}: {record['seconds']:.1f}s, {record.get('mb_per_second', 0):.1f} MB/s")
+            if "segmented" in record:
+                lines.extend("    " + line for line in format_segment_report(record["segmented"]).splitlines())
+        elif record["status"] == SKIPPED:
+            lines.append(f"{name}: skipped, output is up to date with these settings")
+        else:
+            lines.append(f"{name}: failed, {record['error']}")
+    return '\n'.join(lines)
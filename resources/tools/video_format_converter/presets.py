@@ -0,0 +1,84 @@
+import os
+
+# Named speed/quality trade-offs. Each maps, per encoder (and so per output
+# format, see stream_plan.ENCODERS), to the encoder's own speed preset and
+# constant-quality setting, plus how many threads each ffmpeg gets.
+PRESETS = {
+    "draft": "Fast draft",
+    "balanced": "Balanced",
+    "archival": "Archival",
+}
+DEFAULT_PRESET = "balanced"
+
+# Slower presets do more work per frame and keep more threads busy, so
+# archival runs fewer, wider ffmpeg processes
+PRESET_THREADS = {"draft": 2, "balanced": 2, "archival": 4}
+CORES = os.cpu_count() or 2
+
+# (option, value) pairs, passed as -option:<output stream> value
+VIDEO_OPTIONS = {
+    'libx264': {
+        "draft": [('preset', 'veryfast'), ('crf', '28')],
+        "balanced": [('preset', 'medium'), ('crf', '23')],
+        "archival": [('preset', 'slow'), ('crf', '18')],
+    },
+    # No constant-quality mode, so bitrates sized for 1080p
+    'libopenh264': {
+        "draft": [('b', '2M')],
+        "balanced": [('b', '5M')],
+        "archival": [('b', '10M')],
+    },
+    # -b 0 turns -crf into true constant quality rather than a cap
+    'libvpx-vp9': {
+        "draft": [('deadline', 'realtime'), ('cpu-used', '8'), ('crf', '40'), ('b', '0'), ('row-mt', '1')],
+        "balanced": [('deadline', 'good'), ('cpu-used', '4'), ('crf', '32'), ('b', '0'), ('row-mt', '1')],
+        "archival": [('deadline', 'good'), ('cpu-used', '1'), ('crf', '24'), ('b', '0'), ('row-mt', '1')],
+    },
+    # VP8 needs a bitrate ceiling alongside -crf
+    'libvpx': {
+        "draft": [('deadline', 'realtime'), ('cpu-used', '8'), ('crf', '32'), ('b', '2M')],
+        "balanced": [('deadline', 'good'), ('cpu-used', '4'), ('crf', '20'), ('b', '5M')],
+        "archival": [('deadline', 'good'), ('cpu-used', '1'), ('crf', '10'), ('b', '10M')],
+    },
+    'libaom-av1': {
+        "draft": [('cpu-used', '8'), ('crf', '40'), ('b', '0'), ('row-mt', '1')],
+        "balanced": [('cpu-used', '6'), ('crf', '32'), ('b', '0'), ('row-mt', '1')],
+        "archival": [('cpu-used', '4'), ('crf', '24'), ('b', '0'), ('row-mt', '1')],
+    },
+    'mpeg4': {
+        "draft": [('q', '8')],
+        "balanced": [('q', '4')],
+        "archival": [('q', '2')],
+    },
+}
+
+AUDIO_OPTIONS = {
+    'aac': {"draft": [('b', '96k')], "balanced": [('b', '160k')], "archival": [('b', '256k')]},
+    'libopus': {"draft": [('b', '64k')], "balanced": [('b', '128k')], "archival": [('b', '192k')]},
+    'libvorbis': {"draft": [('q', '3')], "balanced": [('q', '5')], "archival": [('q', '7')]},
+    'libmp3lame': {"draft": [('q', '6')], "balanced": [('q', '2')], "archival": [('q', '0')]},
+    'ac3': {"draft": [('b', '192k')], "balanced": [('b', '384k')], "archival": [('b', '448k')]},
+}
+
+# Quality settings that a size-targeted (two-pass) encode replaces with a
+# bitrate; the speed settings stay
+RATE_OPTIONS = ('crf', 'b', 'q')
+
+def preset_threads(preset, cores=CORES):
+    return min(PRESET_THREADS.get(preset, 2), cores)
+
+def encoder_options(encoder, preset, kind="video"):
+    if not preset:
+        return []
+    table = VIDEO_OPTIONS if kind == "video" else AUDIO_OPTIONS
+    return list(table.get(encoder, {}).get(preset, []))
+
+def parse_bitrate(value):
+    # "160k" -> 160000
+    if not value:
+        return None
+    multiplier = {'k': 1000, 'M': 1000000}.get(value[-1], 1)
+    try:
+        return int(float(value.rstrip('kM')) * multiplier)
+    except ValueError:
+        return None
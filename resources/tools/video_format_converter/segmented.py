@@ -0,0 +1,248 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from resources.tools.video_format_converter.conversion_engine import run_ffmpeg, convert_video, remove_old_output
+from resources.tools.video_format_converter.stream_plan import (probe_media, plan_streams, stream_options,
+                                                                muxer_options, TRANSCODE, DROP)
+
+CORES = os.cpu_count() or 2
+# Splitting has a fixed cost (a probe, a join, one keyframe per segment),
+# so segments shorter than this aren't worth it
+MIN_SEGMENT_SECONDS = 30
+# How far past each split point to look for the next keyframe
+KEYFRAME_WINDOW = 30
+# Share of the progress bar taken by the encode; the join is the rest
+ENCODE_SHARE = 0.9
+
+def segment_threads(segments, cores=CORES):
+    return max(1, cores // segments)
+
+def default_segments(duration, cores=CORES):
+    # One segment per two cores: each encoder still gets a couple of threads
+    # (x264 slows down badly on one), and there is no point splitting a
+    # short clip into segments shorter than MIN_SEGMENT_SECONDS
+    return max(1, min(cores // 2, int(duration // MIN_SEGMENT_SECONDS)))
+
+def probe_keyframes(input_file, stream_index, split_points, ffprobe_path='ffprobe'):
+    # Reads only the packets just after each split point (no decoding), so
+    # this stays quick on multi-hour files. Returns keyframe times relative
+    # to the start of the file, which is what input-side -ss expects.
+    intervals = ",".join(f"{point:.3f}%+{KEYFRAME_WINDOW}" for point in split_points)
+    command = [ffprobe_path, '-v', 'error', '-select_streams', str(stream_index), '-read_intervals', intervals,
+               '-show_entries', 'packet=pts_time,flags:format=start_time', '-of', 'json', input_file]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=120)
+        info = json.loads(result.stdout or "{}")
+    except (OSError, subprocess.TimeoutExpired, ValueError):
+        return []
+    try:
+        start_time = float(info.get("format", {}).get("start_time", 0))
+    except (TypeError, ValueError):
+        start_time = 0.0
+    keyframes = set()
+    for packet in info.get("packets", []):
+        try:
+            if 'K' in packet.get("flags", "") and packet.get("pts_time") not in (None, "N/A"):
+                keyframes.add(float(packet["pts_time"]) - start_time)
+        except ValueError:
+            continue
+    return sorted(keyframes)
+
+def split_at_keyframes(duration, segments, keyframes):
+    # Returns the segment start times: the first keyframe at or after each
+    # even split point. Segments that would be empty collapse into their
+    # neighbour, so fewer than `segments` may come back.
+    starts = [0.0]
+    for number in range(1, segments):
+        target = duration * number / segments
+        later = [keyframe for keyframe in keyframes if keyframe >= target]
+        start = later[0] if later else None
+        if start is not None and start > starts[-1] and start < duration:
+            starts.append(start)
+    return starts
+
+class SegmentStopped(Exception):
+    # Raised in the segments still running once another one has failed
+    pass
+
+class SegmentProgress:
+    # Adds up the media seconds each segment's ffmpeg has encoded so far
+    def __init__(self, duration, progress):
+        self.duration = duration
+        self.progress = progress
+        self.positions = {}
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        # Set when one segment fails, so the others stop instead of
+        # finishing work that will be thrown away
+        self.stopped = threading.Event()
+
+    def segment_progress(self, index, length):
+        def progress(message, done=None, total=None, bytes_done=None, bytes_total=None, fraction=None, eta=None):
+            if self.stopped.is_set():
+                raise SegmentStopped("Stopped after another segment failed")
+            with self.lock:
+                if fraction is not None:
+                    self.positions[index] = fraction * length
+                self.report()
+        return progress
+
+    def report(self):
+        if self.progress is None:
+            return
+        encoded = sum(self.positions.values())
+        elapsed = time.perf_counter() - self.started
+        speed = encoded / elapsed if elapsed > 0 else 0
+        fraction = min(1.0, encoded / self.duration)
+        eta = (self.duration - encoded) / speed if speed else None
+        self.progress(f"Encoding {len(self.positions)} segments: {fraction * 100:.0f}%, {speed:.2f}x",
+                      fraction=fraction * ENCODE_SHARE, eta=eta)
+
+def segment_command(input_file, segment_file, start, length, stream, ffmpeg_path, threads):
+    # Input-side -ss lands exactly on the keyframe, so consecutive segments
+    # neither overlap nor leave a gap. Only the video is encoded here.
+    command = [ffmpeg_path, '-ss', f"{start:.6f}", '-i', input_file]
+    if length is not None:
+        command += ['-t', f"{length:.6f}"]
+    return command + ['-map', f"0:{stream['index']}", '-an', '-sn', '-dn'] + stream_options(stream, 0) + [
+        '-threads', str(threads), segment_file]
+
+def join_command(list_file, input_file, output_file, plan, video_index, ffmpeg_path):
+    # Video from the concatenated segments, everything else straight from
+    # the source in one pass; audio encoded per segment would pick up a
+    # small gap or click at every join
+    command = [ffmpeg_path, '-f', 'concat', '-safe', '0', '-i', list_file, '-i', input_file, '-map', '0:v:0']
+    codecs = ['-c:0', 'copy']
+    output_index = 1
+    for stream in plan:
+        if stream["action"] == DROP or stream["index"] == video_index:
+            continue
+        command += ['-map', f"1:{stream['index']}"]
+        codecs += stream_options(stream, output_index)
+        output_index += 1
+    return command + codecs + muxer_options(plan) + [output_file]
+
+def write_concat_list(list_file, segment_files):
+    with open(list_file, 'w', encoding='utf-8') as f:
+        for segment_file in segment_files:
+            escaped = segment_file.replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+def convert_segmented(input_file, output_file, output_format, ffmpeg_path='ffmpeg', progress=None,
+                      ffprobe_path='ffprobe', encoders=None, segments=None, preset=None):
+    # Splits the main video stream at keyframes, encodes the segments in
+    # parallel ffmpeg processes and joins them with the concat demuxer.
+    # Anything this can't help with (a remux, an unknown duration, a short
+    # clip) goes through convert_video instead. Returns a report with the
+    # per-segment timings and the speedup over encoding them one by one.
+    if os.path.exists(output_file) and os.path.samefile(input_file, output_file):
+        raise ValueError(f"Output would overwrite the input: {output_file}")
+    remove_old_output(output_file)
+    media = probe_media(input_file, ffprobe_path) if ffprobe_path else None
+    plan = plan_streams(media["streams"], output_format, encoders, preset) if media else []
+    video = next((stream for stream in plan if stream["type"] == "video" and stream["action"] == TRANSCODE), None)
+    duration = media["duration"] if media else None
+    segments = segments or (default_segments(duration) if duration else 1)
+    if duration:
+        segments = min(segments, max(1, int(duration // MIN_SEGMENT_SECONDS)))
+    if video is None or segments < 2:
+        convert_video(input_file, output_file, output_format, ffmpeg_path, progress, ffprobe_path, None, encoders,
+                      preset)
+        return {"output": output_file, "segments": []}
+
+    if progress:
+        progress(f"Finding keyframes for {segments} segments...")
+    split_points = [duration * number / segments for number in range(1, segments)]
+    starts = split_at_keyframes(duration, segments, probe_keyframes(input_file, video["index"], split_points,
+                                                                       ffprobe_path))
+    if len(starts) < 2:
+        convert_video(input_file, output_file, output_format, ffmpeg_path, progress, ffprobe_path, None, encoders,
+                      preset)
+        return {"output": output_file, "segments": []}
+
+    # Next to the output, so the join reads from the same disk it writes to
+    work_folder = tempfile.mkdtemp(prefix=".segments-", dir=os.path.dirname(os.path.abspath(output_file)))
+    threads = segment_threads(len(starts))
+    segment_progress = SegmentProgress(duration, progress)
+    timings = [None] * len(starts)
+    segment_files = [os.path.join(work_folder, f"segment{index:04d}.mkv") for index in range(len(starts))]
+
+    def encode(index):
+        start = starts[index]
+        last = index + 1 == len(starts)
+        length = (duration if last else starts[index + 1]) - start
+        started = time.perf_counter()
+        try:
+            # The last segment runs to the end of the file, whatever the
+            # container said the duration was
+            run_ffmpeg(segment_command(input_file, segment_files[index], start, None if last else length,
+                                       video, ffmpeg_path, threads),
+                       length, segment_progress.segment_progress(index, length))
+        except BaseException:
+            segment_progress.stopped.set()
+            raise
+        seconds = time.perf_counter() - started
+        timings[index] = {"index": index, "start": round(start, 3), "length": round(length, 3),
+                          "seconds": round(seconds, 3), "speed": round(length / seconds, 2) if seconds else None}
+
+    try:
+        encode_started = time.perf_counter()
+        pool = ThreadPoolExecutor(max_workers=len(starts), thread_name_prefix="segment")
+        try:
+            futures = [pool.submit(encode, index) for index in range(len(starts))]
+            # Once one segment fails the others stop with SegmentStopped;
+            # the error worth reporting is the one that stopped them
+            failures = [future.exception() for future in as_completed(futures) if future.exception() is not None]
+            genuine = [error for error in failures if not isinstance(error, SegmentStopped)]
+            if failures:
+                raise (genuine or failures)[0]
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        encode_seconds = time.perf_counter() - encode_started
+
+        list_file = os.path.join(work_folder, "segments.txt")
+        write_concat_list(list_file, segment_files)
+        join_started = time.perf_counter()
+
+        def join_progress(message, done=None, total=None, bytes_done=None, bytes_total=None, fraction=None,
+                          eta=None):
+            if progress:
+                progress(message, fraction=ENCODE_SHARE + (1 - ENCODE_SHARE) * (fraction or 0), eta=eta)
+
+        try:
+            run_ffmpeg(join_command(list_file, input_file, output_file, plan, video["index"], ffmpeg_path),
+                       duration, join_progress, "Joining")
+        except BaseException:
+            if os.path.exists(output_file):
+                os.remove(output_file)
+            raise
+        join_seconds = time.perf_counter() - join_started
+    finally:
+        shutil.rmtree(work_folder, ignore_errors=True)
+
+    serial_seconds = sum(timing["seconds"] for timing in timings)
+    return {
+        "output": output_file,
+        "segments": timings,
+        "threads": threads,
+        "encode_seconds": round(encode_seconds, 3),
+        "join_seconds": round(join_seconds, 3),
+        # What the same segments took added up, against the wall clock
+        "speedup": round(serial_seconds / encode_seconds, 2) if encode_seconds else None,
+    }
+
+def format_segment_report(report):
+    if not report["segments"]:
+        return "not split"
+    lines = [f"{len(report['segments'])} segments at -threads {report['threads']}: encoded in "
+             f"{report['encode_seconds']:.1f}s ({report['speedup']:.2f}x faster than one after another), "
+             f"joined in {report['join_seconds']:.1f}s"]
+    for timing in report["segments"]:
+        lines.append(f"    segment {timing['index'] + 1}: {timing['start']:.1f}s +{timing['length']:.1f}s "
+                     f"in {timing['seconds']:.1f}s ({timing['speed']:.2f}x)")
+    return '\n'.join(lines)
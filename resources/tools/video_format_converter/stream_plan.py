@@ -0,0 +1,168 @@
+import json
+import subprocess
+from resources.tools.video_format_converter.presets import encoder_options
+
+COPY = "copy"
+TRANSCODE = "transcode"
+DROP = "drop"
+
+# Codecs each container can hold as-is, by stream type. A stream whose codec
+# is listed is copied (a remux runs at disk speed); anything else is
+# re-encoded with the first available encoder from ENCODERS.
+CONTAINER_CODECS = {
+    'mp4': {
+        "video": {'h264', 'hevc', 'av1', 'vp9', 'mpeg4', 'mpeg2video', 'mpeg1video'},
+        "audio": {'aac', 'mp3', 'ac3', 'eac3', 'alac', 'opus', 'flac'},
+        "subtitle": {'mov_text'},
+    },
+    'mov': {
+        "video": {'h264', 'hevc', 'prores', 'mpeg4', 'mjpeg', 'mpeg2video', 'dnxhd', 'png'},
+        "audio": {'aac', 'mp3', 'ac3', 'eac3', 'alac', 'pcm_s16le', 'pcm_s24le', 'pcm_s16be', 'pcm_s24be'},
+        "subtitle": {'mov_text'},
+    },
+    'mkv': {
+        "video": {'h264', 'hevc', 'av1', 'vp8', 'vp9', 'mpeg4', 'mpeg2video', 'mpeg1video', 'msmpeg4v3',
+                  'mjpeg', 'prores', 'ffv1', 'theora', 'dnxhd', 'vc1', 'wmv3', 'h263'},
+        "audio": {'aac', 'mp3', 'mp2', 'ac3', 'eac3', 'dts', 'truehd', 'flac', 'vorbis', 'opus', 'alac',
+                  'pcm_s16le', 'pcm_s24le', 'pcm_s32le', 'pcm_f32le', 'wmav2'},
+        "subtitle": {'subrip', 'ass', 'ssa', 'webvtt', 'hdmv_pgs_subtitle', 'dvd_subtitle', 'dvb_subtitle'},
+    },
+    'webm': {
+        "video": {'vp8', 'vp9', 'av1'},
+        "audio": {'vorbis', 'opus'},
+        "subtitle": {'webvtt'},
+    },
+    'avi': {
+        "video": {'mpeg4', 'mjpeg', 'msmpeg4v2', 'msmpeg4v3', 'ffv1', 'huffyuv'},
+        "audio": {'mp3', 'mp2', 'ac3', 'pcm_s16le'},
+        "subtitle": set(),
+    },
+}
+
+# Copies ffmpeg only muxes without -strict experimental since 4.3 (opus
+# in mp4) and 6.0 (flac in mp4). The flag does no harm on newer builds, so
+# it's always passed rather than asking which version is installed.
+EXPERIMENTAL_COPIES = {'mp4': {'opus', 'flac'}}
+
+# Encoders in order of preference; ffmpeg builds without the libraries
+# fall back to the built-in ones
+H264_ENCODERS = ['libx264', 'libopenh264', 'mpeg4']
+ENCODERS = {
+    'mp4': {"video": H264_ENCODERS, "audio": ['aac'], "subtitle": ['mov_text']},
+    'mov': {"video": H264_ENCODERS, "audio": ['aac'], "subtitle": ['mov_text']},
+    'mkv': {"video": H264_ENCODERS, "audio": ['aac'], "subtitle": ['ass']},
+    'webm': {"video": ['libvpx-vp9', 'libvpx', 'libaom-av1'], "audio": ['libopus', 'libvorbis'],
+             "subtitle": ['webvtt']},
+    'avi': {"video": ['mpeg4'], "audio": ['libmp3lame', 'ac3'], "subtitle": []},
+}
+
+# Picture subtitles can't be turned into the text formats mp4/mov/webm take
+TEXT_SUBTITLES = {'subrip', 'ass', 'ssa', 'webvtt', 'mov_text', 'text'}
+# Containers that keep cover art (an attached picture) as a stream
+COVER_ART_FORMATS = {'mp4', 'mov', 'mkv'}
+
+def probe_media(input_file, ffprobe_path='ffprobe'):
+    # Returns {"duration": seconds or None, "streams": [...]}, or None when
+    # ffprobe can't read the file
+    command = [ffprobe_path, '-v', 'error', '-show_entries',
+               'format=duration:stream=index,codec_type,codec_name,width,height,bit_rate'
+               ':stream_disposition=attached_pic',
+               '-of', 'json', input_file]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=30)
+        info = json.loads(result.stdout or "{}")
+    except (OSError, subprocess.TimeoutExpired, ValueError):
+        return None
+    if result.returncode != 0 or "streams" not in info:
+        return None
+    try:
+        duration = float(info.get("format", {}).get("duration"))
+    except (TypeError, ValueError):
+        duration = None  # "N/A" for streams without a known length
+    return {"duration": duration if duration and duration > 0 else None, "streams": info["streams"]}
+
+def pick_encoder(candidates, encoders=None):
+    # encoders is the set ffmpeg reports; None means assume the first works
+    for encoder in candidates:
+        if encoders is None or encoder in encoders:
+            return encoder
+    return candidates[0] if candidates else None
+
+def plan_stream(stream, output_format, encoders=None, transcode_video=False):
+    kind = stream.get("codec_type")
+    codec = stream.get("codec_name")
+    allowed = CONTAINER_CODECS[output_format]
+    if kind == "video" and stream.get("disposition", {}).get("attached_pic"):
+        if output_format in COVER_ART_FORMATS and codec in ('mjpeg', 'png'):
+            return COPY, None
+        return DROP, None
+    if kind == "video" and transcode_video:
+        # A size target needs the video re-encoded even if it would fit
+        return TRANSCODE, pick_encoder(ENCODERS[output_format][kind], encoders)
+    if kind == "attachment":
+        # Fonts for styled subtitles; only Matroska carries them
+        return (COPY, None) if output_format == 'mkv' else (DROP, None)
+    if kind not in allowed:
+        return DROP, None  # Data streams (timecode tracks and the like) aren't converted
+    if codec in allowed[kind]:
+        return COPY, None
+    if kind == "subtitle" and codec not in TEXT_SUBTITLES:
+        return DROP, None
+    encoder = pick_encoder(ENCODERS[output_format][kind], encoders)
+    return (TRANSCODE, encoder) if encoder else (DROP, None)
+
+def plan_streams(streams, output_format, encoders=None, preset=None, transcode_video=False):
+    # Decides copy, transcode or drop for every input stream on its own, so
+    # a file whose video fits the container only has its audio re-encoded.
+    # preset (see presets.PRESETS) sets the options of the encoded streams.
+    plan = []
+    for stream in streams:
+        action, encoder = plan_stream(stream, output_format, encoders, transcode_video)
+        kind = stream.get("codec_type")
+        plan.append({"index": stream["index"], "type": kind, "codec": stream.get("codec_name"),
+                     "action": action, "encoder": encoder,
+                     "options": encoder_options(encoder, preset, kind) if action == TRANSCODE else [],
+                     "experimental": action == COPY and stream.get("codec_name") in
+                                     EXPERIMENTAL_COPIES.get(output_format, ())})
+    return plan
+
+def is_remux(plan):
+    return all(stream["action"] != TRANSCODE for stream in plan)
+
+def stream_arguments(plan):
+    # -map keeps every planned stream (not just ffmpeg's one video + one
+    # audio default); -c:N applies to the Nth output stream
+    arguments = []
+    for stream in plan:
+        if stream["action"] != DROP:
+            arguments += ['-map', f"0:{stream['index']}"]
+    output_index = 0
+    for stream in plan:
+        if stream["action"] == DROP:
+            continue
+        arguments += stream_options(stream, output_index)
+        output_index += 1
+    return arguments + muxer_options(plan)
+
+def muxer_options(plan):
+    if any(stream.get("experimental") and stream["action"] != DROP for stream in plan):
+        return ['-strict', 'experimental']
+    return []
+
+def stream_options(stream, output_index):
+    # The codec and encoder options for one output stream
+    if stream["action"] != TRANSCODE:
+        return [f"-c:{output_index}", 'copy']
+    arguments = [f"-c:{output_index}", stream["encoder"]]
+    for option, value in stream.get("options", ()):
+        arguments += [f"-{option}:{output_index}", value]
+    return arguments
+
+def describe_plan(plan):
+    parts = []
+    for stream in plan:
+        if stream["action"] == COPY:
+            parts.append(f"{stream['type']} {stream['codec']}: copy")
+        elif stream["action"] == TRANSCODE:
+            parts.append(f"{stream['type']} {stream['codec']}: {stream['encoder']}")
+    return ", ".join(parts)
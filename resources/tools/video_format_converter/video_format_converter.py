@@ -1,56 +1,104 @@
 import os
 import sys
 import subprocess
-import shutil
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
                                QLabel, QFileDialog, QProgressBar, QMessageBox,
-                               QComboBox)
-from PySide6.QtCore import Qt, Signal, QThread
-
-class ConversionThread(QThread):
-    update_progress = Signal(str)
-    conversion_complete = Signal(str)
-
-    def __init__(self, input_file, output_file, output_format):
-        super().__init__()
-        self.input_file = input_file
-        self.output_file = output_file
-        self.output_format = output_format
-
-    def run(self):
-        try:
-            if self.output_format == 'mp4':
-                # For MP4, we can use -codec copy for faster conversion if possible
-                subprocess.run(['ffmpeg', '-i', self.input_file, '-codec', 'copy', self.output_file], check=True)
-            else:
-                # For other formats, we'll use the default encoding
-                subprocess.run(['ffmpeg', '-i', self.input_file, self.output_file], check=True)
-            self.conversion_complete.emit(self.output_file)
-        except subprocess.CalledProcessError as e:
-            self.update_progress.emit(f"An error occurred: {str(e)}")
+                               QComboBox, QCheckBox, QDoubleSpinBox)
+from PySide6.QtCore import Qt
+from resources.services.capabilities import get_capability_service
+from resources.services.job_scheduler import get_job_scheduler, CPU, DONE, FAILED, CANCELLED, FINISHED_STATES
+from resources.widgets.jobs_panel import get_job_events, format_eta, format_duration, format_bytes
+from resources.tools.video_format_converter.conversion_engine import default_output_folder, OUTPUT_FORMATS
+from resources.tools.video_format_converter.presets import PRESETS, DEFAULT_PRESET, preset_threads
+from resources.tools.video_format_converter.calibration import estimate_conversion
+from resources.tools.video_format_converter.conversion_cache import get_conversion_cache, get_output_log
+from resources.tools.video_format_converter.conversion_queue import (plan_conversions, convert_queue,
+                                                                     format_queue_result, SKIPPED, FAILED as FILE_FAILED)
 
 class VideoFormatConverter(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Video Format Converter")
         self.setMinimumWidth(400)
+        self.job = None
+        self.estimate_job = None
         self.setup_ui()
+        get_job_events().job_event.connect(self.on_job_event)
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
 
-        self.select_button = QPushButton("Select Video File")
+        select_layout = QHBoxLayout()
+        self.select_button = QPushButton("Select Video Files")
         self.select_button.clicked.connect(self.select_file)
-        layout.addWidget(self.select_button)
+        select_layout.addWidget(self.select_button)
+
+        self.select_folder_button = QPushButton("Select Folder")
+        self.select_folder_button.clicked.connect(self.select_folder)
+        select_layout.addWidget(self.select_folder_button)
+        layout.addLayout(select_layout)
 
-        self.progress_label = QLabel("Select a video file to convert")
+        self.progress_label = QLabel("Select video files or a folder to convert")
+        self.progress_label.setWordWrap(True)
         layout.addWidget(self.progress_label)
 
         self.format_combo = QComboBox()
-        self.format_combo.addItems(['mp4', 'avi', 'mkv', 'mov', 'webm'])
+        self.format_combo.addItems(OUTPUT_FORMATS)
         layout.addWidget(QLabel("Select output format:"))
         layout.addWidget(self.format_combo)
 
+        output_layout = QHBoxLayout()
+        self.output_label = QLabel()
+        output_layout.addWidget(self.output_label, 1)
+        self.output_button = QPushButton("Change...")
+        self.output_button.clicked.connect(self.select_output_folder)
+        output_layout.addWidget(self.output_button)
+        layout.addLayout(output_layout)
+
+        preset_layout = QHBoxLayout()
+        preset_layout.addWidget(QLabel("Preset:"))
+        self.preset_combo = QComboBox()
+        for key, label in PRESETS.items():
+            self.preset_combo.addItem(label, key)
+        self.preset_combo.setCurrentIndex(list(PRESETS).index(DEFAULT_PRESET))
+        preset_layout.addWidget(self.preset_combo, 1)
+        layout.addLayout(preset_layout)
+
+        target_layout = QHBoxLayout()
+        self.target_checkbox = QCheckBox("Target size per file (MB, two-pass):")
+        self.target_checkbox.toggled.connect(self.target_toggled)
+        target_layout.addWidget(self.target_checkbox)
+        self.target_spin = QDoubleSpinBox()
+        self.target_spin.setRange(1, 1000000)
+        self.target_spin.setValue(100)
+        self.target_spin.setEnabled(False)
+        self.target_spin.editingFinished.connect(self.request_estimate)
+        target_layout.addWidget(self.target_spin)
+        layout.addLayout(target_layout)
+
+        self.segmented_checkbox = QCheckBox("Split long videos into segments encoded in parallel")
+        self.segmented_checkbox.setToolTip("Uses every core on one file at a time; best for long videos")
+        layout.addWidget(self.segmented_checkbox)
+
+        cache_layout = QHBoxLayout()
+        self.cache_checkbox = QCheckBox("Reuse earlier conversions of the same file and settings")
+        self.cache_checkbox.setChecked(True)
+        cache_layout.addWidget(self.cache_checkbox, 1)
+        self.clear_cache_button = QPushButton("Clear Cache")
+        self.clear_cache_button.clicked.connect(self.clear_cache)
+        cache_layout.addWidget(self.clear_cache_button)
+        layout.addLayout(cache_layout)
+
+        self.cache_label = QLabel()
+        self.cache_label.setStyleSheet("color: #888;")
+        layout.addWidget(self.cache_label)
+
+        self.estimate_label = QLabel()
+        self.estimate_label.setStyleSheet("color: #888;")
+        self.estimate_label.setWordWrap(True)
+        layout.addWidget(self.estimate_label)
+        self.format_combo.currentIndexChanged.connect(self.request_estimate)
+
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
         layout.addWidget(self.progress_bar)
@@ -61,6 +109,12 @@ class VideoFormatConverter(QDialog):
         self.convert_button.setEnabled(False)
         button_layout.addWidget(self.convert_button)
 
+        # The dialog is modal, so the Jobs panel can't be reached from here
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_conversion)
+        self.cancel_button.setVisible(False)
+        button_layout.addWidget(self.cancel_button)
+
         self.open_folder_button = QPushButton("Open Output Folder")
         self.open_folder_button.clicked.connect(self.open_output_folder)
         self.open_folder_button.setVisible(False)
@@ -68,43 +122,191 @@ class VideoFormatConverter(QDialog):
 
         layout.addLayout(button_layout)
 
-        self.input_file = ""
-        self.output_folder = os.path.expanduser("~/Desktop")
+        self.inputs = []
+        self.output_folder = default_output_folder()
+        self.output_label.setText(f"Output folder: {self.output_folder}")
+        self.update_cache_label()
 
     def select_file(self):
         file_dialog = QFileDialog(self)
-        self.input_file, _ = file_dialog.getOpenFileName(self, "Select video file", "", "Video files (*.mp4 *.avi *.mkv *.mov *.webm)")
-        if self.input_file:
-            self.progress_label.setText(f"Selected file: {os.path.basename(self.input_file)}")
-            self.convert_button.setEnabled(True)
+        input_files, _ = file_dialog.getOpenFileNames(self, "Select video files", "", "Video files (*.mp4 *.avi *.mkv *.mov *.webm)")
+        if input_files:
+            self.set_inputs(input_files)
+
+    def select_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select folder of videos")
+        if folder:
+            self.set_inputs([folder])
+
+    def set_inputs(self, inputs):
+        self.inputs = inputs
+        if len(inputs) == 1:
+            self.progress_label.setText(f"Selected: {os.path.basename(os.path.normpath(inputs[0]))}")
+        else:
+            self.progress_label.setText(f"Selected {len(inputs)} files")
+        self.convert_button.setEnabled(True)
+        self.request_estimate()
+
+    def target_toggled(self, checked):
+        # Two passes over split segments would need a shared rate control
+        self.target_spin.setEnabled(checked)
+        self.segmented_checkbox.setEnabled(not checked)
+        if checked:
+            self.segmented_checkbox.setChecked(False)
+        self.request_estimate()
+
+    def target_size(self):
+        return int(self.target_spin.value() * 1024 * 1024) if self.target_checkbox.isChecked() else None
+
+    def request_estimate(self):
+        # Calibrates the encoders once (cached) and probes the inputs in the
+        # background, then shows the expected time for every preset
+        if self.estimate_job is not None and self.estimate_job.state not in FINISHED_STATES:
+            get_job_scheduler().cancel(self.estimate_job.id)
+        self.estimate_job = None
+        capabilities = get_capability_service()
+        if not self.inputs or not capabilities.is_available('ffmpeg') or not capabilities.is_available('ffprobe'):
+            self.estimate_label.setText("")
+            return
+        output_format = self.format_combo.currentText()
+        plan = plan_conversions(self.inputs, output_format, self.output_folder)
+        if not plan:
+            self.estimate_label.setText("")
+            return
+        ffmpeg_path, ffprobe_path = capabilities.path('ffmpeg'), capabilities.path('ffprobe')
+        encoders, version = capabilities.encoders(), capabilities.version('ffmpeg')
+        target_size = self.target_size()
+        self.estimate_label.setText("Estimating conversion time...")
+        self.estimate_job = get_job_scheduler().submit(
+            "Estimate conversion time",
+            lambda context: estimate_conversion(plan, output_format, ffmpeg_path, ffprobe_path, encoders, version,
+                                                target_size, context.progress),
+            kind=CPU)
+
+    def show_estimate(self, estimates):
+        parts = [f"{PRESETS[key]} {format_duration(seconds)}" for key, seconds in estimates.items()]
+        self.estimate_label.setText("Estimated time: " + ", ".join(parts))
+
+    def update_cache_label(self):
+        summary = get_conversion_cache().summary()
+        self.cache_label.setText(
+            f"Cache: {summary['hits']} hits, {summary['misses']} misses, "
+            f"{format_duration(summary['saved_seconds'])} of encoding saved; "
+            f"{summary['entries']} files, {format_bytes(summary['bytes'])} of {format_bytes(summary['limit'])}")
+
+    def clear_cache(self):
+        get_conversion_cache().clear()
+        self.update_cache_label()
+
+    def select_output_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select output folder", self.output_folder)
+        if folder:
+            self.output_folder = folder
+            self.output_label.setText(f"Output folder: {folder}")
 
     def start_conversion(self):
         if not self.check_dependencies():
             return
 
         output_format = self.format_combo.currentText()
-        base_name = os.path.splitext(os.path.basename(self.input_file))[0]
-        output_file = os.path.join(self.output_folder, f"{base_name}.{output_format}")
-
-        self.conversion_thread = ConversionThread(self.input_file, output_file, output_format)
-        self.conversion_thread.update_progress.connect(self.update_progress_label)
-        self.conversion_thread.conversion_complete.connect(self.conversion_finished)
-        
-        self.conversion_thread.start()
+        plan = plan_conversions(self.inputs, output_format, self.output_folder)
+        if not plan:
+            self.update_progress_label("No video files found in the selection")
+            return
+
+        ffmpeg_path = get_capability_service().path('ffmpeg')
+        ffprobe_path = get_capability_service().path('ffprobe')
+        encoders = get_capability_service().encoders()
+        segmented = self.segmented_checkbox.isChecked()
+        preset = self.preset_combo.currentData()
+        target_size = self.target_size()
+        cache = get_conversion_cache() if self.cache_checkbox.isChecked() else None
+        name = os.path.basename(plan[0]["input"]) if len(plan) == 1 else f"{len(plan)} videos"
+        # Runs in the shared scheduler, so it keeps going (and shows in the
+        # Jobs panel) if this dialog is closed. The queue runs its own ffmpeg
+        # processes in parallel, sized to the cores.
+        self.job = get_job_scheduler().submit(
+            f"Convert {name} to {output_format}",
+            lambda context: convert_queue(plan, output_format, ffmpeg_path, context.progress, ffprobe_path,
+                                          preset_threads(preset), encoders=encoders, segmented=segmented,
+                                          preset=preset, target_size=target_size, cache=cache,
+                                          outputs=get_output_log()),
+            kind=CPU)
+
         self.progress_bar.setVisible(True)
-        self.progress_bar.setRange(0, 0)  # Indeterminate progress
-        self.convert_button.setEnabled(False)
-        self.select_button.setEnabled(False)
+        self.progress_bar.setRange(0, 0)  # Indeterminate until ffmpeg reports a position
+        self.set_controls_enabled(False)
+
+    def cancel_conversion(self):
+        if self.job is not None:
+            get_job_scheduler().cancel(self.job.id)
+            self.cancel_button.setEnabled(False)
+            self.update_progress_label("Cancelling...")
+
+    def set_controls_enabled(self, enabled):
+        self.cancel_button.setVisible(not enabled)
+        self.cancel_button.setEnabled(not enabled)
+        for widget in (self.convert_button, self.select_button, self.select_folder_button, self.output_button,
+                       self.preset_combo, self.target_checkbox, self.cache_checkbox, self.clear_cache_button):
+            widget.setEnabled(enabled)
+        self.target_spin.setEnabled(enabled and self.target_checkbox.isChecked())
+        self.segmented_checkbox.setEnabled(enabled and not self.target_checkbox.isChecked())
+
+    def on_job_event(self, event):
+        if self.estimate_job is not None and event["job"] == self.estimate_job.id:
+            if event["state"] == DONE:
+                self.show_estimate(event["result"])
+            elif event["state"] == FAILED:
+                self.estimate_label.setText(f"Couldn't estimate the time: {event['error']}")
+            return
+        if self.job is None or event["job"] != self.job.id:
+            return
+        if event["state"] == DONE:
+            self.conversion_finished(event["result"])
+        elif event["state"] in (FAILED, CANCELLED):
+            self.progress_bar.setVisible(False)
+            self.set_controls_enabled(True)
+            if event["state"] == FAILED:
+                self.update_progress_label(f"An error occurred: {event['error']}")
+            else:
+                self.update_progress_label("Conversion cancelled")
+        else:
+            self.update_progress(event)
+
+    def update_progress(self, event):
+        if event["fraction"] is not None:
+            self.progress_bar.setRange(0, 1000)
+            self.progress_bar.setValue(int(event["fraction"] * 1000))
+        if event["message"]:
+            eta = format_eta(event["eta"])
+            self.update_progress_label(f"{event['message']}, {eta}" if eta else event["message"])
 
     def update_progress_label(self, message):
         self.progress_label.setText(message)
 
-    def conversion_finished(self, output_file):
+    def conversion_finished(self, result):
         self.progress_bar.setVisible(False)
-        self.progress_label.setText(f"Conversion complete: {os.path.basename(output_file)}")
+        self.set_controls_enabled(True)
         self.open_folder_button.setVisible(True)
-        self.convert_button.setEnabled(True)
-        self.select_button.setEnabled(True)
+        self.update_cache_label()
+        report = format_queue_result(result)
+        files = result["files"]
+        if len(files) == 1 and files[0]["status"] == FILE_FAILED:
+            self.progress_label.setText(f"An error occurred: {files[0]['error']}")
+        elif len(files) == 1 and files[0]["status"] == SKIPPED:
+            self.progress_label.setText(f"Already up to date: {os.path.basename(files[0]['output'])}")
+        elif len(files) == 1 and files[0].get("cached"):
+            self.progress_label.setText(f"Reused an earlier conversion ({format_duration(files[0]['saved_seconds'])} "
+                                        f"saved): {os.path.basename(files[0]['output'])}")
+        elif len(files) == 1 and not files[0].get("segmented", {}).get("segments"):
+            self.progress_label.setText(f"Conversion complete: {os.path.basename(files[0]['output'])}")
+        else:
+            # Batches and segmented encodes come with per-file/per-segment timings
+            self.progress_label.setText(report.splitlines()[0])
+            message = QMessageBox(QMessageBox.Information, "Conversion complete", report.splitlines()[0],
+                                  QMessageBox.Ok, self)
+            message.setDetailedText(report)
+            message.exec()
 
     def open_output_folder(self):
         if sys.platform.startswith('win'):
@@ -115,11 +317,12 @@ class VideoFormatConverter(QDialog):
             subprocess.run(['xdg-open', self.output_folder])
 
     def check_dependencies(self):
-        if not shutil.which('ffmpeg'):
+        if not get_capability_service().is_available('ffmpeg'):
             QMessageBox.critical(self, "Error", "ffmpeg not found. Please install it first.")
             return False
         return True
 
 def show_video_format_converter(parent):
     dialog = VideoFormatConverter(parent)
+    dialog.setAttribute(Qt.WA_DeleteOnClose)
     dialog.exec()
\ No newline at end of file
@@ -0,0 +1,297 @@
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait
+from resources.tools.video_format_converter.conversion_queue import collect_videos, up_to_date
+from resources.tools.video_format_converter.stream_plan import probe_media
+
+RESOURCE_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Thumbnails live next to their video, so they move and get deleted with
+# it; read-only folders get theirs here instead
+THUMBNAIL_FOLDER = ".thumbnails"
+FALLBACK_FOLDER = os.path.join(RESOURCE_PATH, "user", "thumbnails")
+
+CORES = os.cpu_count() or 2
+# A keyframe seek mostly waits on the disk and decodes a single frame, so
+# there can be more of them running than there are cores
+SEEK_WORKERS = max(4, CORES)
+# Videos being probed and tiled at once, keeping the seek pool busy
+VIDEO_WORKERS = max(2, CORES // 2)
+SEEK_TIMEOUT = 30
+
+SHEET = "sheet"
+SPRITE = "sprite"
+KINDS = {SHEET: "Contact sheet", SPRITE: "Sprite + WebVTT"}
+# A contact sheet is for looking at; a sprite is for a player's seek bar
+# preview, so it has more, smaller, unpadded tiles and a .vtt saying which
+# tile covers which time
+LAYOUTS = {
+    SHEET: {"columns": 4, "rows": 4, "width": 320, "padding": 4, "margin": 8, "quality": 3},
+    SPRITE: {"columns": 10, "rows": 10, "width": 160, "padding": 0, "margin": 0, "quality": 5},
+}
+
+MADE = "made"
+CACHED = "cached"
+FAILED = "failed"
+
+def thumbnail_folder(input_file):
+    folder = os.path.join(os.path.dirname(os.path.abspath(input_file)), THUMBNAIL_FOLDER)
+    try:
+        os.makedirs(folder, exist_ok=True)
+        if os.access(folder, os.W_OK):
+            return folder
+    except OSError:
+        pass
+    source = hashlib.blake2b(os.path.dirname(os.path.abspath(input_file)).encode(), digest_size=8).hexdigest()
+    folder = os.path.join(FALLBACK_FOLDER, source)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+def thumbnail_paths(input_file, kind, layout):
+    # The layout is part of the name, so changing it makes new images
+    # rather than reusing ones with the wrong grid
+    name = f"{os.path.basename(input_file)}.{kind}-{layout['columns']}x{layout['rows']}-{layout['width']}"
+    folder = thumbnail_folder(input_file)
+    image = os.path.join(folder, name + ".jpg")
+    return image, os.path.join(folder, name + ".vtt") if kind == SPRITE else None
+
+def seek_times(duration, count):
+    # The middle of each equal slice, so neither the black first frame nor
+    # the end credits take a tile
+    return [(index + 0.5) * duration / count for index in range(count)]
+
+def main_video_stream(streams):
+    return next((stream for stream in streams if stream.get("codec_type") == "video"
+                 and not stream.get("disposition", {}).get("attached_pic")), None)
+
+def frame_size(stream, width):
+    # Every tile gets the same size, taken from the video's aspect ratio;
+    # both sides even, as the scaler wants
+    if stream.get("width") and stream.get("height"):
+        height = round(width * stream["height"] / stream["width"] / 2) * 2
+    else:
+        height = round(width * 9 / 16 / 2) * 2
+    return width, max(2, height)
+
+def seek_command(ffmpeg_path, input_file, position, stream_index, width, height, frame_file):
+    # Input-side -ss jumps straight to the keyframe at or before the
+    # position (-noaccurate_seek stops ffmpeg decoding on to the exact time)
+    # and -skip_frame nokey keeps the decoder off everything in between, so
+    # one thumbnail costs one decoded frame. That keyframe comes out with a
+    # negative timestamp, which the default frame sync would drop; -vsync
+    # rather than -fps_mode, which ffmpeg 4 doesn't have.
+    scale = (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+             f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2")
+    return [ffmpeg_path, '-v', 'error', '-y', '-threads', '1', '-skip_frame', 'nokey', '-noaccurate_seek',
+            '-ss', f"{position:.3f}", '-i', input_file, '-map', f"0:{stream_index}", '-an', '-sn', '-dn',
+            '-vsync', 'passthrough', '-frames:v', '1', '-vf', scale, '-update', '1', frame_file]
+
+def grab_frame(command, frame_file):
+    try:
+        subprocess.run(command, capture_output=True, stdin=subprocess.DEVNULL, timeout=SEEK_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return frame_file if os.path.exists(frame_file) and os.path.getsize(frame_file) else None
+
+def tile_command(ffmpeg_path, frame_pattern, layout, image_file):
+    # ffmpeg's tile filter lays the frames out left to right, top to bottom;
+    # a short last row is filled with the background
+    tile = (f"tile={layout['columns']}x{layout['rows']}:padding={layout['padding']}:margin={layout['margin']}:"
+            f"color=black")
+    return [ffmpeg_path, '-v', 'error', '-y', '-framerate', '1', '-i', frame_pattern, '-vf', tile,
+            '-frames:v', '1', '-q:v', str(layout['quality']), image_file]
+
+def vtt_time(seconds):
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
+
+def write_vtt(vtt_file, image_file, starts, duration, layout, width, height):
+    # One cue per tile, from its slice's start to the next tile's
+    name = os.path.basename(image_file)
+    with open(vtt_file, 'w', encoding='utf-8') as f:
+        f.write("WEBVTT\n")
+        for tile, start in enumerate(starts):
+            end = starts[tile + 1] if tile + 1 < len(starts) else duration
+            column, row = tile % layout["columns"], tile // layout["columns"]
+            x = layout["margin"] + column * (width + layout["padding"])
+            y = layout["margin"] + row * (height + layout["padding"])
+            f.write(f"\n{vtt_time(start)} --> {vtt_time(end)}\n{name}#xywh={x},{y},{width},{height}\n")
+
+def make_thumbnails(input_file, kind=SHEET, ffmpeg_path='ffmpeg', ffprobe_path='ffprobe', seek_pool=None,
+                    progress=None, layout=None):
+    # Seeks to one keyframe per tile in parallel (on seek_pool, shared by a
+    # whole batch) and tiles the scaled frames into one JPEG. Results newer
+    # than the video are reused as they are.
+    layout = layout or LAYOUTS[kind]
+    image_file, vtt_file = thumbnail_paths(input_file, kind, layout)
+    result = {"input": input_file, "output": image_file}
+    if vtt_file:
+        result["vtt"] = vtt_file
+    if up_to_date(input_file, image_file) and (vtt_file is None or up_to_date(input_file, vtt_file)):
+        result["status"] = CACHED
+        return result
+
+    media = probe_media(input_file, ffprobe_path)
+    if media is None:
+        raise ValueError("ffprobe couldn't read the file")
+    stream = main_video_stream(media["streams"])
+    if stream is None:
+        raise ValueError("No video stream")
+    if not media["duration"]:
+        raise ValueError("The video's duration is unknown")
+    count = layout["columns"] * layout["rows"]
+    width, height = frame_size(stream, layout["width"])
+    positions = seek_times(media["duration"], count)
+
+    work_folder = tempfile.mkdtemp(prefix=".frames-", dir=os.path.dirname(image_file))
+    own_pool = seek_pool is None
+    if own_pool:
+        seek_pool = ThreadPoolExecutor(max_workers=SEEK_WORKERS, thread_name_prefix="seek")
+    futures = []
+    try:
+        for index, position in enumerate(positions):
+            frame_file = os.path.join(work_folder, f"seek{index:04d}.png")
+            futures.append(seek_pool.submit(grab_frame, seek_command(ffmpeg_path, input_file, position,
+                                                                     stream["index"], width, height, frame_file),
+                                            frame_file))
+        frames = []
+        try:
+            for index, future in enumerate(futures):
+                frames.append(future.result())
+                if progress:
+                    progress(f"{os.path.basename(input_file)}: {index + 1}/{count} frames", index + 1, count)
+        except BaseException:
+            # Cancelled: drop the queued seeks and let the running ones
+            # finish before their folder goes
+            for future in futures:
+                future.cancel()
+            wait(futures)
+            raise
+
+        # A seek past the last keyframe (or into a damaged part) gives no
+        # frame; the rest close up, and the .vtt follows what was found
+        starts = []
+        for index, frame_file in enumerate(frames):
+            if frame_file:
+                os.rename(frame_file, os.path.join(work_folder, f"tile{len(starts):04d}.png"))
+                starts.append(index * media["duration"] / count)
+        if not starts:
+            raise RuntimeError("ffmpeg couldn't read any frames")
+        # Written in the work folder and moved into place, so an interrupted
+        # run never leaves a half-written image that looks up to date
+        tiled_file = os.path.join(work_folder, "tiled.jpg")
+        process = subprocess.run(tile_command(ffmpeg_path, os.path.join(work_folder, "tile%04d.png"), layout,
+                                              tiled_file),
+                                 capture_output=True, text=True, stdin=subprocess.DEVNULL)
+        if process.returncode != 0 or not os.path.exists(tiled_file):
+            lines = process.stderr.strip().splitlines()
+            raise RuntimeError(lines[-1] if lines else f"ffmpeg exited with code {process.returncode}")
+        if vtt_file:
+            write_vtt(os.path.join(work_folder, "tiled.vtt"), image_file, starts, media["duration"], layout,
+                      width, height)
+            os.replace(os.path.join(work_folder, "tiled.vtt"), vtt_file)
+        os.replace(tiled_file, image_file)
+    finally:
+        if own_pool:
+            seek_pool.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(work_folder, ignore_errors=True)
+    result["status"] = MADE
+    result["frames"] = len(starts)
+    return result
+
+class BatchProgress:
+    # Counts frames across every video in flight; a reused result counts
+    # as all of its frames at once
+    def __init__(self, total_files, frames_per_file, progress):
+        self.progress = progress
+        self.total_files = total_files
+        self.frames_total = total_files * frames_per_file
+        self.frames_per_file = frames_per_file
+        self.files_done = 0
+        self.frames = {}
+        self.lock = threading.Lock()
+
+    def file_progress(self, input_file):
+        def progress(message, done=None, total=None, bytes_done=None, bytes_total=None, fraction=None, eta=None):
+            with self.lock:
+                self.frames[input_file] = done or 0
+                self.report()
+        return progress
+
+    def finish(self, input_file):
+        with self.lock:
+            self.frames[input_file] = self.frames_per_file
+            self.files_done += 1
+            self.report()
+
+    def report(self):
+        if self.progress is None:
+            return
+        frames = sum(self.frames.values())
+        self.progress(f"{self.files_done}/{self.total_files} videos, {frames}/{self.frames_total} frames",
+                      self.files_done, self.total_files, fraction=frames / self.frames_total)
+
+def make_thumbnails_batch(paths, kind=SHEET, ffmpeg_path='ffmpeg', ffprobe_path='ffprobe', progress=None,
+                          on_file=None, layout=None):
+    # Files, or folders searched recursively like the converter does.
+    # Several videos are handled at once and all of their seeks share one
+    # pool, so a folder of short clips keeps every core busy too.
+    layout = layout or LAYOUTS[kind]
+    videos = [video for video, subfolder in collect_videos(paths)]
+    batch_progress = BatchProgress(len(videos), layout["columns"] * layout["rows"], progress)
+    records = []
+    records_lock = threading.Lock()
+    started = time.perf_counter()
+    seek_pool = ThreadPoolExecutor(max_workers=SEEK_WORKERS, thread_name_prefix="seek")
+
+    def make(input_file):
+        file_started = time.perf_counter()
+        try:
+            record = make_thumbnails(input_file, kind, ffmpeg_path, ffprobe_path, seek_pool,
+                                     batch_progress.file_progress(input_file), layout)
+        except (OSError, ValueError, RuntimeError) as e:
+            record = {"input": input_file, "status": FAILED, "error": str(e)}
+        record["seconds"] = round(time.perf_counter() - file_started, 3)
+        with records_lock:
+            records.append(record)
+        batch_progress.finish(input_file)
+        if on_file:
+            on_file(record)
+
+    video_pool = ThreadPoolExecutor(max_workers=VIDEO_WORKERS, thread_name_prefix="thumbnails")
+    try:
+        for future in [video_pool.submit(make, video) for video in videos]:
+            future.result()
+    finally:
+        video_pool.shutdown(wait=True, cancel_futures=True)
+        seek_pool.shutdown(wait=True, cancel_futures=True)
+
+    order = {video: index for index, video in enumerate(videos)}
+    records.sort(key=lambda record: order[record["input"]])
+    return {
+        "kind": kind,
+        "files": records,
+        "made": sum(1 for record in records if record["status"] == MADE),
+        "cached": sum(1 for record in records if record["status"] == CACHED),
+        "failed": sum(1 for record in records if record["status"] == FAILED),
+        "frames": sum(record.get("frames", 0) for record in records),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+def format_thumbnail_result(result):
+    lines = [f"{result['made']} made ({result['frames']} keyframes), {result['cached']} reused, "
+             f"{result['failed']} failed in {result['seconds']:.1f}s"]
+    for record in result["files"]:
+        name = os.path.basename(record["input"])
+        if record["status"] == MADE:
+            lines.append(f"{name}: {record['frames']} frames in {record['seconds']:.1f}s")
+        elif record["status"] == CACHED:
+            lines.append(f"{name}: up to date")
+        else:
+            lines.append(f"{name}: failed, {record['error']}")
+    return '\n'.join(lines)
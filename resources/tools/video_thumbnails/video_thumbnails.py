@@ -0,0 +1,164 @@
+import os
+import sys
+import subprocess
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFileDialog,
+                               QProgressBar, QMessageBox, QComboBox, QListWidget, QListWidgetItem, QListView)
+from PySide6.QtGui import QIcon, QPixmap
+from PySide6.QtCore import Qt, QSize
+from resources.services.capabilities import get_capability_service
+from resources.services.job_scheduler import get_job_scheduler, IO, DONE, FAILED, CANCELLED
+from resources.widgets.jobs_panel import get_job_events, format_eta
+from resources.tools.video_thumbnails.thumbnail_engine import (make_thumbnails_batch, format_thumbnail_result,
+                                                               KINDS, FAILED as FILE_FAILED)
+
+PREVIEW_WIDTH = 320
+
+class VideoThumbnails(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Video Thumbnails")
+        self.setMinimumSize(720, 520)
+        self.job = None
+        self.inputs = []
+        self.setup_ui()
+        get_job_events().job_event.connect(self.on_job_event)
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        select_layout = QHBoxLayout()
+        self.select_button = QPushButton("Select Video Files")
+        self.select_button.clicked.connect(self.select_files)
+        select_layout.addWidget(self.select_button)
+
+        self.select_folder_button = QPushButton("Select Folder")
+        self.select_folder_button.clicked.connect(self.select_folder)
+        select_layout.addWidget(self.select_folder_button)
+
+        self.kind_combo = QComboBox()
+        for key, label in KINDS.items():
+            self.kind_combo.addItem(label, key)
+        select_layout.addWidget(self.kind_combo)
+        layout.addLayout(select_layout)
+
+        self.progress_label = QLabel("Select video files or a folder; thumbnails are saved next to each video")
+        self.progress_label.setWordWrap(True)
+        layout.addWidget(self.progress_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+
+        # The finished sheets; double-click opens one full size
+        self.preview_list = QListWidget()
+        self.preview_list.setViewMode(QListView.IconMode)
+        self.preview_list.setResizeMode(QListView.Adjust)
+        self.preview_list.setIconSize(QSize(PREVIEW_WIDTH, PREVIEW_WIDTH))
+        self.preview_list.setSpacing(6)
+        self.preview_list.itemDoubleClicked.connect(self.open_image)
+        layout.addWidget(self.preview_list, 1)
+
+        self.generate_button = QPushButton("Generate")
+        self.generate_button.clicked.connect(self.start_generation)
+        self.generate_button.setEnabled(False)
+        layout.addWidget(self.generate_button)
+
+    def select_files(self):
+        input_files, _ = QFileDialog.getOpenFileNames(self, "Select video files", "",
+                                                      "Video files (*.mp4 *.avi *.mkv *.mov *.webm)")
+        if input_files:
+            self.set_inputs(input_files)
+
+    def select_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select folder of videos")
+        if folder:
+            self.set_inputs([folder])
+
+    def set_inputs(self, inputs):
+        self.inputs = inputs
+        if len(inputs) == 1:
+            self.progress_label.setText(f"Selected: {os.path.basename(os.path.normpath(inputs[0]))}")
+        else:
+            self.progress_label.setText(f"Selected {len(inputs)} files")
+        self.generate_button.setEnabled(True)
+
+    def start_generation(self):
+        capabilities = get_capability_service()
+        if not capabilities.is_available('ffmpeg') or not capabilities.is_available('ffprobe'):
+            QMessageBox.critical(self, "Error", "ffmpeg and ffprobe are needed. Please install ffmpeg first.")
+            return
+        ffmpeg_path, ffprobe_path = capabilities.path('ffmpeg'), capabilities.path('ffprobe')
+        kind = self.kind_combo.currentData()
+        inputs = list(self.inputs)
+        self.preview_list.clear()
+        # Mostly seeks and short ffmpeg runs, so it goes with the I/O jobs;
+        # the engine runs its own pool of seeks
+        self.job = get_job_scheduler().submit(
+            f"Thumbnails for {len(inputs)} selections" if len(inputs) > 1
+            else f"Thumbnails for {os.path.basename(os.path.normpath(inputs[0]))}",
+            lambda context: make_thumbnails_batch(inputs, kind, ffmpeg_path, ffprobe_path, context.progress),
+            kind=IO)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.set_controls_enabled(False)
+
+    def set_controls_enabled(self, enabled):
+        for widget in (self.generate_button, self.select_button, self.select_folder_button, self.kind_combo):
+            widget.setEnabled(enabled)
+
+    def on_job_event(self, event):
+        if self.job is None or event["job"] != self.job.id:
+            return
+        if event["state"] == DONE:
+            self.generation_finished(event["result"])
+        elif event["state"] in (FAILED, CANCELLED):
+            self.progress_bar.setVisible(False)
+            self.set_controls_enabled(True)
+            if event["state"] == FAILED:
+                self.progress_label.setText(f"An error occurred: {event['error']}")
+            else:
+                self.progress_label.setText("Cancelled")
+        else:
+            if event["fraction"] is not None:
+                self.progress_bar.setRange(0, 1000)
+                self.progress_bar.setValue(int(event["fraction"] * 1000))
+            if event["message"]:
+                eta = format_eta(event["eta"])
+                self.progress_label.setText(f"{event['message']}, {eta}" if eta else event["message"])
+
+    def generation_finished(self, result):
+        self.progress_bar.setVisible(False)
+        self.set_controls_enabled(True)
+        report = format_thumbnail_result(result)
+        self.progress_label.setText(report.splitlines()[0])
+        for record in result["files"]:
+            if record["status"] != FILE_FAILED:
+                self.add_preview(record)
+        if result["failed"]:
+            message = QMessageBox(QMessageBox.Warning, "Thumbnails", f"{result['failed']} videos failed",
+                                  QMessageBox.Ok, self)
+            message.setDetailedText(report)
+            message.exec()
+
+    def add_preview(self, record):
+        pixmap = QPixmap(record["output"])
+        if pixmap.isNull():
+            return
+        item = QListWidgetItem(QIcon(pixmap), os.path.basename(record["input"]))
+        item.setData(Qt.UserRole, record["output"])
+        item.setToolTip(record["output"])
+        self.preview_list.addItem(item)
+
+    def open_image(self, item):
+        path = item.data(Qt.UserRole)
+        if sys.platform.startswith('win'):
+            os.startfile(path)
+        elif sys.platform.startswith('darwin'):
+            subprocess.run(['open', path])
+        else:
+            subprocess.run(['xdg-open', path])
+
+def show_video_thumbnails(parent):
+    dialog = VideoThumbnails(parent)
+    dialog.setAttribute(Qt.WA_DeleteOnClose)
+    dialog.exec()
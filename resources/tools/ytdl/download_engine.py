@@ -0,0 +1,38 @@
+import os
+import subprocess
+
+def default_output_folder():
+    return os.path.expanduser("~/Downloads")
+
+def video_command(url, output_folder, yt_dlp_path='yt-dlp'):
+    return [
+        yt_dlp_path,
+        '-f', 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
+        '--merge-output-format', 'mp4',
+        '-o', os.path.join(output_folder, '%(title)s.%(ext)s'),
+        url
+    ]
+
+def audio_command(url, output_folder, yt_dlp_path='yt-dlp'):
+    return [
+        yt_dlp_path,
+        '-f', 'bestaudio',
+        '--extract-audio',
+        '--audio-format', 'mp3',
+        '--audio-quality', '0',  # 0 is the best quality
+        '-o', os.path.join(output_folder, '%(title)s.%(ext)s'),
+        url
+    ]
+
+def run_command(command):
+    return subprocess.run(command, check=True)
+
+def download_highest_quality_video(url, output_folder, yt_dlp_path='yt-dlp', progress=None, runner=run_command):
+    if progress:
+        progress("Downloading video...")
+    runner(video_command(url, output_folder, yt_dlp_path))
+
+def download_highest_quality_audio(url, output_folder, yt_dlp_path='yt-dlp', progress=None, runner=run_command):
+    if progress:
+        progress("Downloading audio...")
+    runner(audio_command(url, output_folder, yt_dlp_path))
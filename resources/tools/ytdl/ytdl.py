@@ -4,59 +4,21 @@ import os
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
                                QLabel, QLineEdit, QProgressBar, QMessageBox,
                                QCheckBox, QFileDialog)
-from PySide6.QtCore import Qt, Signal, QThread
-
-class DownloadThread(QThread):
-    update_progress = Signal(str)
-    download_complete = Signal(str)
-
-    def __init__(self, url, download_video, download_audio, output_folder):
-        super().__init__()
-        self.url = url
-        self.download_video = download_video
-        self.download_audio = download_audio
-        self.output_folder = output_folder
-
-    def run(self):
-        try:
-            if self.download_video:
-                self.download_highest_quality_video()
-            if self.download_audio:
-                self.download_highest_quality_audio()
-            self.download_complete.emit(self.output_folder)
-        except subprocess.CalledProcessError as e:
-            self.update_progress.emit(f"An error occurred: {str(e)}")
-
-    def download_highest_quality_video(self):
-        command = [
-            'yt-dlp',
-            '-f', 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
-            '--merge-output-format', 'mp4',
-            '-o', os.path.join(self.output_folder, '%(title)s.%(ext)s'),
-            self.url
-        ]
-        self.update_progress.emit("Downloading video...")
-        subprocess.run(command, check=True)
-
-    def download_highest_quality_audio(self):
-        command = [
-            'yt-dlp',
-            '-f', 'bestaudio',
-            '--extract-audio',
-            '--audio-format', 'mp3',
-            '--audio-quality', '0',  # 0 is the best quality
-            '-o', os.path.join(self.output_folder, '%(title)s.%(ext)s'),
-            self.url
-        ]
-        self.update_progress.emit("Downloading audio...")
-        subprocess.run(command, check=True)
+from PySide6.QtCore import Qt
+from resources.services.capabilities import get_capability_service
+from resources.services.job_scheduler import get_job_scheduler, IO, DONE, FAILED, CANCELLED
+from resources.widgets.jobs_panel import get_job_events
+from resources.tools.ytdl.download_engine import (download_highest_quality_video, download_highest_quality_audio,
+                                                  default_output_folder)
 
 class YouTubeDownloader(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("YouTube Downloader")
         self.setMinimumWidth(400)
+        self.job = None
         self.setup_ui()
+        get_job_events().job_event.connect(self.on_job_event)
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -73,7 +35,7 @@ class YouTubeDownloader(QDialog):
         self.audio_checkbox.setChecked(True)
         layout.addWidget(self.audio_checkbox)
 
-        self.output_folder = os.path.expanduser("~/Downloads")
+        self.output_folder = default_output_folder()
         self.output_folder_label = QLabel(f"Output folder: {self.output_folder}")
         layout.addWidget(self.output_folder_label)
 
@@ -114,20 +76,59 @@ class YouTubeDownloader(QDialog):
             QMessageBox.warning(self, "Error", "Please select at least one download option")
             return
 
-        self.download_thread = DownloadThread(
-            url, 
-            self.video_checkbox.isChecked(), 
-            self.audio_checkbox.isChecked(),
-            self.output_folder
-        )
-        self.download_thread.update_progress.connect(self.update_progress_label)
-        self.download_thread.download_complete.connect(self.download_finished)
-        
-        self.download_thread.start()
+        yt_dlp_path = self.ensure_yt_dlp()
+        if not yt_dlp_path:
+            return
+
+        download_video = self.video_checkbox.isChecked()
+        download_audio = self.audio_checkbox.isChecked()
+        output_folder = self.output_folder
+
+        def download(context):
+            if download_video:
+                download_highest_quality_video(url, output_folder, yt_dlp_path, context.progress, context.run_process)
+            if download_audio:
+                download_highest_quality_audio(url, output_folder, yt_dlp_path, context.progress, context.run_process)
+            return output_folder
+
+        self.job = get_job_scheduler().submit(f"Download {url}", download, kind=IO)
         self.progress_bar.setVisible(True)
         self.download_button.setEnabled(False)
         self.progress_label.setText("Download in Progress...")
 
+    def ensure_yt_dlp(self):
+        capabilities = get_capability_service()
+        if not capabilities.is_available('yt-dlp'):
+            answer = QMessageBox.question(self, "yt-dlp not found",
+                                          "yt-dlp is required to download videos. Install it now?")
+            if answer != QMessageBox.Yes:
+                return None
+            try:
+                install_yt_dlp()
+            except subprocess.CalledProcessError as e:
+                QMessageBox.critical(self, "Error", f"Failed to install yt-dlp: {str(e)}")
+                return None
+            capabilities.refresh('yt-dlp')
+        path = capabilities.path('yt-dlp')
+        if not path:
+            QMessageBox.critical(self, "Error", "yt-dlp was installed but could not be found on PATH.")
+        return path
+
+    def on_job_event(self, event):
+        if self.job is None or event["job"] != self.job.id:
+            return
+        if event["state"] == DONE:
+            self.download_finished(event["result"])
+        elif event["state"] in (FAILED, CANCELLED):
+            self.progress_bar.setVisible(False)
+            self.download_button.setEnabled(True)
+            if event["state"] == FAILED:
+                self.update_progress_label(f"An error occurred: {event['error']}")
+            else:
+                self.update_progress_label("Download cancelled")
+        elif event["message"]:
+            self.update_progress_label(event["message"])
+
     def update_progress_label(self, message):
         self.progress_label.setText(message)
 
@@ -150,19 +151,8 @@ class YouTubeDownloader(QDialog):
 
 def show_youtube_downloader(parent):
     dialog = YouTubeDownloader(parent)
+    dialog.setAttribute(Qt.WA_DeleteOnClose)
     dialog.exec()
 
-def is_yt_dlp_installed():
-    try:
-        subprocess.run(['yt-dlp', '--version'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        return True
-    except FileNotFoundError:
-        return False
-
 def install_yt_dlp():
     subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'yt-dlp'])
-
-# Check and install yt-dlp if not installed
-if not is_yt_dlp_installed():
-    print("Installing yt-dlp...")
-    install_yt_dlp()
\ No newline at end of file
@@ -1,7 +1,8 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QCalendarWidget, QLabel, 
                                QHBoxLayout, QScrollArea)
-from PySide6.QtGui import QPixmap, QPainter, QColor
-from PySide6.QtCore import Qt, QDate, QSize, QRect
+from PySide6.QtGui import QPainter, QColor
+from PySide6.QtCore import QDate, QSize, QRect
+from resources.services.asset_cache import get_asset_cache
 
 class CalendarReminderWidget(QWidget):
     def __init__(self, social_blackbook=None):
@@ -64,8 +65,7 @@ class CalendarReminderWidget(QWidget):
                 
                 if contact.photo_path:
                     photo_label = QLabel()
-                    pixmap = QPixmap(contact.photo_path)
-                    photo_label.setPixmap(pixmap.scaled(30, 30, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+                    photo_label.setPixmap(get_asset_cache().pixmap(contact.photo_path, (30, 30)))
                     event_layout.addWidget(photo_label)
                 
                 event_label = QLabel(f"{date.toString('yyyy-MM-dd')}: {contact.name} - {description}")
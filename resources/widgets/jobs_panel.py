@@ -0,0 +1,131 @@
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                               QProgressBar, QListWidget, QListWidgetItem)
+from PySide6.QtCore import QObject, Signal
+from resources.services.job_scheduler import (get_job_scheduler, QUEUED, RUNNING, DONE, FAILED,
+                                              CANCELLED, FINISHED_STATES)
+
+class JobEvents(QObject):
+    # Scheduler callbacks fire on worker threads; re-emitting them from a
+    # QObject owned by the GUI thread queues them onto the event loop
+    job_event = Signal(dict)
+
+_job_events = None
+
+def get_job_events():
+    global _job_events
+    if _job_events is None:
+        _job_events = JobEvents()
+        get_job_scheduler().subscribe(_job_events.job_event.emit)
+    return _job_events
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+def format_eta(seconds):
+    if seconds is None:
+        return ""
+    return f"{format_duration(seconds)} left"
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+class JobRow(QWidget):
+    def __init__(self, event, parent=None):
+        super().__init__(parent)
+        self.job_id = event["job"]
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 2, 5, 2)
+
+        header_layout = QHBoxLayout()
+        self.name_label = QLabel(event["name"])
+        header_layout.addWidget(self.name_label, 1)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(lambda: get_job_scheduler().cancel(self.job_id))
+        header_layout.addWidget(self.cancel_button)
+        layout.addLayout(header_layout)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        layout.addWidget(self.progress_bar)
+
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("color: #888;")
+        layout.addWidget(self.status_label)
+
+        self.update_event(event)
+
+    def update_event(self, event):
+        state = event["state"]
+        fraction = event["fraction"]
+        if state == RUNNING and fraction is None:
+            self.progress_bar.setRange(0, 0)  # Indeterminate progress
+        else:
+            self.progress_bar.setRange(0, 1000)
+            self.progress_bar.setValue(1000 if state == DONE else int((fraction or 0) * 1000))
+
+        details = []
+        if event["items_total"]:
+            details.append(f"{event['items_done'] or 0}/{event['items_total']} items")
+        if event["bytes_total"]:
+            details.append(f"{format_bytes(event['bytes_done'] or 0)} of {format_bytes(event['bytes_total'])}")
+        if state == RUNNING:
+            details.append(format_eta(event["eta"]))
+        if state == FAILED:
+            details.append(f"Failed: {event['error']}")
+        elif state in (QUEUED, CANCELLED, DONE):
+            details.append(state.capitalize())
+        elif event["message"]:
+            details.append(event["message"])
+        self.status_label.setText("  ".join(detail for detail in details if detail))
+        self.cancel_button.setVisible(state not in FINISHED_STATES)
+
+class JobsPanel(QWidget):
+    active_count_changed = Signal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = {}
+        self.states = {}
+        layout = QVBoxLayout(self)
+
+        self.job_list = QListWidget()
+        layout.addWidget(self.job_list)
+
+        self.clear_button = QPushButton("Clear Finished")
+        self.clear_button.clicked.connect(self.clear_finished)
+        layout.addWidget(self.clear_button)
+
+        get_job_events().job_event.connect(self.on_job_event)
+
+    def on_job_event(self, event):
+        row = self.rows.get(event["job"])
+        if row is None:
+            item = QListWidgetItem(self.job_list)
+            row = JobRow(event)
+            item.setSizeHint(row.sizeHint())
+            self.job_list.setItemWidget(item, row)
+            self.rows[event["job"]] = row
+        else:
+            row.update_event(event)
+        self.states[event["job"]] = event["state"]
+        self.active_count_changed.emit(self.active_count())
+
+    def active_count(self):
+        return sum(1 for state in self.states.values() if state not in FINISHED_STATES)
+
+    def clear_finished(self):
+        get_job_scheduler().clear_finished()
+        for i in reversed(range(self.job_list.count())):
+            item = self.job_list.item(i)
+            row = self.job_list.itemWidget(item)
+            if self.states.get(row.job_id) in FINISHED_STATES:
+                self.job_list.takeItem(i)
+                del self.rows[row.job_id]
+                del self.states[row.job_id]
+        self.active_count_changed.emit(self.active_count())
@@ -1,18 +1,22 @@
 import sys
 import os
-import json
 from datetime import datetime
-from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                               QPushButton, QLabel, QStatusBar, QMenu, QStackedWidget, QSlider, QMessageBox)
-from PySide6.QtGui import QFont, QIcon, QFontDatabase, QMovie
-from PySide6.QtCore import Qt, QSize, QTimer, QUrl, QSettings
-from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 
-# Import screen classes
-from screens.notebook import NotebookScreen
-from screens.rss_updates import RSSUpdatesScreen
-from screens.startup import StartupDialog, get_user_name
-from resources.widgets.calendar_reminder import CalendarReminderWidget
+# Imported first so that the Qt and application imports below can be timed
+from resources.services.startup_profiler import profiler, STARTUP_BUDGET_MS
+
+with profiler.phase("import qt"):
+    from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
+                                   QPushButton, QLabel, QStatusBar, QMenu, QStackedWidget, QSlider, QMessageBox,
+                                   QDockWidget)
+    from PySide6.QtCore import Qt, QSize, QTimer, QUrl, QSettings
+    from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
+
+with profiler.phase("import app modules"):
+    # Import screen classes
+    from screens.startup import StartupDialog, get_user_name
+    from screens.screen_manager import ScreenManager
+    from resources.widgets.calendar_reminder import CalendarReminderWidget
 
 
 # Update the base path for resources
@@ -26,24 +30,27 @@ if not os.path.exists(USER_FOLDER):
 sys.path.append(TOOLS_PATH)
 sys.path.append(RESOURCE_PATH)
 
-# Import and run library check
-from resources.library.library_manager import check_and_install_libraries
-check_and_install_libraries()
+# Import and run library check (cached; pass --check-deps to force a full re-verify)
+with profiler.phase("dependency check"):
+    from resources.library.library_manager import check_and_install_libraries
+    check_and_install_libraries(force="--check-deps" in sys.argv)
+
+with profiler.phase("import app modules"):
+    # Tools are described by manifests and imported on first use
+    from resources.tools.tool_registry import TOOL_MANIFESTS, DIALOG, get_manifest, load_tool_entry
+    from resources.services.capabilities import get_capability_service
+    from resources.services.settings_store import get_settings
+    from resources.services.asset_cache import get_asset_cache
+    from resources.services.job_scheduler import get_job_scheduler
+    from resources.widgets.jobs_panel import JobsPanel
 
-# Import tool functions
-from resources.tools.folder_scanner.folder_scanner import show_folder_scanner_dialog
-from resources.tools.video_format_converter.video_format_converter import show_video_format_converter
-from resources.tools.ytdl.ytdl import show_youtube_downloader
-from resources.tools.folder_encryptor.folder_encryptor import show_folder_encryptor_dialog
-from resources.tools.pdf_scraper.pdf_scraper import show_pdf_scraper_dialog
-from resources.tools.music_player.music_player import show_music_player
-from resources.tools.social_blackbook.social_blackbook import show_social_blackbook
-from resources.tools.macro_calculator.macro_calculator import show_macro_calculator
+PROFILE_STARTUP = "--profile-startup" in sys.argv
 
 class MainWindow(QMainWindow):
+    @profiler.timed("MainWindow.__init__")
     def __init__(self):
         super().__init__()
-        self.user_name = self.get_or_ask_user_name()
+        self.user_name = get_user_name()
         self.setWindowTitle("Mecha's Toolbox")
         self.setStyleSheet("""
             QMainWindow {
@@ -62,19 +69,19 @@ class MainWindow(QMainWindow):
                 background-color: #3e3e3e;
             }
         """)
-        self.setWindowIcon(QIcon(os.path.join(RESOURCE_PATH, "ui", "icon.png")))
+        self.assets = get_asset_cache()
+        self.setWindowIcon(self.assets.icon(os.path.join("ui", "icon.png")))
         
-        # Load custom font
-        font_id = QFontDatabase.addApplicationFont(os.path.join(RESOURCE_PATH, "font", "Orbitron", "Orbitron-VariableFont_wght.ttf"))
-        if font_id != -1:
-            font_family = QFontDatabase.applicationFontFamilies(font_id)[0]
-            self.custom_font = QFont(font_family)
-        else:
-            self.custom_font = QFont("Arial")  # Fallback font
+        # Load custom font (registered once, shared with the tools)
+        with profiler.phase("font registration"):
+            self.custom_font = self.assets.font()
+        self.gif_period = None
 
         self.calendar_widget = None
-        self.setup_audio()
-        self.setup_ui()
+        with profiler.phase("setup_audio"):
+            self.setup_audio()
+        with profiler.phase("setup_ui"):
+            self.setup_ui()
         
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_greeting)
@@ -82,14 +89,7 @@ class MainWindow(QMainWindow):
         self.timer.start(60000)  # Update every minute
 
         self.music_player = None
-
-    def get_or_ask_user_name(self):
-        name = get_user_name()
-        if not name:
-            dialog = StartupDialog(self)
-            if dialog.exec_():
-                name = get_user_name()
-        return name
+        get_settings().subscribe(self.on_user_name_changed, "user_name")
 
     def setup_audio(self):
         self.audio_output = QAudioOutput()
@@ -136,18 +136,33 @@ class MainWindow(QMainWindow):
         self.home_screen = QWidget()
         home_layout = QVBoxLayout(self.home_screen)
         
-        self.calendar_widget = CalendarReminderWidget()
+        with profiler.phase("CalendarReminderWidget"):
+            self.calendar_widget = CalendarReminderWidget()
         home_layout.addWidget(self.calendar_widget)
 
         self.stacked_widget.addWidget(self.home_screen)
         self.stacked_widget.setCurrentWidget(self.home_screen)
 
-
-        # Set the initial screen
-        self.stacked_widget.setCurrentWidget(self.home_screen)
+        # Tool screens are reused while alive and evicted when unused
+        self.screen_manager = ScreenManager(self.stacked_widget, self.home_screen)
+        self.social_blackbook = None
 
         self.setStatusBar(QStatusBar())
 
+        # Conversions, downloads and encryptions run in the shared job
+        # scheduler; the panel lists them and stays usable alongside any screen
+        self.jobs_panel = JobsPanel()
+        self.jobs_dock = QDockWidget("Jobs", self)
+        self.jobs_dock.setWidget(self.jobs_panel)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.jobs_dock)
+        self.jobs_dock.hide()
+        self.jobs_button = QPushButton("Jobs")
+        self.jobs_button.setStyleSheet("color: white;")
+        self.jobs_button.clicked.connect(self.toggle_jobs_panel)
+        self.statusBar().addPermanentWidget(self.jobs_button)
+        self.active_jobs = 0
+        self.jobs_panel.active_count_changed.connect(self.on_active_jobs_changed)
+
     def create_top_bar(self):
         top_bar = QHBoxLayout()
         
@@ -192,12 +207,13 @@ class MainWindow(QMainWindow):
         top_bar.addWidget(settings_button)
         
         self.update_greeting()
-        self.update_gifs()
+        with profiler.phase("update_gifs"):
+            self.update_gifs()
         
         return top_bar
 
     def create_menu_button(self):
-        menu_button = QPushButton(QIcon(os.path.join(RESOURCE_PATH, "ui", "icon.png")), "")
+        menu_button = QPushButton(self.assets.icon(os.path.join("ui", "icon.png")), "")
         menu_button.setFixedSize(50, 50)
         menu_button.setIconSize(QSize(40, 40))
         menu_button.setStyleSheet("""
@@ -213,7 +229,7 @@ class MainWindow(QMainWindow):
         return menu_button
 
     def create_settings_button(self):
-        settings_button = QPushButton(QIcon(os.path.join(RESOURCE_PATH, "ui", "cog.jpg")), "")
+        settings_button = QPushButton(self.assets.icon(os.path.join("ui", "cog.jpg")), "")
         settings_button.setFixedSize(50, 50)
         settings_button.setIconSize(QSize(40, 40))
         settings_button.setStyleSheet("background-color: transparent; border: none;")
@@ -233,15 +249,22 @@ class MainWindow(QMainWindow):
     def update_gifs(self):
         current_hour = datetime.now().hour
         if 5 <= current_hour < 12:
-            gif_path = os.path.join(RESOURCE_PATH, "ui", "morning.gif")
+            period = "morning"
         elif 12 <= current_hour < 18:
-            gif_path = os.path.join(RESOURCE_PATH, "ui", "afternoon.gif")
+            period = "afternoon"
         else:
-            gif_path = os.path.join(RESOURCE_PATH, "ui", "night.gif")
+            period = "night"
+        # Called every minute; only swap the movie when the period changes
+        if period == self.gif_period:
+            return
+        self.gif_period = period
+        gif_path = os.path.join("ui", f"{period}.gif")
         
-        if os.path.exists(gif_path):
-            movie = QMovie(gif_path)
-            movie.setScaledSize(QSize(50, 50))
+        movie = self.assets.movie(gif_path, (50, 50))
+        if movie.isValid():
+            previous = self.left_gif.movie()
+            if previous is not None:
+                previous.stop()
             self.left_gif.setMovie(movie)
             self.right_gif.setMovie(movie)
             movie.start()
@@ -251,29 +274,22 @@ class MainWindow(QMainWindow):
 
     def change_volume(self, value):
         volume = value / 100.0
-        if self.music_player and self.stacked_widget.currentWidget() == self.music_player:
+        if self.music_player and self.screen_manager.current_key() == "music_player":
             self.music_player.set_volume(value)
         else:
             self.audio_output.setVolume(volume)
         self.save_volume(value)
 
     def save_volume(self, value):
-        settings_path = os.path.join(USER_FOLDER, "settings.json")
-        settings = {}
-        if os.path.exists(settings_path):
-            with open(settings_path, "r") as f:
-                settings = json.load(f)
-        settings["volume"] = value
-        with open(settings_path, "w") as f:
-            json.dump(settings, f)
+        # Debounced by the settings store, so slider drags coalesce into one write
+        get_settings().set("volume", value)
 
     def load_volume(self):
-        settings_path = os.path.join(USER_FOLDER, "settings.json")
-        if os.path.exists(settings_path):
-            with open(settings_path, "r") as f:
-                settings = json.load(f)
-                return settings.get("volume", 50)
-        return 50
+        return get_settings().get("volume", 50)
+
+    def on_user_name_changed(self, key, value):
+        self.user_name = value
+        self.update_greeting()
 
     def open_settings(self):
         # Implement settings dialog here
@@ -294,112 +310,118 @@ class MainWindow(QMainWindow):
                 background-color: #3e3e3e;
             }
         """)
-        notebook_action = menu.addAction("Notebook")
-        notebook_action.triggered.connect(self.show_notebook)
-        rss_updates_action = menu.addAction("RSS Updates")
-        rss_updates_action.triggered.connect(self.show_rss_updates)
-        social_blackbook_action = menu.addAction("Social Blackbook")
-        social_blackbook_action.triggered.connect(self.show_social_blackbook)
-        
-        # Add other tools here
-        youtube_downloader_action = menu.addAction("YouTube Downloader")
-        youtube_downloader_action.triggered.connect(self.show_youtube_downloader)
-        folder_scanner_action = menu.addAction("Folder Scanner")
-        folder_scanner_action.triggered.connect(self.show_folder_scanner)
-        video_converter_action = menu.addAction("Video Format Converter")
-        video_converter_action.triggered.connect(self.show_video_format_converter)
-        folder_encryptor_action = menu.addAction("Folder Encryptor")
-        folder_encryptor_action.triggered.connect(self.show_folder_encryptor)
-        pdf_scraper_action = menu.addAction("PDF Scraper")
-        pdf_scraper_action.triggered.connect(self.show_pdf_scraper)
-        music_player_action = menu.addAction("Music Player")
-        music_player_action.triggered.connect(self.show_music_player)
-        macro_calculator_action = menu.addAction("Macro Calculator")
-        macro_calculator_action.triggered.connect(self.show_macro_calculator)
+        for manifest in TOOL_MANIFESTS:
+            action = menu.addAction(manifest.name)
+            action.triggered.connect(lambda checked=False, key=manifest.key: self.open_tool(key))
         
         menu.exec(self.menu_button.mapToGlobal(self.menu_button.rect().bottomLeft()))
 
     def go_back(self):
-        if self.stacked_widget.currentWidget() == self.music_player:
+        current = self.screen_manager.current_key()
+        if current == "music_player":
             self.music_player.stop_playback()
             self.media_player.play()  # Resume menu music when exiting music player
             # Restore menu music volume when leaving music player
             saved_volume = self.load_volume()
             self.audio_output.setVolume(saved_volume / 100.0)
             self.volume_slider.setValue(saved_volume)
-        elif self.stacked_widget.currentWidget() == self.social_blackbook:
+        elif current == "social_blackbook":
             # Update the calendar widget when returning from social blackbook
             self.calendar_widget.set_social_blackbook(self.social_blackbook)
-        self.stacked_widget.setCurrentWidget(self.home_screen)
+        self.screen_manager.show_home()
         self.back_button.setVisible(False)
 
+    def open_tool(self, key):
+        # Screens need MainWindow-specific wiring; dialogs just get a parent
+        handler = getattr(self, f"show_{key}", None)
+        if handler is not None:
+            handler()
+        elif get_manifest(key).kind == DIALOG:
+            load_tool_entry(key)(self)
+
     def show_notebook(self):
-        notebook_screen = NotebookScreen(self.stacked_widget)
-        self.stacked_widget.addWidget(notebook_screen)
-        self.stacked_widget.setCurrentWidget(notebook_screen)
+        self.screen_manager.show_screen("notebook", lambda: load_tool_entry("notebook")(self.stacked_widget))
         self.back_button.setVisible(True)
 
     def show_rss_updates(self):
-        rss_updates_screen = RSSUpdatesScreen(self.stacked_widget)
-        self.stacked_widget.addWidget(rss_updates_screen)
-        self.stacked_widget.setCurrentWidget(rss_updates_screen)
+        self.screen_manager.show_screen("rss_updates", lambda: load_tool_entry("rss_updates")(self.stacked_widget))
         self.back_button.setVisible(True)
 
-    def show_youtube_downloader(self):
-        show_youtube_downloader(self)
-
-    def show_folder_scanner(self):
-        show_folder_scanner_dialog(self)
-
-    def show_video_format_converter(self):
-        show_video_format_converter(self)
-
-    def show_folder_encryptor(self):
-        show_folder_encryptor_dialog(self)
-
-    def show_pdf_scraper(self):
-        show_pdf_scraper_dialog(self)
-
     def show_social_blackbook(self):
-        self.social_blackbook = show_social_blackbook(self)
-        self.stacked_widget.addWidget(self.social_blackbook)
-        self.stacked_widget.setCurrentWidget(self.social_blackbook)
+        self.social_blackbook = self.screen_manager.show_screen(
+            "social_blackbook", lambda: load_tool_entry("social_blackbook")(self))
         self.back_button.setVisible(True)
 
         # Update the calendar widget with the loaded social blackbook
         self.calendar_widget.set_social_blackbook(self.social_blackbook)
 
     def show_music_player(self):
-        if self.music_player is None:
-            self.music_player = show_music_player(self, USER_FOLDER)
-            self.music_player.music_started.connect(self.on_music_player_started)
-            self.music_player.music_stopped.connect(self.on_music_player_stopped)
-            self.stacked_widget.addWidget(self.music_player)
-        self.stacked_widget.setCurrentWidget(self.music_player)
+        # Pinned: the player owns its own QMediaPlayer and playlist state
+        self.music_player = self.screen_manager.show_screen("music_player", self.create_music_player, pinned=True)
         self.back_button.setVisible(True)
         self.media_player.pause()  # Pause the menu music
         # Set the music player volume to match the current volume
         self.music_player.set_volume(self.volume_slider.value())
 
+    def create_music_player(self):
+        music_player = load_tool_entry("music_player")(self, USER_FOLDER)
+        music_player.music_started.connect(self.on_music_player_started)
+        music_player.music_stopped.connect(self.on_music_player_stopped)
+        return music_player
+
     def on_music_player_started(self):
         self.media_player.pause()  # Ensure menu music is paused when music player starts
 
     def on_music_player_stopped(self):
-        if self.stacked_widget.currentWidget() == self.music_player:
+        if self.screen_manager.current_key() == "music_player":
             self.media_player.play()  # Resume menu music if still on music player screen and no music is playing
 
     def update_volume_slider(self, value):
         self.volume_slider.setValue(value)
 
+    def toggle_jobs_panel(self):
+        self.jobs_dock.setVisible(not self.jobs_dock.isVisible())
+
+    def on_active_jobs_changed(self, count):
+        if count > self.active_jobs:
+            self.jobs_dock.show()
+        self.active_jobs = count
+        self.jobs_button.setText(f"Jobs ({count})" if count else "Jobs")
+
     def show_macro_calculator(self):
-        macro_calculator = show_macro_calculator(self, USER_FOLDER)
-        self.stacked_widget.addWidget(macro_calculator)
-        self.stacked_widget.setCurrentWidget(macro_calculator)
+        self.screen_manager.show_screen("macro_calculator", lambda: load_tool_entry("macro_calculator")(self, USER_FOLDER))
         self.back_button.setVisible(True)
 
+def ask_user_name():
+    # First run only. Asked before the window is built so the time spent
+    # typing isn't counted as startup time.
+    if not get_user_name():
+        StartupDialog().exec_()
+
+def finish_startup_profile(app):
+    profiler.mark("time to window")
+    table_path, trace_path = profiler.write_report()
+    print(profiler.report_table())
+    print(f"\nStartup report: {table_path}\nChrome trace: {trace_path}")
+    over_budget = profiler.check_budget(STARTUP_BUDGET_MS)
+    for name, duration, limit in over_budget:
+        print(f"Over budget: {name} took {duration:.1f} ms (budget {limit} ms)")
+    app.exit(1 if over_budget else 0)
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(get_settings().flush)
+    # Stops running ffmpeg/yt-dlp children instead of orphaning them
+    app.aboutToQuit.connect(get_job_scheduler().shutdown)
+    with profiler.excluded("user name prompt"):
+        ask_user_name()
     window = MainWindow()
     window.resize(800, 600)
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    if PROFILE_STARTUP:
+        # Runs on the first event-loop turn, i.e. once the window is usable
+        QTimer.singleShot(0, lambda: finish_startup_profile(app))
+    else:
+        # Probe ffmpeg/ffprobe/yt-dlp off the GUI thread once the window is up
+        QTimer.singleShot(0, get_capability_service().start_probe)
+    sys.exit(app.exec())
@@ -56,6 +56,14 @@ class NotebookScreen(QWidget):
                 self.save_vaults()
                 self.update_vault_view()
 
+    def suspend_screen(self):
+        # Drop the file system model (and its directory watchers) while hidden
+        self.tree_view.setModel(None)
+        self.model = None
+
+    def resume_screen(self):
+        self.update_vault_view()
+
     def update_vault_view(self):
         if self.vaults:
             self.model = QFileSystemModel()
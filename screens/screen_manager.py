@@ -0,0 +1,77 @@
+from collections import OrderedDict
+
+MAX_HIDDEN_SCREENS = 3
+
+# Keeps one live instance per screen key in the main QStackedWidget. Hidden
+# screens are kept in LRU order and the oldest ones beyond `max_hidden` are
+# removed and deleted. Screens may define suspend_screen()/resume_screen() to
+# pause work while they are hidden.
+class ScreenManager:
+    def __init__(self, stacked_widget, home_screen, max_hidden=MAX_HIDDEN_SCREENS):
+        self.stacked_widget = stacked_widget
+        self.home_screen = home_screen
+        self.max_hidden = max_hidden
+        self.screens = OrderedDict()
+        self.pinned = set()
+        self.current = None
+
+    def show_screen(self, key, factory, pinned=False):
+        screen = self.screens.get(key)
+        if screen is None:
+            screen = factory()
+            self.screens[key] = screen
+            self.stacked_widget.addWidget(screen)
+            if pinned:
+                self.pinned.add(key)
+            created = True
+        else:
+            created = False
+        # Showing the screen that's already up is a no-op for the hooks;
+        # resuming it again would restart work that never paused
+        switched = self.current != key
+        if switched:
+            self.suspend_current()
+        self.screens.move_to_end(key)
+        self.current = key
+        self.stacked_widget.setCurrentWidget(screen)
+        if switched and not created:
+            self.call_hook(screen, "resume_screen")
+        self.evict()
+        return screen
+
+    def show_home(self):
+        self.suspend_current()
+        self.current = None
+        self.stacked_widget.setCurrentWidget(self.home_screen)
+        self.evict()
+
+    def current_key(self):
+        return self.current
+
+    def get(self, key):
+        return self.screens.get(key)
+
+    def suspend_current(self):
+        if self.current is not None and self.current in self.screens:
+            self.call_hook(self.screens[self.current], "suspend_screen")
+
+    def evict(self):
+        hidden = [key for key in self.screens if key != self.current and key not in self.pinned]
+        for key in hidden[:max(0, len(hidden) - self.max_hidden)]:
+            self.close_screen(key)
+
+    def close_screen(self, key):
+        screen = self.screens.pop(key, None)
+        if screen is None:
+            return
+        self.pinned.discard(key)
+        if self.current == key:
+            self.current = None
+            self.stacked_widget.setCurrentWidget(self.home_screen)
+        self.stacked_widget.removeWidget(screen)
+        screen.deleteLater()
+
+    def call_hook(self, screen, name):
+        hook = getattr(screen, name, None)
+        if callable(hook):
+            hook()
@@ -1,10 +1,5 @@
-import os
-import json
 from PySide6.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton
-
-RESOURCE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-USER_DATA_PATH = os.path.join(RESOURCE_PATH, "resources", "user")
-SETTINGS_FILE = os.path.join(USER_DATA_PATH, "settings.json")
+from resources.services.settings_store import get_settings
 
 class StartupDialog(QDialog):
     def __init__(self, parent=None):
@@ -25,16 +20,12 @@ class StartupDialog(QDialog):
     def save_name(self):
         name = self.name_input.text().strip()
         if name:
-            os.makedirs(USER_DATA_PATH, exist_ok=True)
-            with open(SETTINGS_FILE, 'w') as f:
-                json.dump({"user_name": name}, f)
+            settings = get_settings()
+            settings.set("user_name", name)
+            settings.flush()
             self.accept()
         else:
             self.label.setText("Please enter a valid name:")
 
 def get_user_name():
-    if os.path.exists(SETTINGS_FILE):
-        with open(SETTINGS_FILE, 'r') as f:
-            settings = json.load(f)
-            return settings.get("user_name", "")
-    return ""
\ No newline at end of file
+    return get_settings().get("user_name", "")
\ No newline at end of file
@@ -0,0 +1,43 @@
+import os
+import shutil
+import tempfile
+import unittest
+from resources.tools.video_format_converter.conversion_queue import plan_conversions
+
+class PlanConversionsTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def make(self, *parts):
+        path = os.path.join(self.folder, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'x')
+        return path
+
+    def outputs(self, paths):
+        return [os.path.relpath(item["output"], os.path.join(self.folder, "out"))
+                for item in plan_conversions(paths, "mp4", os.path.join(self.folder, "out"))]
+
+    def test_same_name_from_two_folders(self):
+        first, second = self.make("card1", "C0001.MP4"), self.make("card2", "C0001.MP4")
+        self.assertEqual(self.outputs([first, second]), ["C0001.mp4", "C0001_mp4.mp4"])
+
+    def test_same_name_with_different_extensions(self):
+        self.make("clips", "clip.avi")
+        self.make("clips", "clip.mov")
+        self.assertEqual(self.outputs([os.path.join(self.folder, "clips")]), ["clip.mp4", "clip_mov.mp4"])
+
+    def test_numbered_once_the_extension_is_taken_too(self):
+        paths = [self.make(f"card{number}", "C0001.MP4") for number in range(3)]
+        self.assertEqual(self.outputs(paths), ["C0001.mp4", "C0001_mp4.mp4", "C0001_mp4_2.mp4"])
+
+    def test_folders_keep_their_layout(self):
+        self.make("clips", "a", "clip.avi")
+        self.make("clips", "b", "clip.avi")
+        self.assertEqual(self.outputs([os.path.join(self.folder, "clips")]),
+                         [os.path.join("a", "clip.mp4"), os.path.join("b", "clip.mp4")])
+
+if __name__ == "__main__":
+    unittest.main()
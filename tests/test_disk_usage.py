@@ -0,0 +1,17 @@
+import os
+import unittest
+from resources.tools.folder_scanner.disk_usage import UsageAggregator
+
+class RelativePathTest(unittest.TestCase):
+    def test_folder_root(self):
+        root = os.path.join(os.sep, "media", "videos")
+        self.assertEqual(UsageAggregator(root).relative(os.path.join(root, "2024", "clip.mp4")),
+                         os.path.join("2024", "clip.mp4"))
+        self.assertEqual(UsageAggregator(root).relative(root), ".")
+
+    def test_drive_root_keeps_the_first_character(self):
+        self.assertEqual(UsageAggregator(os.sep).relative(os.path.join(os.sep, "usr", "lib")),
+                         os.path.join("usr", "lib"))
+
+if __name__ == "__main__":
+    unittest.main()
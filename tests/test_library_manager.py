@@ -0,0 +1,24 @@
+import unittest
+from resources.library.library_manager import specifier_matches
+
+class SpecifierMatchesTest(unittest.TestCase):
+    # The fallback used when packaging isn't installed
+    def test_compatible_release_keeps_all_but_the_last_part(self):
+        self.assertTrue(specifier_matches("2.2.5", "~=", "2.2.0"))
+        self.assertFalse(specifier_matches("2.5", "~=", "2.2.0"))
+        self.assertTrue(specifier_matches("2.5", "~=", "2.2"))
+        self.assertFalse(specifier_matches("3.0", "~=", "2.2"))
+
+    def test_wildcards(self):
+        self.assertTrue(specifier_matches("1.4", "==", "1.*"))
+        self.assertFalse(specifier_matches("2.0", "==", "1.*"))
+        self.assertTrue(specifier_matches("1", "==", "1.0.*"))
+        self.assertFalse(specifier_matches("1.4", "!=", "1.*"))
+
+    def test_comparisons_are_numeric(self):
+        self.assertTrue(specifier_matches("1.0", "==", "1"))
+        self.assertFalse(specifier_matches("1.2", ">=", "1.10"))
+        self.assertTrue(specifier_matches("6.5.0", ">=", "6.5"))
+
+if __name__ == "__main__":
+    unittest.main()
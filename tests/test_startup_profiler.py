@@ -0,0 +1,132 @@
+import os
+import ast
+import sys
+import json
+import time
+import shutil
+import tempfile
+import unittest
+import subprocess
+import importlib.util
+from unittest import mock
+from resources.library import library_manager
+from resources.services.settings_store import get_settings
+from resources.services.startup_profiler import StartupProfiler, STARTUP_BUDGET_MS
+
+ROOT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_SCRIPT = os.path.join(ROOT_FOLDER, "root.py")
+
+def module_available(name):
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ImportError:
+        return False
+
+def loads(name):
+    # QtMultimedia can be installed but fail to load (no libpulse, for one)
+    result = subprocess.run([sys.executable, "-c", f"import {name}"], capture_output=True, cwd=ROOT_FOLDER)
+    return result.returncode == 0
+
+def budget_for(*names):
+    return {name: STARTUP_BUDGET_MS[name] for name in names}
+
+class StartupProfilerTest(unittest.TestCase):
+    def profiler_with(self, phases=(), marks=()):
+        # Phases and marks in seconds since the origin, as the profiler keeps them
+        profiler = StartupProfiler()
+        profiler.phases = [(name, start, end, 0) for name, start, end in phases]
+        profiler.marks = list(marks)
+        return profiler
+
+    def test_durations_add_up_repeated_phases(self):
+        profiler = self.profiler_with([("import app modules", 0.0, 0.1), ("import qt", 0.1, 0.6),
+                                       ("import app modules", 0.6, 0.65)])
+        durations = profiler.durations_ms()
+        self.assertAlmostEqual(durations["import app modules"], 150.0)
+        self.assertAlmostEqual(durations["import qt"], 500.0)
+
+    def test_marks_count_from_the_origin(self):
+        profiler = self.profiler_with([("setup_ui", 0.0, 0.2)], [("time to window", 1.25)])
+        self.assertAlmostEqual(profiler.durations_ms()["time to window"], 1250.0)
+
+    def test_phase_wins_over_mark_of_the_same_name(self):
+        profiler = self.profiler_with([("update_gifs", 0.0, 0.05)], [("update_gifs", 3.0)])
+        self.assertAlmostEqual(profiler.durations_ms()["update_gifs"], 50.0)
+
+    def test_check_budget_reports_only_phases_over_their_limit(self):
+        profiler = self.profiler_with([("import qt", 0.0, 2.0), ("setup_audio", 2.0, 2.1)],
+                                      [("time to window", 2.5)])
+        over = profiler.check_budget({"import qt": 1500, "setup_audio": 400, "time to window": 4000})
+        self.assertEqual([(name, limit) for name, _, limit in over], [("import qt", 1500)])
+        self.assertAlmostEqual(over[0][1], 2000.0)
+
+    def test_check_budget_ignores_phases_that_did_not_run(self):
+        profiler = self.profiler_with([("import qt", 0.0, 0.1)])
+        self.assertEqual(profiler.check_budget({"import qt": 1500, "CalendarReminderWidget": 300}), [])
+
+    def test_budget_limit_itself_is_within_budget(self):
+        profiler = self.profiler_with([("font registration", 0.0, 0.2)])
+        self.assertEqual(profiler.check_budget({"font registration": 200}), [])
+
+    def test_waiting_on_the_user_is_left_out_of_marks(self):
+        profiler = StartupProfiler()
+        with profiler.excluded("user name prompt"):
+            time.sleep(0.2)
+        profiler.mark("time to window")
+        durations = profiler.durations_ms()
+        self.assertGreaterEqual(durations["user name prompt"], 200.0)
+        self.assertLess(durations["time to window"], 100.0)
+        self.assertEqual(profiler.check_budget({"time to window": 100}), [])
+
+class RealStartupPhasesTest(unittest.TestCase):
+    # Times the real startup work, not hand-built phases
+
+    def test_warm_dependency_check_is_within_budget(self):
+        cache_folder = tempfile.mkdtemp()
+        cache_file = os.path.join(cache_folder, "dependency_check.json")
+        self.addCleanup(shutil.rmtree, cache_folder)
+        with mock.patch.object(library_manager, "USER_FOLDER", cache_folder), \
+                mock.patch.object(library_manager, "DEPENDENCY_CACHE_FILE", cache_file):
+            # What the previous launch left behind
+            library_manager.store_fingerprint(library_manager.compute_fingerprint())
+            profiler = StartupProfiler()
+            with profiler.phase("dependency check"):
+                library_manager.check_and_install_libraries()
+        self.assertEqual(profiler.check_budget(budget_for("dependency check")), [])
+
+    @unittest.skipUnless(module_available("PySide6"), "PySide6 is not installed")
+    def test_app_module_imports_are_within_budget(self):
+        # Runs the "import app modules" blocks of root.py in a fresh interpreter,
+        # after the Qt modules they build on, so that nothing is already imported
+        with open(ROOT_SCRIPT) as f:
+            source = f.read()
+        blocks = [ast.get_source_segment(source, node) for node in ast.parse(source).body
+                  if isinstance(node, ast.With) and ast.unparse(node.items[0].context_expr)
+                  == "profiler.phase('import app modules')"]
+        self.assertTrue(blocks)
+        script = "\n".join(["import json", "from PySide6 import QtWidgets, QtCore",
+                             "from resources.services.startup_profiler import profiler", *blocks,
+                             "print(json.dumps(profiler.phases))"])
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, cwd=ROOT_FOLDER)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        profiler = StartupProfiler()
+        profiler.phases = [tuple(phase) for phase in json.loads(result.stdout.splitlines()[-1])]
+        self.assertEqual(profiler.check_budget(budget_for("import app modules")), [])
+
+    @unittest.skipUnless(module_available("PySide6") and loads("PySide6.QtMultimedia"),
+                         "PySide6 with a working QtMultimedia is needed to build the window")
+    @unittest.skipUnless(get_settings().get("user_name"), "the first-run name prompt would wait for input")
+    @unittest.skipUnless(all(library_manager.is_requirement_satisfied(requirement)
+                             for requirement in library_manager.read_requirements()),
+                         "the dependency check would try to install packages")
+    def test_profile_startup_run_is_within_budget(self):
+        # Warm the dependency cache the way an earlier launch would have
+        library_manager.check_and_install_libraries()
+        environment = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+        result = subprocess.run([sys.executable, ROOT_SCRIPT, "--profile-startup"], capture_output=True,
+                                text=True, cwd=ROOT_FOLDER, env=environment, timeout=120)
+        # root.py exits 1 when any phase of STARTUP_BUDGET_MS is over its limit
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+
+if __name__ == "__main__":
+    unittest.main()